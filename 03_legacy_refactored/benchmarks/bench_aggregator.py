@@ -0,0 +1,46 @@
+"""Compares one charge per order with per-card micro-batching under a bursty checkout load.
+
+Every buyer checks out several orders at once against a stand-in gateway with a
+fixed latency. Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_aggregator
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import time
+
+from pay.aggregator import ChargeAggregator
+from pay.credit_card import CreditCard
+from pay.events import MemoryEventSink, set_event_sink
+from pay.gateway import HttpPaymentProcessor, StandInGateway, constant_latency
+from pay.order import LineItem, Order
+from pay.payment import pay_order
+
+
+def make_checkouts(buyers: int, orders_per_buyer: int) -> list[tuple[Order, CreditCard]]:
+    year = date.today().year + 2
+    cards = [CreditCard("1249190007575069", 1 + i % 12, year + i // 12) for i in range(buyers)]
+    return [(Order([LineItem(name=f"item-{j}", price=100 * (j + 1))]), card) for card in cards for j in range(orders_per_buyer)]
+
+
+def main(buyers: int = 60, orders_per_buyer: int = 5, concurrency: int = 32) -> None:
+    set_event_sink(MemoryEventSink())
+    with StandInGateway(latency=constant_latency(0.005)) as gateway, HttpPaymentProcessor(gateway.url, pool_size=concurrency) as processor:
+        payments = make_checkouts(buyers, orders_per_buyer)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(lambda payment: pay_order(*payment, processor), payments))
+        elapsed, requests = time.perf_counter() - start, gateway.requests
+        print(f"one charge per order: {len(payments) / elapsed:>8,.0f} orders/s, {requests} gateway requests")
+
+        payments = make_checkouts(buyers, orders_per_buyer)
+        start = time.perf_counter()
+        with ChargeAggregator(processor, max_wait=0.01, max_orders=orders_per_buyer) as aggregator:
+            with ThreadPoolExecutor(concurrency) as executor:
+                list(executor.map(lambda payment: aggregator.pay(*payment), payments))
+        elapsed, requests = time.perf_counter() - start, gateway.requests - requests
+        print(f"micro-batched:        {len(payments) / elapsed:>8,.0f} orders/s, {requests} gateway requests, {aggregator.stats.charges} charges")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measures loading a BIN index with hundreds of thousands of ranges and looking cards up in it.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_bin_index
+"""
+import random
+import threading
+import time
+import tracemalloc
+
+from pay.bin_index import NETWORK_RANGES, BinIndex, BinRange
+
+
+def make_ranges(count: int, seed: int = 0) -> list[BinRange]:
+    """Issuer ranges of 6 and 8 digit BINs on top of the network ranges."""
+    rng = random.Random(seed)
+    ranges = list(NETWORK_RANGES)
+    for i in range(count):
+        digits = rng.choice((6, 8))
+        low = rng.randrange(2 * 10 ** (digits - 1), 7 * 10 ** (digits - 1))
+        ranges.append(BinRange(str(low), str(low + rng.randrange(3)), "network", f"issuer-{i % 5_000}"))
+    return ranges
+
+
+def main(sizes: tuple[int, ...] = (10_000, 100_000, 500_000), lookups: int = 200_000) -> None:
+    rng = random.Random(1)
+    numbers = [str(rng.randrange(2 * 10 ** 15, 7 * 10 ** 15)) for _ in range(lookups)]
+    for size in sizes:
+        ranges = make_ranges(size)
+        start = time.perf_counter()
+        index = BinIndex(ranges)
+        load = time.perf_counter() - start
+        tracemalloc.start()
+        BinIndex(ranges)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for number in numbers:
+            index.lookup(number)
+        single = (time.perf_counter() - start) / lookups * 1e9
+        start = time.perf_counter()
+        index.lookup_many(numbers)
+        batch = (time.perf_counter() - start) / lookups * 1e9
+
+        # Lookups keep running on another thread while the table is replaced.
+        stop = threading.Event()
+        stalls = []
+
+        def read() -> None:
+            while not stop.is_set():
+                start = time.perf_counter()
+                index.lookup(numbers[0])
+                stalls.append(time.perf_counter() - start)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        start = time.perf_counter()
+        index.reload(ranges)
+        reload = time.perf_counter() - start
+        stop.set()
+        reader.join()
+
+        print(
+            f"{size:>8,} ranges ({index.segments:,} segments): load {load * 1e3:,.0f} ms (peak {peak / 2**20:,.0f} MiB), "
+            f"lookup {single:,.0f} ns, lookup_many {batch:,.0f} ns/card, "
+            f"reload {reload * 1e3:,.0f} ms with {len(stalls):,} concurrent lookups (max {max(stalls) * 1e3:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
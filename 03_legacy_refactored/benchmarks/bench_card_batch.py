@@ -0,0 +1,65 @@
+"""Compares validating a memory-mapped card batch with parsing and validating the same cards from CSV.
+
+Run from the 03_legacy_refactored directory, optionally with a record count:
+
+    python -m benchmarks.bench_card_batch 5000000
+"""
+import csv
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from pay.card_batch import CardBatch, VALID, validate_batch, write_card_batch
+from pay.credit_card import CreditCard
+from pay.processor import CardExpiredError, InvalidMonthError, PaymentProcessor
+
+
+def make_records(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    year = date.today().year
+    for _ in range(count):
+        number = "".join(rng.choices("0123456789", k=16))
+        yield CreditCard(number, rng.randint(1, 12), rng.randint(year - 1, year + 4)), rng.randint(100, 100_000)
+
+
+def validate_csv(path: Path) -> int:
+    processor = PaymentProcessor(None)
+    valid = 0
+    with path.open(newline="") as file:
+        for number, month, year, amount in csv.reader(file):
+            card = CreditCard(number, int(month), int(year))
+            try:
+                processor.validate_card(card, card.expiry_month, card.expiry_year)
+            except (CardExpiredError, InvalidMonthError, ValueError):
+                continue
+            valid += 1
+    return valid
+
+
+def main(count: int = 1_000_000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        binary_path, csv_path = Path(directory) / "cards.bin", Path(directory) / "cards.csv"
+        write_card_batch(binary_path, make_records(count))
+        with csv_path.open("w", newline="") as file:
+            csv.writer(file).writerows((card.number, card.expiry_month, card.expiry_year, amount) for card, amount in make_records(count))
+
+        start = time.perf_counter()
+        with CardBatch(binary_path) as batch:
+            binary_valid = int((validate_batch(batch.records) == VALID).sum())
+        binary = time.perf_counter() - start
+
+        start = time.perf_counter()
+        csv_valid = validate_csv(csv_path)
+        parsed = time.perf_counter() - start
+
+        assert binary_valid == csv_valid
+        print(f"{count:,} cards, {binary_valid:,} valid")
+        print(f"CSV + validate_card:     {count / parsed:>14,.0f} records/s ({csv_path.stat().st_size / 2**20:.1f} MiB)")
+        print(f"mmap + validate_batch:   {count / binary:>14,.0f} records/s ({binary_path.stat().st_size / 2**20:.1f} MiB, {parsed / binary:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
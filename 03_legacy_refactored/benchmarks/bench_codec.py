@@ -0,0 +1,57 @@
+"""Compares the size and speed of encoding synthetic payments with pay.codec, pickle and JSON.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_codec
+"""
+import json
+import pickle
+import time
+
+from pay.codec import decode_payments, encode_payments
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order, OrderStatus
+from pay.synth import Synthesizer
+
+
+def to_json(payments: list) -> bytes:
+    return json.dumps([
+        [[[item.name, item.price, item.quantity] for item in order.line_items], order.status.value, order.currency,
+         [card.number, card.expiry_month, card.expiry_year]]
+        for order, card in payments
+    ]).encode()
+
+
+def from_json(buffer: bytes) -> list:
+    return [
+        (Order([LineItem(*item) for item in items], OrderStatus(status), currency), CreditCard(*card))
+        for items, status, currency, card in json.loads(buffer)
+    ]
+
+
+def best_of(function, repeat: int = 5) -> tuple[float, object]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(count: int = 20_000) -> None:
+    payments = [(record.order, record.card) for record in Synthesizer(seed=0).orders(count)]
+    print(f"{count:,} payments, {sum(len(order.line_items) for order, _ in payments):,} line items")
+    print(f"{'':<8} {'size':>10} {'encode':>12} {'decode':>12}")
+    for label, encode, decode in [
+        ("codec", encode_payments, decode_payments),
+        ("pickle", lambda p: pickle.dumps(p, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ("json", to_json, from_json),
+    ]:
+        encode_time, buffer = best_of(lambda: encode(payments))
+        decode_time, decoded = best_of(lambda: decode(buffer))
+        assert decoded == payments
+        print(f"{label:<8} {len(buffer) / 1e6:>7.2f} MB {encode_time / count * 1e6:>9.2f} us {decode_time / count * 1e6:>9.2f} us")
+
+
+if __name__ == "__main__":
+    main()
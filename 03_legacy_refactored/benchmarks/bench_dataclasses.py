@@ -0,0 +1,68 @@
+"""Compares memory use and construction speed of the slotted LineItem, Order and
+CreditCard with the plain dataclasses they replaced.
+
+Run from the 03_legacy_refactored directory, optionally with instance counts:
+
+    python -m benchmarks.bench_dataclasses 1000000 10000000
+"""
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+from pay.credit_card import CreditCard, FrozenCreditCard
+from pay.order import FrozenLineItem, LineItem, Order, OrderStatus
+
+
+@dataclass
+class DictLineItem:
+    name: str
+    price: int
+    quantity: int = 1
+
+
+@dataclass
+class DictOrder:
+    line_items: list = field(default_factory=list)
+    status: OrderStatus = OrderStatus.OPEN
+
+
+@dataclass
+class DictCreditCard:
+    number: str
+    expiry_month: int
+    expiry_year: int
+
+
+def measure(label: str, count: int, make, repeat: int = 3) -> None:
+    # Timed without tracemalloc, whose per-allocation hook would slow construction down.
+    elapsed = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        instances = [make(i) for i in range(count)]
+        elapsed = min(elapsed, time.perf_counter() - start)
+        del instances
+    # A separate, traced pass only for the memory figure.
+    tracemalloc.start()
+    instances = [make(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    print(f"  {label:<18} {size / count:>7.1f} B/instance  {count / elapsed:>12,.0f} instances/s")
+
+
+def main(counts: list[int]) -> None:
+    for count in counts:
+        print(f"{count:,} instances")
+        measure("dict LineItem", count, lambda i: DictLineItem("Coke", i, 2))
+        measure("LineItem", count, lambda i: LineItem("Coke", i, 2))
+        measure("FrozenLineItem", count, lambda i: FrozenLineItem("Coke", i, 2))
+        measure("dict Order", count, lambda i: DictOrder())
+        measure("Order", count, lambda i: Order())
+        measure("dict CreditCard", count, lambda i: DictCreditCard("1249190007575069", 12, i))
+        measure("CreditCard", count, lambda i: CreditCard("1249190007575069", 12, i))
+        measure("FrozenCreditCard", count, lambda i: FrozenCreditCard("1249190007575069", 12, i))
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000_000])
@@ -0,0 +1,57 @@
+"""Compares printing every payment event with the buffered event sink.
+
+Events are written to a pipe whose reader is deliberately slow, like a busy
+terminal or log shipper. Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_events
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+
+from pay.events import BufferedEventSink, EventKind, PaymentEvent
+
+
+def slow_pipe() -> tuple[object, threading.Thread]:
+    """Returns a text stream into a pipe that is drained 4 KiB at a time, every millisecond."""
+    read_fd, write_fd = os.pipe()
+
+    def drain() -> None:
+        while os.read(read_fd, 4096):
+            time.sleep(0.001)
+        os.close(read_fd)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    return os.fdopen(write_fd, "w", buffering=1), reader
+
+
+def run(emit, events: int, workers: int) -> float:
+    event = PaymentEvent(EventKind.PAID, "Order paid in full: $250.00", 250_00, "************5069")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        for _ in executor.map(lambda _: emit(event), range(events)):
+            pass
+    return time.perf_counter() - start
+
+
+def main(events: int = 20_000, workers: int = 8) -> None:
+    stream, reader = slow_pipe()
+    printed = run(lambda event: print(event.message, file=stream), events, workers)
+    sink = BufferedEventSink(stream, policy="block")
+    buffered_block = run(sink.emit, events, workers)
+    sink.close()
+    sink = BufferedEventSink(stream, policy="drop")
+    buffered_drop = run(sink.emit, events, workers)
+    sink.close()
+    stream.close()
+    reader.join()
+
+    print(f"print:                 {printed * 1e3:>8.1f} ms")
+    print(f"buffered, block:       {buffered_block * 1e3:>8.1f} ms")
+    print(f"buffered, drop:        {buffered_drop * 1e3:>8.1f} ms ({sink.dropped:,} dropped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Measures how long importing the payment path takes and checks it against a budget.
+
+Every run imports the modules in a fresh interpreter with `python -X importtime`
+and the best of the runs is compared with the budget, so a stray import-time side
+effect or heavy dependency shows up as a failure. Run from the
+03_legacy_refactored directory:
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --budget-ms 40 --modules pay.payment pay.bulk
+
+The exit status is 1 when the import takes longer than the budget.
+"""
+import argparse
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["pay", "pay.payment", "pay.processor"]
+
+
+def import_times(modules: list[str]) -> dict[str, tuple[int, int]]:
+    """Returns the (self, cumulative) import time in microseconds of every module imported."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=75.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="show the slowest modules by self time")
+    args = parser.parse_args()
+
+    runs = [import_times(args.modules) for _ in range(args.runs)]
+    totals = [sum(own for own, _ in times.values()) for times in runs]
+    best = runs[totals.index(min(totals))]
+    total_ms = min(totals) / 1000
+
+    print(f"import {', '.join(args.modules)}: {total_ms:.1f} ms (best of {args.runs}), {len(best)} modules")
+    for name, (own, cumulative) in sorted(best.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"  {name:<40} {own / 1000:>7.1f} ms self {cumulative / 1000:>7.1f} ms cumulative")
+    if total_ms > args.budget_ms:
+        print(f"OVER BUDGET: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Compares the charge ledger's group commit with one commit per charge.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_ledger
+"""
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from pay.credit_card import CreditCard
+from pay.ledger import ChargeLedger
+from pay.order import LineItem, Order
+
+
+class AcceptingProcessor:
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        pass
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        pass
+
+
+def run(directory: str, count: int, workers: int, max_batch: int) -> None:
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    processor = AcceptingProcessor()
+    with ChargeLedger(Path(directory) / f"ledger-{max_batch}.db", max_batch=max_batch) as ledger:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda i: ledger.pay(f"order-{i}", Order([LineItem("Coke", 300)]), card, processor), range(count)))
+        elapsed = time.perf_counter() - start
+        print(f"max_batch={max_batch:>4}: {count / elapsed:>9,.0f} charges/s, {ledger.commits:>5} commits")
+
+
+def main(count: int = 2_000, workers: int = 32) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        run(directory, count, workers, max_batch=1)
+        run(directory, count, workers, max_batch=512)
+
+
+if __name__ == "__main__":
+    main()
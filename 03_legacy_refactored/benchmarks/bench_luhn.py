@@ -0,0 +1,49 @@
+"""Compares the original, the table-driven and the vectorized Luhn check.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_luhn
+"""
+import random
+import timeit
+
+from pay.batch import luhn_checksum_batch
+from pay.processor import luhn_checksum
+
+
+def legacy_luhn_checksum(card_number: str) -> bool:
+    """The list-building implementation luhn_checksum used to have."""
+    def digits_of(card_nr: str):
+        return [int(d) for d in card_nr]
+
+    digits = digits_of(card_number)
+    checksum = sum(digits[-1::-2])
+    for digit in digits[-2::-2]:
+        checksum += sum(digits_of(str(digit * 2)))
+    return checksum % 10 == 0
+
+
+def make_card_numbers(count: int, seed: int = 0) -> list[str]:
+    """Returns random card numbers of 12 to 19 digits."""
+    rng = random.Random(seed)
+    return ["".join(rng.choices("0123456789", k=rng.randint(12, 19))) for _ in range(count)]
+
+
+def main(count: int = 200_000, repeat: int = 3) -> None:
+    numbers = make_card_numbers(count)
+    assert luhn_checksum_batch(numbers).tolist() == [luhn_checksum(n) for n in numbers]
+    assert [legacy_luhn_checksum(n) for n in numbers] == [luhn_checksum(n) for n in numbers]
+    encoded = [n.encode() for n in numbers]
+
+    legacy = min(timeit.repeat(lambda: [legacy_luhn_checksum(n) for n in numbers], number=1, repeat=repeat))
+    scalar_bytes = min(timeit.repeat(lambda: [luhn_checksum(n) for n in encoded], number=1, repeat=repeat))
+    scalar = min(timeit.repeat(lambda: [luhn_checksum(n) for n in numbers], number=1, repeat=repeat))
+    batch = min(timeit.repeat(lambda: luhn_checksum_batch(numbers), number=1, repeat=repeat))
+    print(f"legacy luhn_checksum:  {count / legacy:>12,.0f} cards/s")
+    print(f"luhn_checksum (str):   {count / scalar:>12,.0f} cards/s ({legacy / scalar:.1f}x)")
+    print(f"luhn_checksum (bytes): {count / scalar_bytes:>12,.0f} cards/s ({legacy / scalar_bytes:.1f}x)")
+    print(f"luhn_checksum_batch:   {count / batch:>12,.0f} cards/s ({legacy / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Measures the overhead of the metrics hooks on the payment path, disabled and enabled.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_metrics
+"""
+import os
+import timeit
+from datetime import date
+
+from pay.credit_card import CreditCard
+from pay.events import BufferedEventSink, set_event_sink
+from pay.metrics import METRICS
+from pay.order import LineItem, Order
+from pay.payment import pay_order
+from pay.processor import API_KEY, PaymentProcessor
+
+
+def main(count: int = 100_000) -> None:
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    processor = PaymentProcessor(API_KEY)
+    order = Order([LineItem(name="Shoes", price=100_00, quantity=2), LineItem(name="Hat", price=50_00)])
+    unwrapped = PaymentProcessor.validate_card.__wrapped__
+
+    def per_call(function) -> float:
+        return min(timeit.repeat(function, number=count, repeat=5)) / count * 1e9
+
+    raw = per_call(lambda: unwrapped(processor, card, card.expiry_month, card.expiry_year))
+    disabled = per_call(lambda: processor.validate_card(card, card.expiry_month, card.expiry_year))
+    with open(os.devnull, "w") as devnull:
+        sink = BufferedEventSink(devnull)
+        set_event_sink(sink)
+        pay_disabled = per_call(lambda: pay_order(order, card, processor))
+        METRICS.enable()
+        enabled = per_call(lambda: processor.validate_card(card, card.expiry_month, card.expiry_year))
+        pay_enabled = per_call(lambda: pay_order(order, card, processor))
+        METRICS.disable()
+        sink.close()
+        set_event_sink(None)
+
+    print(f"validate_card without hook: {raw:>8,.0f} ns")
+    print(f"validate_card disabled:     {disabled:>8,.0f} ns (+{disabled - raw:,.0f} ns)")
+    print(f"validate_card enabled:      {enabled:>8,.0f} ns (+{enabled - raw:,.0f} ns)")
+    print(f"pay_order disabled:         {pay_disabled:>8,.0f} ns")
+    print(f"pay_order enabled:          {pay_enabled:>8,.0f} ns (+{pay_enabled - pay_disabled:,.0f} ns)")
+    print(METRICS.to_json())
+
+
+if __name__ == "__main__":
+    main()
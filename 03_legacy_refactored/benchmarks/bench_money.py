@@ -0,0 +1,47 @@
+"""Compares summing and formatting millions of amounts with floats, ints and Money.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_money
+"""
+import random
+import time
+
+import numpy as np
+
+from pay.money import Money, format_money, formatter, sum_minor_units
+
+
+def timed(label: str, function, count: int) -> None:
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1e3:>8,.0f} ms ({elapsed / count * 1e9:,.0f} ns each)")
+
+
+def main(count: int = 2_000_000) -> None:
+    rng = random.Random(0)
+    amounts = [rng.randrange(1, 10_000_00) for _ in range(count)]
+    array = np.array(amounts, dtype=np.int64)
+    moneys = [Money(amount) for amount in amounts]
+
+    print(f"summing {count:,} amounts")
+    timed("sum() of ints", lambda: sum(amounts), count)
+    timed("sum_minor_units(int64 array)", lambda: sum_minor_units(array), count)
+    timed("Money.total()", lambda: Money.total(moneys), count)
+    timed("sum() of Money", lambda: sum(moneys), count)
+
+    print(f"formatting {count:,} amounts")
+    timed('f"${amount/100:.2f}"', lambda: [f"${amount/100:.2f}" for amount in amounts], count)
+    timed("format_money()", lambda: [format_money(amount) for amount in amounts], count)
+    usd = formatter("USD")
+    timed("cached formatter('USD')", lambda: [usd(amount) for amount in amounts], count)
+    timed("str(Money)", lambda: [str(money) for money in moneys], count)
+
+    # Floats stop being exact well before int64 does.
+    large = 2 ** 60 + 1
+    print(f"{large} cents: float {f'${large/100:.2f}'}, exact {format_money(large)}")
+
+
+if __name__ == "__main__":
+    main()
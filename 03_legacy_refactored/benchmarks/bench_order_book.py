@@ -0,0 +1,58 @@
+"""Compares memory use and total computation of LineItem objects and an OrderBook.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_order_book
+"""
+import time
+import tracemalloc
+
+from pay.order import LineItem, Order
+from pay.order_book import OrderBook
+
+NAMES = [f"product-{i}" for i in range(1_000)]
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main(lines: int = 1_000_000, lines_per_order: int = 100) -> None:
+    def rows():
+        return (LineItem(name=NAMES[i % len(NAMES)], price=100 + i % 997, quantity=1 + i % 5) for i in range(lines))
+
+    def build_orders():
+        items = list(rows())
+        return [Order(items[i:i + lines_per_order]) for i in range(0, lines, lines_per_order)]
+
+    def build_book():
+        book = OrderBook()
+        items = rows()
+        for _ in range(0, lines, lines_per_order):
+            book.add_order(next(items) for _ in range(lines_per_order))
+        return book
+
+    orders, orders_size, orders_build = measure(build_orders)
+    book, book_size, book_build = measure(build_book)
+
+    start = time.perf_counter()
+    order_totals = [sum(item.total for item in order.line_items) for order in orders]
+    orders_sum = time.perf_counter() - start
+    start = time.perf_counter()
+    book_totals = book.order_totals()
+    book_sum = time.perf_counter() - start
+    assert book_totals.tolist() == order_totals
+
+    print(f"{lines:,} line items in {lines // lines_per_order:,} orders")
+    print(f"Order/LineItem: {orders_size / 2**20:>8.1f} MiB, built in {orders_build:.2f}s, re-summed in {orders_sum * 1e3:.1f} ms")
+    print(f"OrderBook:      {book_size / 2**20:>8.1f} MiB, built in {book_build:.2f}s, group sums in {book_sum * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Compares the running Order.total with re-summing every line item on each read.
+
+Also times building a two-item order, which pays for keeping the total up to date.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_order_total
+"""
+import timeit
+
+from pay.order import LineItem, Order
+
+
+def recomputed_total(order: Order) -> int:
+    """The recompute-on-read implementation Order.total used to have."""
+    return sum(item.total for item in order.line_items)
+
+
+def build_order() -> Order:
+    order = Order()
+    order.line_items.append(LineItem(name="Shoes", price=100_00, quantity=2))
+    order.line_items.append(LineItem(name="Hat", price=50_00))
+    return order
+
+
+def main(reads: int = 1_000) -> None:
+    builds = 100_000
+    print(f"build a 2-item order: {min(timeit.repeat(build_order, number=builds, repeat=5)) / builds * 1e9:,.0f} ns")
+    for size in (10, 1_000, 10_000):
+        order = Order([LineItem(name=f"item-{i}", price=100 + i, quantity=1 + i % 3) for i in range(size)])
+        assert order.total == recomputed_total(order)
+        running = timeit.timeit(lambda: order.total, number=reads)
+        recomputed = timeit.timeit(lambda: recomputed_total(order), number=reads)
+        item = order.line_items[size // 2]
+        reprice = timeit.timeit(lambda: setattr(item, "quantity", item.quantity + 1), number=reads)
+        print(
+            f"{size:>6} lines: running {running / reads * 1e9:>9,.0f} ns/read, "
+            f"recomputed {recomputed / reads * 1e9:>12,.0f} ns/read, "
+            f"reprice {reprice / reads * 1e9:>6,.0f} ns/update"
+        )
+
+
+if __name__ == "__main__":
+    main()
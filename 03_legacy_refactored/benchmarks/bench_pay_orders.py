@@ -0,0 +1,40 @@
+"""Measures how pay_orders scales with the number of workers when the processor is slow.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_pay_orders
+"""
+import time
+from datetime import date
+
+from pay.bulk import pay_orders
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order
+
+
+class SlowPaymentProcessor:
+    """A processor that accepts every card after a fixed gateway latency."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        pass
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        time.sleep(self.latency)
+
+
+def main(count: int = 400, latency: float = 0.005) -> None:
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    processor = SlowPaymentProcessor(latency)
+    for workers in (1, 2, 4, 8, 16, 32):
+        payments = [(Order([LineItem(name="Coke", price=300)]), card) for _ in range(count)]
+        start = time.perf_counter()
+        pay_orders(payments, processor, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>3} workers: {count / elapsed:>10,.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
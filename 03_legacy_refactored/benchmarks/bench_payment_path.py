@@ -0,0 +1,55 @@
+"""Measures the cost of one payment through PaymentProcessor, with and without
+handing the validation token from validate_card to charge, and of the expiry
+check with the cached month clock against building datetimes per card.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_payment_path
+"""
+import os
+import timeit
+from datetime import date, datetime
+
+from pay.credit_card import CreditCard
+from pay.clock import SYSTEM_CLOCK
+from pay.events import BufferedEventSink, set_event_sink
+from pay.processor import API_KEY, PaymentProcessor
+
+
+def datetime_is_expired(month: int, year: int) -> bool:
+    """The expiry check validate_card used to do for every card."""
+    return datetime(year, month, 1) < datetime.now()
+
+
+def main(count: int = 100_000) -> None:
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    processor = PaymentProcessor(API_KEY)
+
+    def validate_twice() -> None:
+        processor.validate_card(card, card.expiry_month, card.expiry_year)
+        processor.charge(card, 500)
+
+    def validate_once() -> None:
+        validation = processor.validate_card(card, card.expiry_month, card.expiry_year)
+        processor.charge(card, 500, validation)
+
+    # Every charge emits an event: write them all to devnull, and wait for the last one.
+    with open(os.devnull, "w") as devnull:
+        sink = BufferedEventSink(devnull)
+        set_event_sink(sink)
+        twice = timeit.timeit(validate_twice, number=count)
+        once = timeit.timeit(validate_once, number=count)
+        sink.close()
+        set_event_sink(None)
+    print(f"validate + charge (validates twice): {twice / count * 1e6:6.2f} us/payment")
+    print(f"validate + charge with token:        {once / count * 1e6:6.2f} us/payment")
+    print(f"saved per charge:                    {(twice - once) / count * 1e6:6.2f} us")
+
+    per_card = timeit.timeit(lambda: datetime_is_expired(card.expiry_month, card.expiry_year), number=count)
+    cached = timeit.timeit(lambda: SYSTEM_CLOCK.is_expired(card.expiry_month, card.expiry_year), number=count)
+    print(f"expiry check with datetime.now():    {per_card / count * 1e9:6.0f} ns/card")
+    print(f"expiry check with MonthClock:        {cached / count * 1e9:6.0f} ns/card")
+
+
+if __name__ == "__main__":
+    main()
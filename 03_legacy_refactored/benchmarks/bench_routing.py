@@ -0,0 +1,41 @@
+"""Compares one gateway with EWMA routing and hedged validation over gateways with skewed latency.
+
+Three stand-in gateways are started: one fast, one with a long tail and one slow.
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_routing
+"""
+import contextlib
+
+from pay.events import MemoryEventSink, set_event_sink
+from pay.gateway import HttpPaymentProcessor, StandInGateway, constant_latency, lognormal_latency
+from pay.loadgen import run_load
+from pay.routing import RoutingProcessor
+
+LATENCIES = {
+    "fast": lognormal_latency(0.004, 0.3),
+    "long tail": lognormal_latency(0.004, 1.5),
+    "slow": constant_latency(0.02),
+}
+
+
+def main(payments: int = 2_000, concurrency: int = 16) -> None:
+    set_event_sink(MemoryEventSink())
+    with contextlib.ExitStack() as stack:
+        gateways = [stack.enter_context(StandInGateway(latency=latency, seed=i)) for i, latency in enumerate(LATENCIES.values())]
+        backends = [stack.enter_context(HttpPaymentProcessor(gateway.url, pool_size=concurrency)) for gateway in gateways]
+
+        for name, backend in zip(LATENCIES, backends):
+            print(f"{'only ' + name:<24} {run_load(backend, payments, concurrency)}")
+        for label, options in [
+            ("routed, latency", {}),
+            ("routed, least loaded", {"strategy": "least_loaded"}),
+            ("routed, hedged at 10ms", {"hedge_after": 0.01}),
+        ]:
+            with RoutingProcessor(backends, **options) as router:
+                print(f"{label:<24} {run_load(router, payments, concurrency)}")
+                print(f"{'':<24} calls {[s.calls for s in router.stats]}, hedges {[s.hedges for s in router.stats]}")
+
+
+if __name__ == "__main__":
+    main()
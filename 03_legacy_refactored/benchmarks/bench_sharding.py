@@ -0,0 +1,63 @@
+"""Measures how sharded settlement scales with the number of worker processes.
+
+The processor does real CPU work, a Luhn check and the order total per payment, so
+a single process is bound by the GIL. Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_sharding
+"""
+import contextlib
+import os
+import time
+from datetime import date
+
+from pay.credit_card import CreditCard
+from pay.events import MemoryEventSink, set_event_sink
+from pay.order import LineItem, Order
+from pay.payment import attempt_payment
+from pay.processor import luhn_checksum
+from pay.sharding import pay_orders_sharded
+
+
+class CpuBoundProcessor:
+    """Validates with a few rounds of Luhn checks and charges without any I/O."""
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        for _ in range(50):
+            if not luhn_checksum(card.number):
+                raise ValueError("Invalid Card number")
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        pass
+
+
+def make_payments(count: int) -> list[tuple[Order, CreditCard]]:
+    year = date.today().year + 2
+    cards = [CreditCard("1249190007575069", 1 + i % 12, year) for i in range(64)]
+    return [
+        (Order([LineItem(name=f"item-{j}", price=100 + j) for j in range(10)]), cards[i % len(cards)])
+        for i in range(count)
+    ]
+
+
+def main(count: int = 20_000) -> None:
+    set_event_sink(MemoryEventSink())
+    payments = make_payments(count)
+    processor = CpuBoundProcessor()
+    start = time.perf_counter()
+    for order, card in payments:
+        attempt_payment(order, card, processor)
+    baseline = count / (time.perf_counter() - start)
+    print(f"single process: {baseline:>10,.0f} orders/s")
+
+    cpus = os.cpu_count() or 1
+    for shards in sorted({1, 2, 4, cpus}):
+        payments = make_payments(count)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            pay_orders_sharded(payments, shards=shards, processor_factory=CpuBoundProcessor)
+        rate = count / (time.perf_counter() - start)
+        print(f"{shards:>3} shards:     {rate:>10,.0f} orders/s ({rate / baseline:.2f}x, {cpus} CPUs)")
+
+
+if __name__ == "__main__":
+    main()
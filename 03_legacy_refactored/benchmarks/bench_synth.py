@@ -0,0 +1,35 @@
+"""Measures how fast pay.synth produces cards and orders in every output form.
+
+Run from the 03_legacy_refactored directory:
+
+    python -m benchmarks.bench_synth
+"""
+import os
+import tempfile
+import time
+
+from pay.synth import Synthesizer, write_card_batch, write_csv, write_jsonl
+
+
+def rate(label: str, count: int, function) -> None:
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {count / elapsed:>12,.0f} records/s")
+
+
+def main(cards: int = 2_000_000, orders: int = 200_000) -> None:
+    rate("card chunks (columns)", cards, lambda: sum(len(chunk) for chunk in Synthesizer(0).card_chunks(cards)))
+    rate("card numbers as str", cards, lambda: sum(1 for _ in Synthesizer(0).card_numbers(cards)))
+    rate("CreditCard objects", cards, lambda: sum(1 for _ in Synthesizer(0).cards(cards)))
+    with tempfile.TemporaryDirectory() as directory:
+        rate("card batch file", cards, lambda: write_card_batch(Synthesizer(0), cards, os.path.join(directory, "cards.bin")))
+    rate("order chunks (columns)", orders, lambda: sum(len(chunk) for chunk in Synthesizer(0).order_chunks(orders)))
+    rate("Order objects", orders, lambda: sum(1 for _ in Synthesizer(0).orders(orders)))
+    with open(os.devnull, "w") as devnull:
+        rate("orders as JSONL", orders, lambda: write_jsonl(Synthesizer(0), orders, devnull))
+        rate("orders as CSV", orders, lambda: write_csv(Synthesizer(0), orders, devnull))
+
+
+if __name__ == "__main__":
+    main()
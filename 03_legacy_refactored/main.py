@@ -1,6 +1,7 @@
 from pay.order import LineItem, Order
 from pay.payment import CreditCard,pay_order
-from pay.processor import PaymentProcessor, API_KEY
+from pay.processor import PaymentProcessor
+from pay.settings import get_settings
 
 
 
@@ -10,7 +11,7 @@ def main():
     month = int(input('Please enter the card expiration month: '))
     year = int(input('Please enter the card expiration year: '))
     card = CreditCard(card_number, month, year)
-    processor = PaymentProcessor(API_KEY)
+    processor = PaymentProcessor(get_settings().api_key)
     order = Order()
     order.line_items.append(LineItem(name="Shoes", price=100_00, quantity=2))
     order.line_items.append(LineItem(name="Hat", price=50_00))
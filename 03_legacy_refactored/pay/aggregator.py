@@ -0,0 +1,151 @@
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+import threading
+import time
+from typing import Callable
+
+from pay.credit_card import CreditCard
+from pay.money import Money
+from pay.order import Order
+from pay.payment import PaymentProcessor, PaymentResult, PaymentStatus, charge_card, settle_order
+
+
+@dataclass(slots=True)
+class AggregatorStats:
+    orders: int = 0
+    charges: int = 0
+
+
+@dataclass(slots=True)
+class _Batch:
+    card: CreditCard
+    currency: str
+    deadline: float
+    amount: int = 0
+    members: list[tuple[Order, int, "Future[PaymentResult]"]] = field(default_factory=list)
+
+
+class ChargeAggregator:
+    """Coalesces the orders paid with the same card into one charge.
+
+    Orders submitted with the same card (number and expiry date) in the same currency
+    are collected into a batch, which is charged once for its combined total when it has
+    max_orders orders, when the next order would take it above max_amount, or max_wait
+    seconds after its first order arrived, whichever comes first. The outcome is fanned back out: every
+    order of a batch is marked as paid, or they all fail together with the same status.
+    Each order gets its own PaymentResult for its own total, and its events are emitted
+    as pay_order would.
+
+    Batches that reach a size limit are charged on the submitting thread; batches that
+    time out are charged on a background thread.
+    """
+
+    def __init__(
+        self,
+        processor: PaymentProcessor,
+        max_wait: float = 0.05,
+        max_orders: int = 10,
+        max_amount: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_orders < 1:
+            raise ValueError("max_orders must be at least 1.")
+        if max_amount is not None and max_amount < 1:
+            raise ValueError("max_amount must be positive.")
+        self.processor = processor
+        self.max_wait = max_wait
+        self.max_orders = max_orders
+        self.max_amount = max_amount
+        self.clock = clock
+        self.stats = AggregatorStats()
+        self._batches: dict[tuple, _Batch] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_expired, name="charge-aggregator", daemon=True)
+        self._flusher.start()
+
+    def __enter__(self) -> "ChargeAggregator":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def submit(self, order: Order, card: CreditCard) -> "Future[PaymentResult]":
+        """Adds an order to its card's batch and returns a future of its PaymentResult."""
+        future: Future[PaymentResult] = Future()
+        amount = order.total
+        if amount == 0:
+            future.set_result(PaymentResult(PaymentStatus.FAILED, amount, "Cannot pay an order with total 0."))
+            return future
+
+        ready = []
+        # Orders in different currencies are never summed into one charge.
+        key = (card.number, card.expiry_month, card.expiry_year, order.currency)
+        with self._condition:
+            if self._closed:
+                raise ValueError("The aggregator is closed.")
+            self.stats.orders += 1
+            batch = self._batches.get(key)
+            if batch is not None and self.max_amount is not None and batch.amount + amount > self.max_amount:
+                ready.append(self._batches.pop(key))
+                batch = None
+            if batch is None:
+                batch = self._batches[key] = _Batch(card, order.currency, self.clock() + self.max_wait)
+                self._condition.notify()
+            batch.members.append((order, amount, future))
+            batch.amount += amount
+            if len(batch.members) >= self.max_orders or (self.max_amount is not None and batch.amount >= self.max_amount):
+                ready.append(self._batches.pop(key))
+        for batch in ready:
+            self._charge(batch)
+        return future
+
+    def pay(self, order: Order, card: CreditCard) -> PaymentResult:
+        """Submits an order and waits for the charge of its batch."""
+        return self.submit(order, card).result()
+
+    def flush(self) -> None:
+        """Charges every open batch now."""
+        with self._condition:
+            ready = list(self._batches.values())
+            self._batches.clear()
+        for batch in ready:
+            self._charge(batch)
+
+    def close(self) -> None:
+        """Charges the open batches and stops the background thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._flusher.join()
+        self.flush()
+
+    def _charge(self, batch: _Batch) -> None:
+        with self._condition:
+            self.stats.charges += 1
+        try:
+            combined = charge_card(batch.card, Money(batch.amount, batch.currency), self.processor)
+        except Exception as e:
+            for _, _, future in batch.members:
+                future.set_exception(e)
+            return
+        for order, amount, future in batch.members:
+            result = PaymentResult(combined.status, amount, combined.message)
+            settle_order(order, batch.card, result)
+            future.set_result(result)
+
+    def _flush_expired(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = self.clock()
+                    expired = [key for key, batch in self._batches.items() if batch.deadline <= now]
+                    if expired:
+                        break
+                    deadlines = [batch.deadline for batch in self._batches.values()]
+                    self._condition.wait(min(deadlines) - now if deadlines else None)
+                if self._closed:
+                    return
+                ready = [self._batches.pop(key) for key in expired]
+            for batch in ready:
+                self._charge(batch)
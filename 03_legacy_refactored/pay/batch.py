@@ -0,0 +1,83 @@
+from typing import Sequence
+
+import numpy as np
+
+# Digit sum of 2 * d for every single digit d, e.g. 7 -> 14 -> 1 + 4 = 5.
+DOUBLED_DIGIT_SUM = np.array([0, 2, 4, 6, 8, 1, 3, 5, 7, 9], dtype=np.int64)
+_DOUBLED_DIGIT_SUM_U8 = DOUBLED_DIGIT_SUM.astype(np.uint8)
+
+
+def _char_codes(card_numbers: Sequence[str] | np.ndarray) -> np.ndarray:
+    """Returns a (n, width) matrix of character codes, zero padded on the right."""
+    numbers = np.asarray(card_numbers)
+    if numbers.dtype.kind not in "SU":
+        numbers = numbers.astype(str)
+    numbers = np.ascontiguousarray(numbers.reshape(-1))
+    code_type = np.uint32 if numbers.dtype.kind == "U" else np.uint8
+    width = numbers.dtype.itemsize // np.dtype(code_type).itemsize
+    return numbers.view(code_type).reshape(len(numbers), width)
+
+
+def luhn_checksum_batch(card_numbers: Sequence[str] | np.ndarray) -> np.ndarray:
+    """Validates the Luhn checksum of many card numbers in a single vectorized pass.
+
+    Card numbers may have different lengths; every number is aligned on its last
+    digit before the doubling positions are worked out.
+
+    Args:
+        card_numbers: A sequence or NumPy array of card numbers (str or bytes).
+
+    Raises:
+        ValueError: If any card number contains a non-digit character.
+
+    Returns:
+        np.ndarray: A boolean mask, True where the card number passes the Luhn check.
+    """
+    return luhn_checksum_codes(_char_codes(card_numbers))
+
+
+def luhn_checksum_codes(codes: np.ndarray, reject_non_digits: bool = True) -> np.ndarray:
+    """Validates the Luhn checksum of card numbers given as a (n, width) matrix of character codes.
+
+    Each row holds one card number left aligned and zero padded on the right, which
+    is also the layout of a fixed-width NumPy byte string column, so the matrix can
+    be a view into a larger buffer. Digits are worked on as uint8 and positions as
+    int16, so the temporaries are a few bytes per character.
+
+    Args:
+        codes: The (n, width) matrix of character codes.
+        reject_non_digits: Whether a non-digit character raises; if False, the
+            numbers containing one just fail the check.
+
+    Raises:
+        ValueError: If any card number contains a non-digit character and
+            reject_non_digits is True.
+
+    Returns:
+        np.ndarray: A boolean mask, True where the card number passes the Luhn check.
+    """
+    present = codes != 0
+    # Codes below "0" wrap around to large values, so one comparison finds every non-digit.
+    digits = codes - ord("0")
+    bad = present & (digits > 9)
+    well_formed = ~bad.any(axis=1)
+    if reject_non_digits and not well_formed.all():
+        raise ValueError("Card numbers must only contain digits.")
+
+    digits = np.where(present & ~bad, digits, 0).astype(np.uint8)
+    lengths = present.sum(axis=1, dtype=np.int16)
+    # Position of every column counted from the last digit of its own row.
+    position = lengths[:, None] - 1 - np.arange(codes.shape[1], dtype=np.int16)
+    doubled = (position % 2 == 1) & (position > 0)
+    checksum = np.where(doubled, _DOUBLED_DIGIT_SUM_U8[digits], digits).sum(axis=1, dtype=np.uint16)
+    return (checksum % 10 == 0) & well_formed
+
+
+def expired_mask(months: np.ndarray, years: np.ndarray, current_month: int) -> np.ndarray:
+    """Returns True for every card whose expiry month has started, like MonthClock.is_expired.
+
+    Expiry dates are compared as packed year * 12 + month integers against
+    current_month, e.g. MonthClock.current_month().
+    """
+    expiry = np.asarray(years, dtype=np.int64) * 12 + np.asarray(months, dtype=np.int64)
+    return expiry <= current_month
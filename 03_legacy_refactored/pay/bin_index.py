@@ -0,0 +1,196 @@
+"""Classification of cards by network and issuer from their BIN/IIN prefix.
+
+A BIN table lists ranges of card number prefixes, e.g. 222100-272099 for
+Mastercard or 45717360 for a single issuer. Ranges may overlap, in which case the
+narrowest one wins, so an issuer range refines the network range it is part of.
+
+Every prefix is padded to KEY_DIGITS digits (lows with 0s, highs with 9s) and the
+overlapping ranges are flattened once, when the table is loaded, into disjoint
+segments kept in sorted arrays. A lookup is then one bisect over the segment starts
+of a key made from the first KEY_DIGITS digits of the card number.
+"""
+from array import array
+from bisect import bisect_right
+import csv
+from dataclasses import dataclass
+import heapq
+import threading
+from typing import IO, Iterable, Sequence
+
+import numpy as np
+
+KEY_DIGITS = 8
+
+CSV_FIELDS = ["low", "high", "network", "issuer"]
+
+
+@dataclass(frozen=True, slots=True)
+class BinInfo:
+    network: str
+    issuer: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class BinRange:
+    low: str
+    high: str
+    network: str
+    issuer: str = ""
+
+
+# The prefixes the major networks publish, without any issuer ranges.
+NETWORK_RANGES = [
+    BinRange("4", "4", "visa"),
+    BinRange("51", "55", "mastercard"),
+    BinRange("2221", "2720", "mastercard"),
+    BinRange("34", "34", "amex"),
+    BinRange("37", "37", "amex"),
+    BinRange("6011", "6011", "discover"),
+    BinRange("644", "649", "discover"),
+    BinRange("65", "65", "discover"),
+    BinRange("3528", "3589", "jcb"),
+    BinRange("36", "36", "diners"),
+    BinRange("300", "305", "diners"),
+    BinRange("38", "39", "diners"),
+    BinRange("62", "62", "unionpay"),
+]
+
+
+def prefix_key(number: str) -> int | None:
+    """Returns the lookup key of a card number, or None if it does not start with KEY_DIGITS digits."""
+    prefix = number[:KEY_DIGITS]
+    if len(prefix) < KEY_DIGITS or not prefix.isdigit() or not prefix.isascii():
+        return None
+    return int(prefix)
+
+
+def _bounds(bin_range: BinRange) -> tuple[int, int]:
+    low, high = bin_range.low, bin_range.high
+    if not (low.isdigit() and high.isdigit()) or len(low) > KEY_DIGITS or len(high) > KEY_DIGITS:
+        raise ValueError(f"BIN range prefixes must be 1 to {KEY_DIGITS} digits: {low!r}-{high!r}")
+    bounds = int(low.ljust(KEY_DIGITS, "0")), int(high.ljust(KEY_DIGITS, "9"))
+    if bounds[0] > bounds[1]:
+        raise ValueError(f"BIN range starts after it ends: {low!r}-{high!r}")
+    return bounds
+
+
+class _BinTable:
+    """An immutable set of disjoint segments: starts, ends and an index into infos per segment."""
+
+    __slots__ = ("starts", "ends", "owners", "infos", "ranges", "arrays")
+
+    def __init__(self, ranges: Iterable[BinRange]) -> None:
+        infos: dict[BinInfo, int] = {}
+        spans = []
+        for bin_range in ranges:
+            low, high = _bounds(bin_range)
+            info = infos.setdefault(BinInfo(bin_range.network, bin_range.issuer), len(infos))
+            spans.append((low, high, info))
+        self.ranges = len(spans)
+        self.infos = list(infos)
+        self.starts, self.ends, self.owners = _flatten(spans)
+        # Zero-copy NumPy views for lookup_many.
+        self.arrays = tuple(np.frombuffer(column, np.int64) for column in (self.starts, self.ends, self.owners))
+
+
+def _flatten(spans: list[tuple[int, int, int]]) -> tuple[array, array, array]:
+    """Splits overlapping (low, high, owner) spans into disjoint segments owned by the narrowest span."""
+    starts, ends, owners = array("q"), array("q"), array("q")
+    spans.sort()
+    boundaries = sorted({low for low, _, _ in spans} | {high + 1 for _, high, _ in spans})
+    active: list[tuple[int, int, int, int]] = []  # (width, position in spans, high, owner)
+    next_span = 0
+    for start, stop in zip(boundaries, boundaries[1:]):
+        while next_span < len(spans) and spans[next_span][0] == start:
+            low, high, owner = spans[next_span]
+            heapq.heappush(active, (high - low, next_span, high, owner))
+            next_span += 1
+        while active and active[0][2] < start:
+            heapq.heappop(active)
+        if not active:
+            continue
+        owner = active[0][3]
+        if ends and ends[-1] == start - 1 and owners[-1] == owner:
+            ends[-1] = stop - 1
+        else:
+            starts.append(start)
+            ends.append(stop - 1)
+            owners.append(owner)
+    return starts, ends, owners
+
+
+class BinIndex:
+    """A reloadable index of BIN ranges.
+
+    Lookups read an immutable snapshot of the table and never take a lock. reload()
+    builds the new table aside and then swaps it in with a single assignment, so
+    readers keep using the old table until the new one is complete.
+    """
+
+    def __init__(self, ranges: Iterable[BinRange] = NETWORK_RANGES) -> None:
+        self._table = _BinTable(ranges)
+        self._reload_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._table.ranges
+
+    @property
+    def segments(self) -> int:
+        """The number of disjoint segments the ranges were flattened into."""
+        return len(self._table.starts)
+
+    @classmethod
+    def from_csv(cls, file: IO[str]) -> "BinIndex":
+        """Builds an index from a CSV file with the columns low, high, network, issuer."""
+        return cls(read_csv(file))
+
+    def reload(self, ranges: Iterable[BinRange]) -> None:
+        """Replaces all ranges without blocking concurrent lookups."""
+        with self._reload_lock:
+            self._table = _BinTable(ranges)
+
+    def lookup(self, number: str) -> BinInfo | None:
+        """Returns the network and issuer of a card number, or None if no range matches."""
+        key = prefix_key(str(number))
+        if key is None:
+            return None
+        table = self._table
+        i = bisect_right(table.starts, key) - 1
+        if i < 0 or key > table.ends[i]:
+            return None
+        return table.infos[table.owners[i]]
+
+    def lookup_many(self, numbers: Sequence[str]) -> list[BinInfo | None]:
+        """Looks up many card numbers with one vectorized search over the segments."""
+        table = self._table
+        starts, ends, owners = table.arrays
+        if not len(starts):
+            return [None] * len(numbers)
+        keys = np.fromiter((-1 if (key := prefix_key(str(n))) is None else key for n in numbers), np.int64, len(numbers))
+        segment = np.maximum(np.searchsorted(starts, keys, side="right") - 1, 0)
+        found = (keys >= starts[segment]) & (keys <= ends[segment])
+        infos = table.infos
+        return [infos[owner] if hit else None for hit, owner in zip(found.tolist(), owners[segment].tolist())]
+
+
+_networks: BinIndex | None = None
+
+
+def detect_network(number: str) -> str | None:
+    """Returns the card network of a card number from NETWORK_RANGES, e.g. "visa"."""
+    global _networks
+    if _networks is None:
+        _networks = BinIndex(NETWORK_RANGES)
+    info = _networks.lookup(number)
+    return info.network if info is not None else None
+
+
+def read_csv(file: IO[str]) -> list[BinRange]:
+    """Parses BIN ranges from a CSV file with the columns low, high, network, issuer."""
+    return [BinRange(row["low"], row["high"] or row["low"], row["network"], row.get("issuer") or "") for row in csv.DictReader(file)]
+
+
+def write_csv(ranges: Iterable[BinRange], file: IO[str]) -> None:
+    writer = csv.writer(file)
+    writer.writerow(CSV_FIELDS)
+    writer.writerows((r.low, r.high, r.network, r.issuer) for r in ranges)
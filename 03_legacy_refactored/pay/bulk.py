@@ -0,0 +1,103 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Literal, NoReturn
+
+from pay.credit_card import CreditCard
+from pay.order import Order
+from pay.payment import PaymentProcessor, PaymentResult, attempt_payment
+
+
+class BulkPaymentError(Exception):
+    """A payment raised an unexpected exception, e.g. from the gateway.
+
+    unknown lists the input positions of the payments that raised; they may or may
+    not have been charged. results maps the input positions of the payments that were
+    in flight at the time and did complete to their results; their orders are marked
+    as paid as usual. Payments after the in-flight ones were never attempted.
+    """
+
+    def __init__(self, message: str, unknown: Iterable[int] = (), results: dict[int, PaymentResult] | None = None) -> None:
+        super().__init__(message)
+        self.unknown = sorted(unknown)
+        self.results = results or {}
+
+
+def pay_orders(
+    payments: Iterable[tuple[Order, CreditCard]],
+    processor: PaymentProcessor,
+    max_workers: int = 8,
+    pool: Literal["thread", "process"] = "thread",
+) -> list[PaymentResult]:
+    """Pay for many orders concurrently and return one PaymentResult per order, in input order.
+
+    At most max_workers payments are in flight at any time, and the input is consumed
+    lazily so only a bounded number of orders are queued ahead of the workers. Orders
+    that were charged successfully are marked as paid in the calling process, which
+    also works for the process pool where the workers only see copies of the orders.
+
+    Args:
+        payments (Iterable[tuple[Order, CreditCard]]): The orders and the cards to pay them with.
+        processor (PaymentProcessor): The payment processor; must be picklable for the process pool.
+        max_workers (int): The maximum number of payments processed at the same time.
+        pool (str): "thread" for a thread pool, "process" for a process pool.
+
+    Raises:
+        ValueError: If max_workers is not positive or the pool kind is unknown.
+        BulkPaymentError: If a payment raised an unexpected exception. Every payment
+            in flight is waited for and settled first; the error lists the payments
+            whose outcome is unknown.
+
+    Returns:
+        list[PaymentResult]: The result of every payment, in the order they were given.
+    """
+    return list(iter_pay_orders(payments, processor, max_workers, pool))
+
+
+def iter_pay_orders(
+    payments: Iterable[tuple[Order, CreditCard]],
+    processor: PaymentProcessor,
+    max_workers: int = 8,
+    pool: Literal["thread", "process"] = "thread",
+) -> Iterator[PaymentResult]:
+    """Lazy version of pay_orders, yielding each result as soon as it is next in input order."""
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    executor_types: dict[str, type[Executor]] = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+    if pool not in executor_types:
+        raise ValueError(f"Unknown pool kind {pool!r}, expected 'thread' or 'process'.")
+
+    pending: deque[tuple[int, Order, Future[PaymentResult]]] = deque()
+    with executor_types[pool](max_workers=max_workers) as executor:
+        for position, (order, card) in enumerate(payments):
+            if len(pending) >= 2 * max_workers:
+                yield _settle_next(pending)
+            pending.append((position, order, executor.submit(attempt_payment, order, card, processor)))
+        while pending:
+            yield _settle_next(pending)
+
+
+def _settle_next(pending: "deque[tuple[int, Order, Future[PaymentResult]]]") -> PaymentResult:
+    position, order, future = pending.popleft()
+    try:
+        result = future.result()
+    except Exception as e:
+        _abort(position, e, pending)
+    if result.paid:
+        order.pay()
+    return result
+
+
+def _abort(position: int, error: Exception, pending: "deque[tuple[int, Order, Future[PaymentResult]]]") -> NoReturn:
+    # The other payments in flight may already have charged their cards: wait for
+    # them and settle the ones that completed, so a retry does not charge them again.
+    wait([future for _, _, future in pending])
+    unknown, results = [position], {}
+    for other, order, future in pending:
+        if future.exception() is not None:
+            unknown.append(other)
+            continue
+        result = results[other] = future.result()
+        if result.paid:
+            order.pay()
+    pending.clear()
+    raise BulkPaymentError(f"Payment {position} failed: {error!r}", unknown, results) from error
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import secrets
+import threading
+import time
+from typing import Any, Callable
+
+from pay.credit_card import CreditCard
+from pay.money import Money
+from pay.payment import PaymentProcessor
+from pay.processor import CardValidation
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+class CachingPaymentProcessor:
+    """A PaymentProcessor that remembers successful card validations.
+
+    Entries are keyed on a salted hash of the card number and expiry date, so the
+    raw card number is never stored. The cache holds at most max_size entries and
+    evicts the least recently used one when full. An entry lives for ttl seconds,
+    but never past the start of the card's expiry month, when the card turns expired,
+    and never past the deadline of a CardValidation token, which charge would reject.
+    Failed validations are not cached. All methods are safe to call from several threads.
+    """
+
+    def __init__(
+        self,
+        processor: PaymentProcessor,
+        max_size: int = 10_000,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.processor = processor
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._salt = secrets.token_bytes(16)
+        self._entries: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(self, card: CreditCard, month: int, year: int) -> bytes:
+        message = f"{card.number}|{month}|{year}".encode()
+        return hashlib.blake2b(message, key=self._salt, digest_size=16).digest()
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> Any:
+        key = self._key(card, month, year)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now < entry[0]:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.stats.expirations += 1
+            self.stats.misses += 1
+
+        result = self.processor.validate_card(card, month, year)
+
+        expires_at = min(now + self.ttl, datetime(year, month, 1).timestamp())
+        if isinstance(result, CardValidation):
+            # valid_until is on the monotonic clock; convert what is left of it to self.clock.
+            expires_at = min(expires_at, now + result.valid_until - time.monotonic())
+        with self._lock:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return result
+
+    def charge(self, card: CreditCard, amount: Money, *args: Any) -> None:
+        self.processor.charge(card, amount, *args)
+
+    def clear(self) -> None:
+        """Removes all cached validations."""
+        with self._lock:
+            self._entries.clear()
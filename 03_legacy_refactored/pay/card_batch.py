@@ -0,0 +1,159 @@
+"""A fixed-width binary file format for card batches.
+
+The file starts with an 8 byte header (magic and version) followed by 32 byte records:
+
+    offset  size  field
+         0     1  number of digits in the card number
+         1    19  card number digits (ASCII), zero padded on the right
+        20     1  expiry month
+        21     2  expiry year (little endian)
+        23     8  amount in cents (little endian, signed)
+        31     1  padding
+
+CardBatch maps a file into memory and exposes the records as a NumPy structured
+array over the mapping, so whole batches are validated without creating a Python
+object per record.
+"""
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from pay.batch import expired_mask, luhn_checksum_codes
+from pay.clock import MonthClock, SYSTEM_CLOCK
+from pay.credit_card import CreditCard
+
+MAGIC = b"PAYCB"
+VERSION = 1
+HEADER = struct.Struct("<5sBxx")
+RECORD = struct.Struct("<B19sBHqx")
+MAX_DIGITS = 19
+
+RECORD_DTYPE = np.dtype([
+    ("length", "u1"),
+    ("number", "u1", (MAX_DIGITS,)),
+    ("expiry_month", "u1"),
+    ("expiry_year", "<u2"),
+    ("amount", "<i8"),
+    ("padding", "V1"),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+# Result codes of validate_batch, in the order PaymentProcessor.validate_card checks them.
+VALID = 0
+INVALID_MONTH = 1
+EXPIRED = 2
+INVALID_NUMBER = 3
+
+# Records validated at a time by validate_batch.
+VALIDATE_CHUNK = 65_536
+
+
+def write_card_batch(path: str | Path, records: Iterable[tuple[CreditCard, int]]) -> int:
+    """Writes (card, amount) pairs to path and returns the number of records written.
+
+    Raises:
+        ValueError: If a card number is not made of 1 to 19 digits, or a month or year
+            does not fit the record.
+    """
+    count = 0
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION))
+        for card, amount in records:
+            number = card.number.encode("ascii") if isinstance(card.number, str) else bytes(card.number)
+            if not 1 <= len(number) <= MAX_DIGITS or not number.isdigit():
+                raise ValueError(f"Card number must be 1 to {MAX_DIGITS} digits.")
+            try:
+                file.write(RECORD.pack(len(number), number, card.expiry_month, card.expiry_year, amount))
+            except struct.error as e:
+                raise ValueError(f"Record does not fit the card batch format: {e}") from None
+            count += 1
+    return count
+
+
+def write_card_records(path: str | Path, records: np.ndarray | Iterable[np.ndarray]) -> int:
+    """Writes a structured array of RECORD_DTYPE records, or an iterable of such arrays
+    written one after another, to path and returns the number of records written.
+
+    Raises:
+        ValueError: If an array does not have the record dtype.
+    """
+    if isinstance(records, np.ndarray):
+        records = (records,)
+    count = 0
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION))
+        for chunk in records:
+            if chunk.dtype != RECORD_DTYPE:
+                raise ValueError("Records must have the card batch record dtype.")
+            file.write(np.ascontiguousarray(chunk).tobytes())
+            count += len(chunk)
+    return count
+
+
+class CardBatch:
+    """A read-only, memory-mapped view of a card batch file.
+
+    Use it as a context manager; arrays taken from records must be released before
+    the batch is closed.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self._mmap)
+        magic, version = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Not a card batch file, or an unsupported version.")
+        if (len(self.buffer) - HEADER.size) % RECORD.size:
+            self.close()
+            raise ValueError("Card batch file is truncated.")
+        self.records = np.frombuffer(self.buffer, dtype=RECORD_DTYPE, offset=HEADER.size)
+
+    def __enter__(self) -> "CardBatch":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def card(self, index: int) -> CreditCard:
+        """Returns the card of one record as a CreditCard."""
+        record = self.records[index]
+        number = bytes(record["number"][:record["length"]]).decode("ascii")
+        return CreditCard(number, int(record["expiry_month"]), int(record["expiry_year"]))
+
+    def amount(self, index: int) -> int:
+        """Returns the amount in cents of one record."""
+        return int(self.records[index]["amount"])
+
+    def close(self) -> None:
+        self.records = None
+        self.buffer.release()
+        self._mmap.close()
+
+
+def validate_batch(records: np.ndarray, clock: MonthClock = SYSTEM_CLOCK) -> np.ndarray:
+    """Validates every record and returns one result code per record.
+
+    The codes are VALID, INVALID_MONTH, EXPIRED and INVALID_NUMBER; like
+    PaymentProcessor.validate_card, the month is checked first, then the expiry date,
+    then the Luhn checksum. A card number with a non-digit byte is INVALID_NUMBER.
+    Records are validated VALIDATE_CHUNK at a time, so the temporaries stay small
+    however large the mapped batch is.
+    """
+    current_month = clock.current_month()
+    result = np.full(len(records), VALID, dtype=np.uint8)
+    for start in range(0, len(records), VALIDATE_CHUNK):
+        chunk = records[start:start + VALIDATE_CHUNK]
+        codes = result[start:start + VALIDATE_CHUNK]
+        months = chunk["expiry_month"]
+        codes[~luhn_checksum_codes(chunk["number"], reject_non_digits=False)] = INVALID_NUMBER
+        codes[expired_mask(months, chunk["expiry_year"], current_month)] = EXPIRED
+        codes[(months < 1) | (months > 12)] = INVALID_MONTH
+    return result
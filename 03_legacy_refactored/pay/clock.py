@@ -0,0 +1,46 @@
+from datetime import datetime
+import time
+from typing import Callable
+
+
+def pack_month(year: int, month: int) -> int:
+    """Packs a year and month into one integer that orders like the dates do."""
+    return year * 12 + month
+
+
+class MonthClock:
+    """A clock that only knows the current year and month.
+
+    The (year, month) is worked out once and cached until the month rolls over, so
+    checking a card's expiry costs a timestamp comparison instead of building
+    datetimes. Pass a different time source to pin the clock in tests.
+    """
+
+    def __init__(self, time_source: Callable[[], float] = time.time) -> None:
+        self.time_source = time_source
+        # (month start, next month start, packed current month), always replaced as a
+        # whole so a concurrent reader never sees the bounds of one month with another.
+        self._month = (float("inf"), float("-inf"), 0)
+
+    def _refresh(self, timestamp: float) -> int:
+        now = datetime.fromtimestamp(timestamp)
+        month_start = datetime(now.year, now.month, 1)
+        next_month_start = datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+        current = pack_month(now.year, now.month)
+        self._month = (month_start.timestamp(), next_month_start.timestamp(), current)
+        return current
+
+    def current_month(self) -> int:
+        """Returns the current year and month packed with pack_month."""
+        timestamp = self.time_source()
+        month_start, next_month_start, current = self._month
+        if not month_start <= timestamp < next_month_start:
+            return self._refresh(timestamp)
+        return current
+
+    def is_expired(self, month: int, year: int) -> bool:
+        """Returns True if the expiry month has started, i.e. the card can no longer be used."""
+        return pack_month(year, month) <= self.current_month()
+
+
+SYSTEM_CLOCK = MonthClock()
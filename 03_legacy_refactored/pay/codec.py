@@ -0,0 +1,214 @@
+"""A compact, versioned binary encoding of batches of orders, line items and cards.
+
+A batch is one buffer with all fields stored column by column, so every column is
+packed or unpacked with a single struct call:
+
+    header        magic b"PAYO", version, flags, string, order and line item counts
+    strings       byte length of every string, then their UTF-8 bytes
+    orders        line item count, status, currency (string index)
+    line items    name (string index), price, quantity
+    cards         number length, the numbers (ASCII), expiry month, expiry year;
+                  only present with FLAG_CARDS
+
+Every integer column starts with the struct code of its values (one byte), and the
+encoder picks the smallest code that fits all of them, so small prices and
+quantities take 2 or 4 bytes instead of 8. Line item names and currencies are
+stored once in the string table however many orders use them. All integers are
+little endian.
+"""
+from itertools import islice
+import struct
+from typing import Iterable, Sequence
+
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order, OrderStatus
+
+MAGIC = b"PAYO"
+VERSION = 1
+HEADER = struct.Struct("<4sBB2xIII")
+FLAG_CARDS = 1
+
+STATUSES = list(OrderStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Struct codes an integer column can use, smallest first, with their value ranges.
+UNSIGNED_CODES = [("B", 0, 2 ** 8 - 1), ("H", 0, 2 ** 16 - 1), ("I", 0, 2 ** 32 - 1), ("Q", 0, 2 ** 64 - 1)]
+SIGNED_CODES = [("b", -2 ** 7, 2 ** 7 - 1), ("h", -2 ** 15, 2 ** 15 - 1), ("i", -2 ** 31, 2 ** 31 - 1), ("q", -2 ** 63, 2 ** 63 - 1)]
+INTEGER_CODES = {code for code, _, _ in UNSIGNED_CODES + SIGNED_CODES}
+UNSIGNED_INTEGER_CODES = {code for code, _, _ in UNSIGNED_CODES}
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.parts: list[bytes] = []
+
+    def column(self, values: Sequence[int], signed: bool = False) -> None:
+        low, high = (min(values), max(values)) if values else (0, 0)
+        for code, minimum, maximum in SIGNED_CODES if signed else UNSIGNED_CODES:
+            if minimum <= low and high <= maximum:
+                break
+        else:
+            raise ValueError(f"Value does not fit the encoding: {low if low < minimum else high}")
+        try:
+            self.parts.append(struct.pack(f"<c{len(values)}{code}", code.encode(), *values))
+        except struct.error as e:
+            raise ValueError(f"Value does not fit the encoding: {e}") from None
+
+
+class _Reader:
+    def __init__(self, buffer: bytes | bytearray | memoryview, offset: int) -> None:
+        self.buffer = buffer
+        self.offset = offset
+
+    def column(self, count: int, unsigned: bool = False) -> tuple[int, ...]:
+        """Reads a column of count integers; counts, codes, indexes and lengths must be unsigned."""
+        try:
+            code = chr(self.buffer[self.offset])
+            if code not in (UNSIGNED_INTEGER_CODES if unsigned else INTEGER_CODES):
+                raise ValueError("Encoded batch is corrupt.")
+            layout = struct.Struct(f"<{count}{code}")
+            values = layout.unpack_from(self.buffer, self.offset + 1)
+        except (IndexError, struct.error):
+            raise ValueError("Encoded batch is truncated.") from None
+        self.offset += 1 + layout.size
+        return values
+
+    def strings(self, lengths: Sequence[int], encoding: str) -> list[str]:
+        end = self.offset + sum(lengths)
+        if end > len(self.buffer):
+            raise ValueError("Encoded batch is truncated.")
+        data = bytes(self.buffer[self.offset:end])
+        self.offset = end
+        strings = []
+        start = 0
+        for length in lengths:
+            strings.append(data[start:start + length].decode(encoding))
+            start += length
+        return strings
+
+
+def _encode(orders: Sequence[Order], cards: Sequence[CreditCard] | None) -> bytes:
+    string_index: dict[str, int] = {}
+    intern = lambda text: string_index.setdefault(text, len(string_index))
+    counts, statuses, currencies = [], [], []
+    names, prices, quantities = [], [], []
+    for order in orders:
+        items = order.line_items
+        counts.append(len(items))
+        statuses.append(STATUS_CODES[order.status])
+        currencies.append(intern(order.currency))
+        for item in items:
+            names.append(intern(item.name))
+            prices.append(item.price)
+            quantities.append(item.quantity)
+
+    encoded = [text.encode() for text in string_index]
+    writer = _Writer()
+    writer.parts.append(HEADER.pack(MAGIC, VERSION, FLAG_CARDS if cards is not None else 0, len(encoded), len(counts), len(names)))
+    writer.column([len(text) for text in encoded])
+    writer.parts.extend(encoded)
+    writer.column(counts)
+    writer.column(statuses)
+    writer.column(currencies)
+    writer.column(names)
+    writer.column(prices, signed=True)
+    writer.column(quantities, signed=True)
+    if cards is not None:
+        numbers = [str(card.number).encode("ascii") for card in cards]
+        writer.column([len(number) for number in numbers])
+        writer.parts.extend(numbers)
+        writer.column([card.expiry_month for card in cards], signed=True)
+        writer.column([card.expiry_year for card in cards], signed=True)
+    return b"".join(writer.parts)
+
+
+def _out_of_range(indexes: Sequence[int], size: int) -> bool:
+    # The columns are unsigned, so only the largest index can be out of range.
+    return bool(indexes) and max(indexes) >= size
+
+
+def _decode(buffer: bytes | bytearray | memoryview) -> tuple[list[Order], list[CreditCard] | None]:
+    try:
+        magic, version, flags, string_count, order_count, item_count = HEADER.unpack_from(buffer)
+    except struct.error:
+        raise ValueError("Not an encoded order batch.") from None
+    if magic != MAGIC:
+        raise ValueError("Not an encoded order batch.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported order batch version {version}.")
+    reader = _Reader(buffer, HEADER.size)
+    strings = reader.strings(reader.column(string_count, unsigned=True), "utf-8")
+    counts = reader.column(order_count, unsigned=True)
+    statuses = reader.column(order_count, unsigned=True)
+    currencies = reader.column(order_count, unsigned=True)
+    names = reader.column(item_count, unsigned=True)
+    prices = reader.column(item_count)
+    quantities = reader.column(item_count)
+    if (
+        sum(counts) != item_count
+        or _out_of_range(statuses, len(STATUSES))
+        or _out_of_range(currencies, len(strings))
+        or _out_of_range(names, len(strings))
+    ):
+        raise ValueError("Encoded batch is corrupt.")
+
+    items = iter(list(map(LineItem, map(strings.__getitem__, names), prices, quantities)))
+    orders = [
+        Order(list(islice(items, count)), STATUSES[status], strings[currency])
+        for count, status, currency in zip(counts, statuses, currencies)
+    ]
+
+    cards = None
+    if flags & FLAG_CARDS:
+        numbers = reader.strings(reader.column(order_count, unsigned=True), "ascii")
+        months = reader.column(order_count)
+        years = reader.column(order_count)
+        cards = [CreditCard(*card) for card in zip(numbers, months, years)]
+    return orders, cards
+
+
+def encode_orders(orders: Iterable[Order]) -> bytes:
+    """Encodes a batch of orders with their line items into one buffer.
+
+    Raises:
+        ValueError: If a price, quantity or string does not fit its field.
+    """
+    return _encode(list(orders), None)
+
+
+def decode_orders(buffer: bytes | bytearray | memoryview) -> list[Order]:
+    """Decodes a buffer made by encode_orders or encode_payments back into orders.
+
+    Raises:
+        ValueError: If the buffer is not an encoded batch, has another version, or is truncated.
+    """
+    return _decode(buffer)[0]
+
+
+def encode_payments(payments: Iterable[tuple[Order, CreditCard]]) -> bytes:
+    """Encodes (order, card) pairs into one buffer.
+
+    Raises:
+        ValueError: If a value does not fit its field, or a card number is not ASCII.
+    """
+    orders, cards = [], []
+    for order, card in payments:
+        orders.append(order)
+        cards.append(card)
+    try:
+        return _encode(orders, cards)
+    except UnicodeEncodeError:
+        raise ValueError("Card numbers must be ASCII.") from None
+
+
+def decode_payments(buffer: bytes | bytearray | memoryview) -> list[tuple[Order, CreditCard]]:
+    """Decodes a buffer made by encode_payments back into (order, card) pairs.
+
+    Raises:
+        ValueError: If the buffer is not an encoded batch of payments, has another
+            version, or is truncated.
+    """
+    orders, cards = _decode(buffer)
+    if cards is None:
+        raise ValueError("Encoded batch has no cards.")
+    return list(zip(orders, cards))
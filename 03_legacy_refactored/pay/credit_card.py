@@ -1,7 +1,14 @@
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True)
 class CreditCard:
     number: str
     expiry_month: str
-    expiry_year: str
\ No newline at end of file
+    expiry_year: str
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenCreditCard:
+    number: str
+    expiry_month: str
+    expiry_year: str
@@ -0,0 +1,249 @@
+"""Structured payment events and the sinks they are written to.
+
+The payment path reports what happened through emit() instead of printing. By
+default events go to a BufferedEventSink that writes them to stdout from a
+background thread, so payment workers never wait on the terminal or a pipe.
+"""
+import atexit
+from dataclasses import dataclass, field
+from enum import Enum
+import os
+import queue
+import sys
+import threading
+import time
+import warnings
+import weakref
+from typing import IO, Callable, Protocol
+
+
+class EventKind(Enum):
+    PAID = 'paid'
+    EXPIRED = 'expired'
+    INVALID_MONTH = 'invalid_month'
+    FAILED = 'failed'
+    CHARGED = 'charged'
+
+
+# The masks of every common card number length, so masking does not build one each time.
+_MASKS = ["*" * max(length - 4, 0) for length in range(24)]
+
+
+def mask_card_number(number: str) -> str:
+    """Masks all but the last four digits of a card number."""
+    number = str(number)
+    length = len(number)
+    mask = _MASKS[length] if length < len(_MASKS) else "*" * (length - 4)
+    return mask + number[-4:]
+
+
+@dataclass(frozen=True, slots=True, init=False)
+class PaymentEvent:
+    kind: EventKind
+    message: str
+    amount: int = 0
+    card: str = ''
+    timestamp: float = field(default_factory=time.time)
+
+    def __init__(self, kind: EventKind, message: str, amount: int = 0, card: str = '', timestamp: float | None = None) -> None:
+        # Sets the slots directly: the generated frozen __init__ goes through
+        # object.__setattr__ for every field, and events are made on the payment path.
+        _set_kind(self, kind)
+        _set_message(self, message)
+        _set_amount(self, amount)
+        _set_card(self, card)
+        _set_timestamp(self, time.time() if timestamp is None else timestamp)
+
+
+_set_kind = PaymentEvent.kind.__set__
+_set_message = PaymentEvent.message.__set__
+_set_amount = PaymentEvent.amount.__set__
+_set_card = PaymentEvent.card.__set__
+_set_timestamp = PaymentEvent.timestamp.__set__
+
+
+class EventSink(Protocol):
+    """Anything that accepts payment events."""
+
+    def emit(self, event: PaymentEvent) -> None:
+        """Handles one event"""
+        pass
+
+
+class MemoryEventSink:
+    """Keeps every event in a list, e.g. for tests."""
+
+    def __init__(self) -> None:
+        self.events: list[PaymentEvent] = []
+
+    def emit(self, event: PaymentEvent) -> None:
+        self.events.append(event)
+
+
+def format_message(event: PaymentEvent) -> str:
+    return event.message
+
+
+class BufferedEventSink:
+    """Writes events to a stream from a background thread, in batches.
+
+    Events wait in a queue of at most max_queue entries. When it is full the
+    default "block" policy makes the emitting thread wait for room, while the
+    "drop" policy discards the new event and counts it in dropped; flush and
+    close warn about the events dropped since the last warning.
+
+    The stream is bound when the sink is created: without one, events go to the
+    sys.stdout of that moment, even if sys.stdout is replaced later.
+
+    The sink survives fork(): a child process starts with an empty queue and
+    starts its own writer thread on its first event. Processes started by
+    multiprocessing leave with os._exit() and skip atexit, so in them the queue
+    is written out by a multiprocessing finalizer instead.
+    """
+
+    def __init__(
+        self,
+        stream: IO[str] | None = None,
+        max_queue: int = 10_000,
+        max_batch: int = 256,
+        policy: str = "block",
+        formatter: Callable[[PaymentEvent], str] = format_message,
+    ) -> None:
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown policy {policy!r}, expected 'drop' or 'block'.")
+        self.stream = sys.stdout if stream is None else stream
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.policy = policy
+        self.formatter = formatter
+        self.dropped = 0
+        self._reported = 0
+        self._closed = False
+        self._reset()
+        self._start()
+        _buffered_sinks.add(self)
+
+    def _reset(self) -> None:
+        # A SimpleQueue: its put() is much cheaper than Queue.put(), and emit is on the payment path.
+        self._queue: queue.SimpleQueue[PaymentEvent | threading.Event | None] = queue.SimpleQueue()
+        self._room = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._writer is not None or self._closed:
+                return
+            self._writer = threading.Thread(target=self._write, name="payment-event-writer", daemon=True)
+            self._writer.start()
+        multiprocessing = sys.modules.get("multiprocessing")
+        if multiprocessing is not None and multiprocessing.parent_process() is not None:
+            # Worker processes exit with os._exit(), which skips the atexit close.
+            sys.modules["multiprocessing.util"].Finalize(self, self.close, exitpriority=10)
+
+    def _after_fork(self) -> None:
+        # The writer thread does not exist in the child, and the parent's queue and
+        # locks may have been in use by it at the time of the fork.
+        self._reset()
+
+    def emit(self, event: PaymentEvent) -> None:
+        if self._closed:
+            return
+        if self._writer is None:
+            self._start()
+        if self._queue.qsize() >= self.max_queue:
+            if self.policy == "drop":
+                self.dropped += 1
+                return
+            with self._room:
+                while self._queue.qsize() >= self.max_queue and not self._closed:
+                    self._room.wait()
+        self._queue.put(event)
+
+    def flush(self) -> None:
+        """Waits until every queued event has been written."""
+        self._report_dropped()
+        if self._writer is None or not self._writer.is_alive():
+            return
+        written = threading.Event()
+        self._queue.put(written)
+        written.wait()
+
+    def close(self) -> None:
+        """Writes the queued events and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._report_dropped()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        with self._room:
+            self._room.notify_all()
+
+    def _report_dropped(self) -> None:
+        dropped = self.dropped - self._reported
+        if dropped:
+            self._reported += dropped
+            warnings.warn(f"{dropped:,} payment events were dropped because the event queue was full.", RuntimeWarning, stacklevel=3)
+
+    def _write(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = [event for event in batch if isinstance(event, PaymentEvent)]
+            if events:
+                self.stream.write("".join(self.formatter(event) + "\n" for event in events))
+                self.stream.flush()
+            if self.policy == "block":
+                with self._room:
+                    self._room.notify_all()
+            for marker in batch:
+                if isinstance(marker, threading.Event):
+                    marker.set()
+            if batch[-1] is None:
+                return
+
+
+_buffered_sinks: "weakref.WeakSet[BufferedEventSink]" = weakref.WeakSet()
+
+
+_sink: EventSink | None = None
+_sink_lock = threading.Lock()
+
+
+def _after_fork_in_child() -> None:
+    global _sink_lock
+    _sink_lock = threading.Lock()
+    for sink in list(_buffered_sinks):
+        sink._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def get_event_sink() -> EventSink:
+    """Returns the sink events go to, starting the default BufferedEventSink on first use."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = BufferedEventSink()
+                atexit.register(_sink.close)
+    return _sink
+
+
+def set_event_sink(sink: EventSink | None) -> None:
+    """Sends all further events to sink; None goes back to the default sink."""
+    global _sink
+    _sink = sink
+
+
+def emit(event: PaymentEvent) -> None:
+    """Sends an event to the current sink."""
+    (_sink or get_event_sink()).emit(event)
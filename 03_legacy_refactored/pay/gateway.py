@@ -0,0 +1,282 @@
+"""A local stand-in payment gateway and an HTTP PaymentProcessor that talks to it.
+
+The gateway is a small asyncio HTTP/1.1 server with keep-alive. It validates and
+charges cards the way PaymentProcessor does, after an injected latency, and can be
+told to fail a share of the requests or to rate limit them:
+
+    POST /validate  {"number": ..., "expiry_month": ..., "expiry_year": ...}
+    POST /charge    {"number": ..., "expiry_month": ..., "expiry_year": ..., "amount": ..., "currency": ...}
+
+Both answer 200 {"ok": true} on success and 402 {"error": <reason>} when the card is
+rejected, with reason one of "invalid_month", "card_expired" or "invalid_card".
+Rate limited requests get 429, injected failures 503 and a wrong API key 401.
+"""
+import asyncio
+import http.client
+import json
+import queue
+import random
+import threading
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+from pay.clock import MonthClock, SYSTEM_CLOCK
+from pay.credit_card import CreditCard
+from pay.money import Money
+from pay.processor import CardExpiredError, InvalidMonthError, luhn_checksum
+
+LatencyModel = Callable[[random.Random], float]
+
+
+def constant_latency(seconds: float) -> LatencyModel:
+    """Every request takes the same time."""
+    return lambda rng: seconds
+
+
+def uniform_latency(low: float, high: float) -> LatencyModel:
+    """Request times are spread evenly between low and high."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float) -> LatencyModel:
+    """Request times have a long right tail, like most real gateways."""
+    return lambda rng: median * rng.lognormvariate(0.0, sigma)
+
+
+def parse_latency(spec: str) -> LatencyModel:
+    """Parses "constant:S", "uniform:LOW:HIGH" or "lognormal:MEDIAN:SIGMA" (seconds)."""
+    kind, *args = spec.split(":")
+    models = {"constant": constant_latency, "uniform": uniform_latency, "lognormal": lognormal_latency}
+    if kind not in models:
+        raise ValueError(f"Unknown latency model {kind!r}, expected one of {', '.join(models)}.")
+    return models[kind](*(float(arg) for arg in args))
+
+
+class GatewayError(ValueError):
+    """The gateway could not process the request (rate limited, unavailable, unauthorized)."""
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, with bursts of up to burst requests."""
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class StandInGateway:
+    """A local HTTP gateway with configurable latency, error rate and rate limit.
+
+    Use it as a context manager to run it on a background thread; url is set once
+    it is listening.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        latency: LatencyModel = constant_latency(0.0),
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+        clock: MonthClock = SYSTEM_CLOCK,
+    ) -> None:
+        self.api_key = api_key
+        self.latency = latency
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.host = host
+        self.port = port
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.url = ""
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped: asyncio.Event | None = None
+
+    def _decide(self, path: str, headers: dict[str, str], body: bytes) -> tuple[int, dict]:
+        if self.api_key is not None and headers.get("authorization") != f"Bearer {self.api_key}":
+            return 401, {"error": "unauthorized"}
+        if self.bucket is not None and not self.bucket.allow():
+            return 429, {"error": "rate_limited"}
+        if path not in ("/validate", "/charge"):
+            return 404, {"error": "not_found"}
+        if self.rng.random() < self.error_rate:
+            return 503, {"error": "unavailable"}
+        try:
+            request = json.loads(body)
+            month, year = int(request["expiry_month"]), int(request["expiry_year"])
+            number = str(request["number"])
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": "bad_request"}
+        if not 1 <= month <= 12:
+            return 402, {"error": "invalid_month"}
+        if self.clock.is_expired(month, year):
+            return 402, {"error": "card_expired"}
+        try:
+            valid = luhn_checksum(number)
+        except ValueError:
+            valid = False
+        if not valid:
+            return 402, {"error": "invalid_card"}
+        return 200, {"ok": True}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request_line := await reader.readline():
+                _, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests += 1
+                status, payload = self._decide(path, headers, body)
+                if status not in (401, 429):
+                    await asyncio.sleep(self.latency(self.rng))
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, started: threading.Event | None = None) -> None:
+        """Serves requests until stop() is called."""
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        host, port = server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+        if started is not None:
+            started.set()
+        async with server:
+            await self._stopped.wait()
+
+    def start(self) -> "StandInGateway":
+        """Runs the gateway on a background thread and waits until it listens."""
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete, args=(self.serve(started),), name="stand-in-gateway", daemon=True
+        )
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        """Stops a gateway started with start()."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self) -> "StandInGateway":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+
+class HttpPaymentProcessor:
+    """A PaymentProcessor that validates and charges cards through an HTTP gateway.
+
+    Requests go over a pool of up to pool_size keep-alive connections, so concurrent
+    callers each get a warm connection instead of opening a new one per request.
+    """
+
+    def __init__(self, url: str, api_key: str | None = None, pool_size: int = 8, timeout: float = 10.0) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.api_key = api_key
+        self.timeout = timeout
+        self._pool: queue.LifoQueue[http.client.HTTPConnection | None] = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(None)
+
+    def _post(self, path: str, payload: dict) -> None:
+        body = json.dumps(payload)
+        headers = {"Content-Type": "application/json"}
+        if self.api_key is not None:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        connection = self._pool.get()
+        try:
+            if connection is None:
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            connection.request("POST", path, body, headers)
+            response = connection.getresponse()
+            raw = response.read()
+        except BaseException as e:
+            # Whatever went wrong, the pool gets its slot back.
+            if connection is not None:
+                connection.close()
+            self._pool.put(None)
+            if isinstance(e, (OSError, http.client.HTTPException)):
+                raise GatewayError(f"Gateway request failed: {e}") from None
+            raise
+        self._pool.put(connection)
+
+        try:
+            data = json.loads(raw or b"{}")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            # E.g. an HTML error page from a proxy in front of the gateway.
+            raise GatewayError(f"Gateway returned {response.status} with a body that is not a JSON object.")
+        if response.status == 200:
+            return
+        error = data.get("error", "")
+        if error == "invalid_month":
+            raise InvalidMonthError("Invalid expiry month. Month must be in the range of 1 to 12.")
+        if error == "card_expired":
+            raise CardExpiredError("Card is expired.")
+        if error == "invalid_card":
+            raise ValueError("Invalid Card number")
+        raise GatewayError(f"Gateway returned {response.status}: {error}")
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        self._post("/validate", {"number": card.number, "expiry_month": month, "expiry_year": year})
+
+    def charge(self, card: CreditCard, amount: int | Money) -> None:
+        """Charges the card with the amount, in minor units of USD or as Money."""
+        money = amount if isinstance(amount, Money) else Money(amount)
+        self._post("/charge", {
+            "number": card.number, "expiry_month": card.expiry_month, "expiry_year": card.expiry_year,
+            "amount": money.amount, "currency": money.currency,
+        })
+
+    def __enter__(self) -> "HttpPaymentProcessor":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the idle pooled connections; they are reopened on the next request."""
+        idle = []
+        while not self._pool.empty():
+            idle.append(self._pool.get_nowait())
+        for connection in idle:
+            if connection is not None:
+                connection.close()
+            self._pool.put(None)
@@ -0,0 +1,219 @@
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+import queue
+import sqlite3
+import threading
+import time
+
+from pay.credit_card import CreditCard
+from pay.order import Order
+from pay.payment import PaymentProcessor, PaymentResult, PaymentStatus, attempt_payment
+
+# The status of the row written before the processor is called. A key whose latest row
+# is still pending may have been charged: the process died or the outcome was lost.
+PENDING = "pending"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS charges (
+    id INTEGER PRIMARY KEY,
+    idempotency_key TEXT NOT NULL,
+    card_last4 TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+@dataclass(slots=True)
+class ChargeRecord:
+    idempotency_key: str
+    card_last4: str
+    amount: int
+    status: str
+    message: str
+    created_at: float
+
+
+class LedgerClosedError(Exception):
+    pass
+
+
+class ChargeLedger:
+    """An append-only SQLite ledger of charge attempts with group commit.
+
+    Attempts are queued to a single writer thread, which commits them in batches of
+    up to max_batch records: everything that queued up while the previous batch was
+    being written goes into the next one, so many charges share one fsync instead of
+    paying for one each. With max_delay above 0 the writer also lingers that long
+    for more records, trading latency for fewer commits. record() only returns once
+    its record is durable.
+
+    The idempotency keys of paid attempts are also kept in memory, so a re-submitted
+    order is recognised without querying the database.
+
+    pay() commits a pending row for the key before the card is charged. A key whose
+    charge may or may not have gone through (a pending row without an outcome after
+    a crash, or a charge or final record that raised) stays blocked until its
+    outcome is recorded with record().
+    """
+
+    def __init__(self, path: str | Path, max_batch: int = 512, max_delay: float = 0.0) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1.")
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.commits = 0
+        self._queue: queue.Queue[tuple[ChargeRecord, Future] | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute(SCHEMA)
+        paid = connection.execute("SELECT idempotency_key FROM charges WHERE status = ?", (PaymentStatus.PAID.value,))
+        self._paid_keys = {key for key, in paid}
+        latest = connection.execute(
+            "SELECT idempotency_key, status FROM charges WHERE id IN (SELECT MAX(id) FROM charges GROUP BY idempotency_key)"
+        )
+        self._unknown_keys = {key for key, status in latest if status == PENDING and key not in self._paid_keys}
+        self._in_flight: set[str] = set()
+        connection.close()
+
+        self._writer = threading.Thread(target=self._write_batches, name="charge-ledger-writer", daemon=True)
+        self._writer.start()
+
+    def __enter__(self) -> "ChargeLedger":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def is_paid(self, idempotency_key: str) -> bool:
+        """Returns True if a charge with this key already succeeded."""
+        return idempotency_key in self._paid_keys
+
+    def has_unknown_outcome(self, idempotency_key: str) -> bool:
+        """Returns True if a charge with this key may have gone through without being recorded."""
+        return idempotency_key in self._unknown_keys
+
+    def submit(self, idempotency_key: str, card: CreditCard, result: PaymentResult) -> "Future[None]":
+        """Queues a charge attempt and returns a future that completes once it is committed."""
+        return self._submit(ChargeRecord(idempotency_key, str(card.number)[-4:], result.amount, result.status.value, result.message, time.time()))
+
+    def _submit(self, record: ChargeRecord) -> "Future[None]":
+        future: Future[None] = Future()
+        # Checked under the lock close() takes, so nothing is queued behind its sentinel.
+        with self._lock:
+            if self._closed:
+                raise LedgerClosedError("The ledger is closed.")
+            self._queue.put((record, future))
+        return future
+
+    def record(self, idempotency_key: str, card: CreditCard, result: PaymentResult) -> None:
+        """Appends a charge attempt and waits until it is durable.
+
+        This also settles a key with an unknown outcome, e.g. once it has been
+        reconciled with the processor.
+        """
+        self.submit(idempotency_key, card, result).result()
+        with self._lock:
+            if result.paid:
+                self._paid_keys.add(idempotency_key)
+            self._unknown_keys.discard(idempotency_key)
+
+    def pay(self, idempotency_key: str, order: Order, card: CreditCard, processor: PaymentProcessor) -> PaymentResult:
+        """Charges an order at most once per idempotency key and records the attempt.
+
+        A key that was already paid, or is being paid by another thread right now,
+        is reported as a DUPLICATE without reaching the processor, and so is a key
+        whose earlier charge has an unknown outcome. The order is only marked as paid
+        once the successful charge is in the ledger.
+
+        Raises:
+            LedgerClosedError: If the ledger is closed.
+            sqlite3.Error: If the pending row could not be written (the card was not
+                charged) or the outcome could not be written (the key stays blocked).
+        """
+        with self._lock:
+            if idempotency_key in self._unknown_keys:
+                return PaymentResult(PaymentStatus.DUPLICATE, order.total, "An earlier charge of this order has an unknown outcome.")
+            if idempotency_key in self._paid_keys or idempotency_key in self._in_flight:
+                return PaymentResult(PaymentStatus.DUPLICATE, order.total, "Order was already charged.")
+            self._in_flight.add(idempotency_key)
+        try:
+            pending = ChargeRecord(idempotency_key, str(card.number)[-4:], order.total, PENDING, "", time.time())
+            self._submit(pending).result()
+            # From here on the key is blocked unless the outcome makes it into the ledger.
+            try:
+                result = attempt_payment(order, card, processor)
+                self.record(idempotency_key, card, result)
+            except BaseException:
+                with self._lock:
+                    self._unknown_keys.add(idempotency_key)
+                raise
+        finally:
+            with self._lock:
+                self._in_flight.discard(idempotency_key)
+        if result.paid:
+            order.pay()
+        return result
+
+    def close(self) -> None:
+        """Commits everything that is queued and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._writer.join()
+
+    def _write_batches(self) -> None:
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                # Takes whatever queued up during the last commit, and lingers for
+                # more only until the first record of the batch is max_delay old.
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(connection, batch)
+        connection.close()
+
+    def _commit(self, connection: sqlite3.Connection, batch: list[tuple[ChargeRecord, Future]]) -> None:
+        try:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO charges (idempotency_key, card_last4, amount, status, message, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(r.idempotency_key, r.card_last4, r.amount, r.status, r.message, r.created_at) for r, _ in batch],
+                )
+        except sqlite3.Error as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.commits += 1
+        for _, future in batch:
+            future.set_result(None)
@@ -0,0 +1,95 @@
+"""Drives concurrent payments through pay_order's payment path and reports latency.
+
+Against a running gateway:
+
+    python -m pay.loadgen --url http://127.0.0.1:8080 --payments 10000 --concurrency 64
+
+Or against a stand-in gateway started for the run:
+
+    python -m pay.loadgen --latency lognormal:0.02:0.5 --error-rate 0.01 --rate-limit 5000
+"""
+import argparse
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+
+from pay.credit_card import CreditCard
+from pay.gateway import HttpPaymentProcessor, StandInGateway, parse_latency
+from pay.order import LineItem, Order
+from pay.payment import PaymentProcessor, attempt_payment
+
+
+@dataclass
+class LoadReport:
+    latencies: list[float]
+    elapsed: float
+    statuses: Counter = field(default_factory=Counter)
+
+    @property
+    def throughput(self) -> float:
+        """ Returns the completed payments per second."""
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p: int) -> float:
+        """ Returns the p-th latency percentile in seconds."""
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[p - 1]
+
+    def __str__(self) -> str:
+        counts = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+        return (
+            f"{len(self.latencies)} payments in {self.elapsed:.2f}s ({self.throughput:,.0f}/s) "
+            f"p50 {self.percentile(50) * 1e3:.1f} ms, p95 {self.percentile(95) * 1e3:.1f} ms, "
+            f"p99 {self.percentile(99) * 1e3:.1f} ms [{counts}]"
+        )
+
+
+def run_load(processor: PaymentProcessor, payments: int, concurrency: int) -> LoadReport:
+    """Pays payments orders with concurrency threads and times every payment."""
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+
+    def pay(_: int) -> tuple[float, str]:
+        order = Order([LineItem(name="Shoes", price=100_00)])
+        start = time.perf_counter()
+        result = attempt_payment(order, card, processor)
+        return time.perf_counter() - start, result.status.value
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(pay, range(payments)))
+    report = LoadReport([latency for latency, _ in outcomes], time.perf_counter() - start)
+    report.statuses.update(status for _, status in outcomes)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate payment load against a gateway.")
+    parser.add_argument("--url", help="gateway URL; a stand-in gateway is started when omitted")
+    parser.add_argument("--api-key")
+    parser.add_argument("--payments", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", default="constant:0.005", help="stand-in latency, e.g. lognormal:0.02:0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="stand-in requests per second")
+    args = parser.parse_args()
+
+    gateway = None
+    url = args.url
+    if url is None:
+        gateway = StandInGateway(args.api_key, parse_latency(args.latency), args.error_rate, args.rate_limit).start()
+        url = gateway.url
+    processor = HttpPaymentProcessor(url, args.api_key, pool_size=args.concurrency)
+    try:
+        print(run_load(processor, args.payments, args.concurrency))
+    finally:
+        processor.close()
+        if gateway is not None:
+            gateway.stop()
+
+
+if __name__ == "__main__":
+    main()
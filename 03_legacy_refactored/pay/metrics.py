@@ -0,0 +1,144 @@
+"""Opt-in timing and error metrics for the payment path.
+
+Nothing is recorded until METRICS.enable() is called; until then every hook costs a
+single attribute check. Stage latencies go into log-bucketed histograms: each power
+of two is split into SUB_BUCKETS buckets, so percentiles are accurate to about 25%
+at any scale while the memory per histogram stays bounded.
+"""
+from collections import Counter
+from functools import wraps
+import json
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+SUB_BUCKET_BITS = 2
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def bucket_of(value: int) -> int:
+    """Returns the histogram bucket of a non-negative integer."""
+    bits = value.bit_length()
+    if bits <= SUB_BUCKET_BITS:
+        return value
+    shift = bits - SUB_BUCKET_BITS - 1
+    return (shift + 1) * SUB_BUCKETS + ((value >> shift) & (SUB_BUCKETS - 1))
+
+
+def bucket_upper_bound(bucket: int) -> int:
+    """Returns the largest value that falls in a bucket."""
+    if bucket < SUB_BUCKETS:
+        return bucket
+    shift = bucket // SUB_BUCKETS - 1
+    return (((SUB_BUCKETS + bucket % SUB_BUCKETS) + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """A log-bucketed histogram of durations in nanoseconds."""
+
+    def __init__(self) -> None:
+        self.buckets: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, nanoseconds: int) -> None:
+        if not self.count or nanoseconds < self.min:
+            self.min = nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+        self.count += 1
+        self.total += nanoseconds
+        self.buckets[bucket_of(nanoseconds)] += 1
+
+    def percentile(self, p: float) -> int:
+        """Returns an upper bound of the p-th percentile (0-100)."""
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(bucket_upper_bound(bucket), self.max)
+        return self.max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ns": self.total,
+            "min_ns": self.min,
+            "max_ns": self.max,
+            "mean_ns": self.total / self.count if self.count else 0,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "buckets": {bucket_upper_bound(bucket): count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+class Metrics:
+    """Per-stage latency histograms and per-exception-type counters."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.errors: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages.clear()
+            self.errors.clear()
+
+    def observe(self, stage: str, start_ns: int) -> None:
+        """Records the time since start_ns (from time.perf_counter_ns) for a stage."""
+        elapsed = time.perf_counter_ns() - start_ns
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = LatencyHistogram()
+            histogram.record(elapsed)
+
+    def count_error(self, error: BaseException) -> None:
+        with self._lock:
+            self.errors[type(error).__name__] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns a copy of all metrics as plain dicts."""
+        with self._lock:
+            return {
+                "stages": {stage: histogram.snapshot() for stage, histogram in sorted(self.stages.items())},
+                "errors": dict(self.errors),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+
+METRICS = Metrics()
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorates a function so its duration is recorded under stage while METRICS is enabled."""
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not METRICS.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                METRICS.observe(stage, start)
+        return wrapper  # type: ignore[return-value]
+    return decorator
@@ -0,0 +1,164 @@
+"""Money amounts as whole numbers of a currency's minor unit (cents for USD).
+
+Amounts are never converted to floats: formatting splits the integer with divmod,
+parsing reads the decimal digits, and sums of many amounts stay exact even beyond
+the range of a 64-bit integer.
+"""
+from dataclasses import dataclass
+from functools import lru_cache, total_ordering
+import sys
+from typing import TYPE_CHECKING, Callable, Iterable, Sequence
+
+if TYPE_CHECKING:
+    import numpy as np
+
+DEFAULT_CURRENCY = "USD"
+
+# Digits after the decimal point, per ISO 4217; anything not listed has 2.
+CURRENCY_EXPONENTS = {"BHD": 3, "CLP": 0, "ISK": 0, "JOD": 3, "JPY": 0, "KRW": 0, "KWD": 3, "OMR": 3, "TND": 3, "VND": 0}
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥", "INR": "₹", "KRW": "₩"}
+
+# At most _INT64_LIMIT // m int64 values of magnitude m or less can be summed without overflow.
+_INT64_LIMIT = 2 ** 63 - 1
+
+
+class CurrencyMismatchError(ValueError):
+    pass
+
+
+def currency_exponent(currency: str) -> int:
+    return CURRENCY_EXPONENTS.get(currency, 2)
+
+
+@lru_cache(maxsize=None)
+def formatter(currency: str = DEFAULT_CURRENCY) -> Callable[[int], str]:
+    """Returns a function that formats minor units of a currency, e.g. 123456 -> "$1234.56".
+
+    The symbol and the zero-padded text of every possible minor part are worked out
+    once per currency, so formatting an amount is one divmod and a lookup.
+    """
+    exponent = currency_exponent(currency)
+    prefix = CURRENCY_SYMBOLS.get(currency, currency + " ")
+    if exponent == 0:
+        return lambda amount: f"-{prefix}{-amount}" if amount < 0 else f"{prefix}{amount}"
+    scale = 10 ** exponent
+    minors = [f"{minor:0{exponent}d}" for minor in range(scale)]
+
+    def format_amount(amount: int) -> str:
+        if amount < 0:
+            major, minor = divmod(-amount, scale)
+            return f"-{prefix}{major}.{minors[minor]}"
+        major, minor = divmod(amount, scale)
+        return f"{prefix}{major}.{minors[minor]}"
+
+    return format_amount
+
+
+def format_money(amount: int, currency: str = DEFAULT_CURRENCY) -> str:
+    """Formats minor units of a currency without going through a float."""
+    return formatter(currency)(amount)
+
+
+def sum_minor_units(amounts: "Sequence[int] | np.ndarray") -> int:
+    """Sums many amounts exactly.
+
+    NumPy arrays are summed in int64 chunks small enough that no chunk can overflow,
+    and the chunk sums are added up as Python integers; anything else, including
+    object arrays of Python integers, is summed as Python integers, which never
+    overflow. NumPy is not imported for this: an array
+    can only be passed in once something else has imported it.
+    """
+    np = sys.modules.get("numpy")
+    if np is None or not isinstance(amounts, np.ndarray):
+        return sum(amounts)
+    if amounts.dtype == object:
+        return sum(amounts.reshape(-1).tolist())
+    if amounts.dtype.kind not in "iu":
+        raise TypeError(f"Amounts must be integers, not {amounts.dtype}.")
+    values = amounts.reshape(-1)
+    if not len(values):
+        return 0
+    if values.dtype.kind == "u" and values.max() > _INT64_LIMIT:
+        return sum(int(value) for value in values.tolist())
+    values = values.astype(np.int64, copy=False)
+    magnitude = max(abs(int(values.min())), abs(int(values.max())), 1)
+    # -2**63 is one more than _INT64_LIMIT, which still fits a chunk of one.
+    chunk = max(_INT64_LIMIT // magnitude, 1)
+    if chunk >= len(values):
+        return int(values.sum())
+    return sum(int(values[start:start + chunk].sum()) for start in range(0, len(values), chunk))
+
+
+@total_ordering
+@dataclass(frozen=True, slots=True)
+class Money:
+    amount: int
+    currency: str = DEFAULT_CURRENCY
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.amount, int) or isinstance(self.amount, bool):
+            raise TypeError(f"Money amounts are whole minor units, not {type(self.amount).__name__}.")
+
+    @classmethod
+    def parse(cls, text: str, currency: str = DEFAULT_CURRENCY) -> "Money":
+        """Parses a decimal amount in major units, e.g. "12.34" -> Money(1234)."""
+        exponent = currency_exponent(currency)
+        sign, text = (-1, text[1:]) if text.startswith("-") else (1, text)
+        major, _, minor = text.partition(".")
+        if not (major or minor) or not (major or "0").isdigit() or (minor and not minor.isdigit()) or len(minor) > exponent:
+            raise ValueError(f"Invalid {currency} amount: {text!r}")
+        return cls(sign * (int(major or 0) * 10 ** exponent + int(minor.ljust(exponent, "0") or 0)), currency)
+
+    @classmethod
+    def total(cls, amounts: Iterable["Money"], currency: str = DEFAULT_CURRENCY) -> "Money":
+        """Sums Money values of one currency."""
+        total = 0
+        for money in amounts:
+            if money.currency != currency:
+                raise CurrencyMismatchError(f"Cannot add {money.currency} to {currency}.")
+            total += money.amount
+        return cls(total, currency)
+
+    def _check(self, other: "Money") -> None:
+        if self.currency != other.currency:
+            raise CurrencyMismatchError(f"Cannot combine {self.currency} with {other.currency}.")
+
+    def __add__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        self._check(other)
+        return Money(self.amount + other.amount, self.currency)
+
+    def __radd__(self, other: object) -> "Money":
+        # Lets sum() start from 0.
+        if other == 0:
+            return self
+        return NotImplemented
+
+    def __sub__(self, other: "Money") -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        self._check(other)
+        return Money(self.amount - other.amount, self.currency)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.amount, self.currency)
+
+    def __mul__(self, factor: int) -> "Money":
+        if not isinstance(factor, int):
+            return NotImplemented
+        return Money(self.amount * factor, self.currency)
+
+    __rmul__ = __mul__
+
+    def __lt__(self, other: "Money") -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        self._check(other)
+        return self.amount < other.amount
+
+    def __bool__(self) -> bool:
+        return self.amount != 0
+
+    def __str__(self) -> str:
+        return formatter(self.currency)(self.amount)
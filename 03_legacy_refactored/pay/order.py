@@ -1,31 +1,231 @@
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import Any, Iterable, SupportsIndex
+import weakref
+
+from pay.money import DEFAULT_CURRENCY, Money
 
 class OrderStatus(Enum):
     OPEN = 'open'
     PAID = 'paid'
 
-@dataclass
+@dataclass(slots=True, init=False)
 class LineItem:
     name: str
-    price: str
+    price: int  # In minor units (cents) of the order's currency
     quantity: int = 1
+    # Weak references to the LineItemLists this item is in, told about price and
+    # quantity changes. Weak, so a shared item does not keep discarded orders alive.
+    _containers: list['weakref.ref[LineItemList]'] | None = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def total(self) -> int:
         """ Returns the total cost of the line item (price * quantity)."""
         return self.price * self.quantity
 
-@dataclass
+    def __init__(self, name: str, price: int, quantity: int = 1) -> None:
+        # Bypasses __setattr__: a new item is not in any LineItemList yet.
+        _set_name(self, name)
+        _set_price(self, price)
+        _set_quantity(self, quantity)
+        _set_containers(self, None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        containers = self._containers
+        if not containers or (name != 'price' and name != 'quantity'):
+            object.__setattr__(self, name, value)
+            return
+        old_total = self.total
+        object.__setattr__(self, name, value)
+        delta = self.total - old_total
+        live = 0
+        for ref in containers:
+            container = ref()
+            if container is not None:
+                container._total += delta
+                live += 1
+        if live != len(containers):
+            containers[:] = [ref for ref in containers if ref() is not None]
+
+    def __reduce__(self) -> tuple:
+        return (self.__class__, (self.name, self.price, self.quantity))
+
+
+_set_name = LineItem.name.__set__
+_set_price = LineItem.price.__set__
+_set_quantity = LineItem.quantity.__set__
+_set_containers = LineItem._containers.__set__
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenLineItem:
+    """ An immutable LineItem. Its total never changes, so lists do not need to track it."""
+    name: str
+    price: int
+    quantity: int = 1
+
+    @property
+    def total(self) -> int:
+        """ Returns the total cost of the line item (price * quantity)."""
+        return self.price * self.quantity
+
+
+def _sum_totals(items: Iterable[LineItem]) -> int:
+    # A plain loop: for the few items of a typical order it beats sum() over a comprehension.
+    total = 0
+    for item in items:
+        total += item.total
+    return total
+
+
+class LineItemList(list):
+    """ A list of line items that keeps a running total of their line totals.
+
+    Every way of adding, removing or replacing items updates the total, and line
+    items report changes to their price or quantity back to the lists they are in,
+    so reading the total never has to re-sum the items. Items only hold weak
+    references to their lists.
+    """
+    __slots__ = ('_total', '_ref', '__weakref__')
+
+    def __init__(self, items: Iterable[LineItem] = ()) -> None:
+        self._total = 0
+        self._ref = None
+        if items:
+            self.extend(items)
+
+    def __reduce__(self) -> tuple:
+        return (self.__class__, (list(self),))
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def _attach(self, item: LineItem) -> None:
+        if isinstance(item, LineItem):
+            ref = self._ref
+            if ref is None:
+                ref = self._ref = weakref.ref(self)
+            containers = item._containers
+            if containers is None:
+                _set_containers(item, [ref])
+            else:
+                containers.append(ref)
+        self._total += item.total
+
+    def _detach(self, item: LineItem) -> None:
+        if isinstance(item, LineItem):
+            ref = self._ref
+            containers = item._containers
+            for i, other in enumerate(containers):
+                if other is ref:
+                    del containers[i]
+                    break
+        self._total -= item.total
+
+    def append(self, item: LineItem) -> None:
+        list.append(self, item)
+        self._attach(item)
+
+    def insert(self, index: SupportsIndex, item: LineItem) -> None:
+        list.insert(self, index, item)
+        self._attach(item)
+
+    def extend(self, items: Iterable[LineItem]) -> None:
+        for item in items:
+            list.append(self, item)
+            self._attach(item)
+
+    def __iadd__(self, items: Iterable[LineItem]) -> 'LineItemList':
+        self.extend(items)
+        return self
+
+    def __imul__(self, count: SupportsIndex) -> 'LineItemList':
+        items = list(self)
+        for _ in range(int(count) - 1):
+            self.extend(items)
+        if int(count) <= 0:
+            self.clear()
+        return self
+
+    def remove(self, item: LineItem) -> None:
+        del self[self.index(item)]
+
+    def pop(self, index: SupportsIndex = -1) -> LineItem:
+        item = list.pop(self, index)
+        self._detach(item)
+        return item
+
+    def clear(self) -> None:
+        for item in self:
+            self._detach(item)
+        list.clear(self)
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        if isinstance(index, slice):
+            value = list(value)
+            old_items = self[index]
+            super().__setitem__(index, value)
+            for item in old_items:
+                self._detach(item)
+            for item in value:
+                self._attach(item)
+        else:
+            old_item = self[index]
+            super().__setitem__(index, value)
+            self._detach(old_item)
+            self._attach(value)
+
+    def __delitem__(self, index: Any) -> None:
+        old_items = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for item in old_items:
+            self._detach(item)
+
+
+@dataclass(slots=True, init=False)
 class Order:
-    line_items: list[LineItem] = field(default_factory=list)
+    line_items: list[LineItem] = field(default_factory=LineItemList)
     status: OrderStatus = OrderStatus.OPEN
+    currency: str = DEFAULT_CURRENCY
+
+    def __init__(self, line_items: Iterable[LineItem] | None = None, status: OrderStatus = OrderStatus.OPEN, currency: str = DEFAULT_CURRENCY) -> None:
+        if line_items is None:
+            line_items = LineItemList()
+        elif not isinstance(line_items, LineItemList):
+            line_items = LineItemList(line_items)
+        _set_line_items(self, line_items)
+        _set_status(self, status)
+        _set_currency(self, currency)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == 'line_items' and not isinstance(value, LineItemList):
+            value = LineItemList(value)
+        object.__setattr__(self, name, value)
 
     @property
     def total(self) -> int:
         """ Returns the total cost of the order (sum of all line items)."""
-        return sum(item.total for item in self.line_items)
+        return self.line_items.total
+
+    @property
+    def amount(self) -> Money:
+        """ Returns the total cost of the order as Money in the order's currency."""
+        return Money(self.line_items.total, self.currency)
+
+    def add_item(self, item: LineItem) -> None:
+        """ Adds a line item to the order."""
+        self.line_items.append(item)
+
+    def remove_item(self, item: LineItem) -> None:
+        """ Removes a line item from the order."""
+        self.line_items.remove(item)
 
     def pay(self) -> None:
         """ Changes the status of the order to PAID."""
-        self.status = OrderStatus.PAID
+        _set_status(self, OrderStatus.PAID)
+
+
+_set_line_items = Order.line_items.__set__
+_set_status = Order.status.__set__
+_set_currency = Order.currency.__set__
@@ -0,0 +1,181 @@
+from array import array
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+from pay.money import sum_minor_units
+from pay.order import LineItem, Order, OrderStatus
+
+_INT64_LIMIT = 2 ** 63 - 1
+
+
+def _magnitude(values: np.ndarray) -> int:
+    """ Returns the largest absolute value in an int64 array as a Python int."""
+    return max(abs(int(values.min())), abs(int(values.max()))) if len(values) else 0
+
+
+class LineItemTable:
+    """ Columnar storage for line items.
+
+    Names are dictionary encoded: every distinct name is stored once and each row keeps
+    an integer code. Prices (in cents) and quantities are stored as 64-bit integers in
+    growable arrays, which NumPy can view without copying for vectorized totals.
+    """
+
+    def __init__(self, items: Iterable[LineItem] = ()) -> None:
+        self.names: list[str] = []
+        self._name_codes: dict[str, int] = {}
+        self.name_codes = array('I')
+        self.prices = array('q')
+        self.quantities = array('q')
+        for item in items:
+            self.append(item.name, item.price, item.quantity)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __getitem__(self, index: int) -> 'LineItemRow':
+        if not -len(self) <= index < len(self):
+            raise IndexError("line item index out of range")
+        return LineItemRow(self, index % len(self))
+
+    def __iter__(self) -> Iterator['LineItemRow']:
+        return (LineItemRow(self, index) for index in range(len(self)))
+
+    def encode_name(self, name: str) -> int:
+        """ Returns the code for a name, adding it to the dictionary if it is new."""
+        code = self._name_codes.get(name)
+        if code is None:
+            code = self._name_codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def append(self, name: str, price: int, quantity: int = 1) -> int:
+        """ Adds a line item and returns its row index."""
+        self.name_codes.append(self.encode_name(name))
+        self.prices.append(price)
+        self.quantities.append(quantity)
+        return len(self.prices) - 1
+
+    def line_totals(self) -> np.ndarray:
+        """ Returns price * quantity for every row.
+
+        The result is an int64 array, unless some product might not fit in 64 bits:
+        then it is an object array of exact Python ints.
+        """
+        prices = np.frombuffer(self.prices, dtype=np.int64)
+        quantities = np.frombuffer(self.quantities, dtype=np.int64)
+        if _magnitude(prices) * _magnitude(quantities) > _INT64_LIMIT:
+            return np.array([price * quantity for price, quantity in zip(self.prices, self.quantities)], dtype=object)
+        return prices * quantities
+
+    def total(self) -> int:
+        """ Returns the sum of all line totals, exactly."""
+        return sum_minor_units(self.line_totals())
+
+
+class LineItemRow(LineItem):
+    """ A LineItem that reads and writes one row of a LineItemTable.
+
+    Row views can be put in an Order like any other line item; changing their price or
+    quantity writes through to the table and updates the totals of the orders they are in.
+    """
+
+    def __init__(self, table: LineItemTable, index: int) -> None:
+        object.__setattr__(self, '_table', table)
+        object.__setattr__(self, '_index', index)
+        object.__setattr__(self, '_containers', None)
+
+    @property
+    def name(self) -> str:
+        return self._table.names[self._table.name_codes[self._index]]
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._table.name_codes[self._index] = self._table.encode_name(value)
+
+    @property
+    def price(self) -> int:
+        return self._table.prices[self._index]
+
+    @price.setter
+    def price(self, value: int) -> None:
+        self._table.prices[self._index] = value
+
+    @property
+    def quantity(self) -> int:
+        return self._table.quantities[self._index]
+
+    @quantity.setter
+    def quantity(self, value: int) -> None:
+        self._table.quantities[self._index] = value
+
+    def __reduce__(self) -> tuple:
+        return (LineItem, (self.name, self.price, self.quantity))
+
+
+class OrderBook:
+    """ Many orders stored in one LineItemTable.
+
+    The line items of an order are stored in consecutive rows, so per-order totals are
+    group sums over row ranges and are computed for all orders in one vectorized pass.
+    """
+
+    def __init__(self) -> None:
+        self.items = LineItemTable()
+        self.offsets = array('q', [0])
+        self.statuses = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    def add_order(self, line_items: Iterable[LineItem], status: OrderStatus = OrderStatus.OPEN) -> int:
+        """ Appends an order with the given line items and returns its index."""
+        for item in line_items:
+            self.items.append(item.name, item.price, item.quantity)
+        self.offsets.append(len(self.items))
+        self.statuses.append(status == OrderStatus.PAID)
+        return len(self.statuses) - 1
+
+    def order_totals(self) -> np.ndarray:
+        """ Returns the total of every order.
+
+        Like LineItemTable.line_totals, this is an int64 array unless a running sum of
+        the line totals might not fit in 64 bits, and exact Python ints otherwise.
+        """
+        line_totals = self.items.line_totals()
+        if line_totals.dtype != object and sum_minor_units(np.abs(line_totals)) > _INT64_LIMIT:
+            line_totals = line_totals.astype(object)
+        running = np.concatenate((np.zeros(1, line_totals.dtype), np.cumsum(line_totals)))
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        return running[offsets[1:]] - running[offsets[:-1]]
+
+    def total(self) -> int:
+        """ Returns the sum of all orders."""
+        return self.items.total()
+
+    def order(self, index: int) -> Order:
+        """ Returns the order at index as an Order whose line items are row views.
+
+        Paying the returned order also marks it as paid in the book.
+        """
+        rows = (LineItemRow(self.items, row) for row in range(self.offsets[index], self.offsets[index + 1]))
+        order = BookOrder(rows, OrderStatus.PAID if self.statuses[index] else OrderStatus.OPEN)
+        object.__setattr__(order, '_book', self)
+        object.__setattr__(order, '_index', index)
+        return order
+
+    def __iter__(self) -> Iterator[Order]:
+        return (self.order(index) for index in range(len(self)))
+
+
+class BookOrder(Order):
+    """ An Order view handed out by OrderBook.order."""
+
+    def pay(self) -> None:
+        """ Changes the status of the order to PAID, here and in the order book."""
+        super().pay()
+        self._book.statuses[self._index] = 1
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (Order, (list(self.line_items), self.status, self.currency))
@@ -1,8 +1,16 @@
+from dataclasses import dataclass
+from enum import Enum
 from pay.order import Order
-from typing import Protocol # replacing from pay.processor import PaymentProcessor
+from typing import TYPE_CHECKING, Protocol # replacing from pay.processor import PaymentProcessor
+import time
 from pay.credit_card import CreditCard
-from dotenv import load_dotenv
-from pay.processor import CardExpiredError, InvalidMonthError
+from pay.events import EventKind, PaymentEvent, emit, mask_card_number
+from pay.metrics import METRICS, timed
+from pay.money import Money, format_money
+from pay.processor import CardExpiredError, CardValidation, InvalidMonthError
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
 
 # instead of creating an instance of PaymentProcessor inside pay order define a protocol
@@ -12,18 +20,99 @@ class PaymentProcessor(Protocol):
     PaymentProcessor defines the required methods for any payment processor implementation.
     Any class implementing this protocol must provide the following methods:
 
-    - validate_card(card: CreditCard, month: int, year: int) -> bool
-    - charge(card: CreditCard, amount: int, month: int, year: int) -> bool
+    - validate_card(card: CreditCard, month: int, year: int) -> CardValidation | None
+    - charge(card: CreditCard, amount: Money) -> None
+
+    Both raise CardExpiredError, InvalidMonthError or ValueError to reject the card.
+    The amount is Money, in minor units of the order's currency.
+
+    A processor may return a CardValidation from validate_card; pay_order then hands it
+    to charge as a third argument so the card is not validated twice.
     """
-    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+    def validate_card(self, card: CreditCard, month: int, year: int) -> CardValidation | None:
         """Validates the card with the given expiry date"""
         pass
 
-    def charge(self, card: str, amount: float) -> None:
+    def charge(self, card: CreditCard, amount: Money) -> None:
         """Charges the card with the amount"""
         pass
 
 
+class PaymentStatus(Enum):
+    PAID = 'paid'
+    EXPIRED = 'expired'
+    INVALID_MONTH = 'invalid_month'
+    FAILED = 'failed'
+    DUPLICATE = 'duplicate'
+
+
+@dataclass(slots=True)
+class PaymentResult:
+    status: PaymentStatus
+    amount: int
+    message: str = ''
+
+    @property
+    def paid(self) -> bool:
+        """ Returns True if the card was charged."""
+        return self.status == PaymentStatus.PAID
+
+
+def attempt_payment(order: Order, card: CreditCard, processor: PaymentProcessor) -> PaymentResult:
+    """Validate the card and charge it for the order total, without side effects on the order.
+
+    The outcome is reported as a PaymentResult instead of being printed, so callers can
+    decide what to do with it. The order itself is not marked as paid.
+
+    Args:
+        order (Order): The order to be paid for.
+        card (CreditCard): The credit card to be used for payment.
+        processor (PaymentProcessor): The payment processor to be used for payment.
+
+    Returns:
+        PaymentResult: The status of the payment, the amount and an error message if it failed.
+    """
+    amount = order.amount
+    if amount.amount == 0:
+        return PaymentResult(PaymentStatus.FAILED, 0, "Cannot pay an order with total 0.")
+    return charge_card(card, amount, processor)
+
+
+def charge_card(card: CreditCard, money: Money, processor: PaymentProcessor) -> PaymentResult:
+    """Validate the card and charge it for an amount that is not tied to a single order.
+
+    Rejected cards are reported in the PaymentResult; any other error from the
+    processor is raised. Together with settle_order this lets a caller charge
+    several orders at once, e.g. ChargeAggregator.
+
+    Args:
+        card (CreditCard): The credit card to be charged.
+        money (Money): The amount to charge, in the currency of the orders.
+        processor (PaymentProcessor): The payment processor to be used for payment.
+
+    Returns:
+        PaymentResult: The status of the charge, its amount and an error message if it failed.
+    """
+    amount = money.amount
+    try:
+        validation = processor.validate_card(card, card.expiry_month, card.expiry_year)
+        if isinstance(validation, CardValidation):
+            # Lets the processor skip validating the card a second time.
+            processor.charge(card, money, validation)
+        else:
+            processor.charge(card, money)
+    except (CardExpiredError, InvalidMonthError, ValueError) as e:
+        if METRICS.enabled:
+            METRICS.count_error(e)
+        if isinstance(e, CardExpiredError):
+            return PaymentResult(PaymentStatus.EXPIRED, amount, str(e))
+        if isinstance(e, InvalidMonthError):
+            return PaymentResult(PaymentStatus.INVALID_MONTH, amount, str(e))
+        return PaymentResult(PaymentStatus.FAILED, amount, str(e))
+    return PaymentResult(PaymentStatus.PAID, amount)
+
+
+@timed("pay_order")
 def pay_order(order: Order, card: CreditCard, processor: PaymentProcessor) -> None:
     """Pay for an order using a given credit card and payment processor.
 
@@ -41,20 +130,110 @@ def pay_order(order: Order, card: CreditCard, processor: PaymentProcessor) -> No
     Returns:
         None
     """
+    timing = METRICS.enabled
+    if timing:
+        start = time.perf_counter_ns()
     amount = order.total
+    if timing:
+        METRICS.observe("order_total", start)
+    if amount == 0:
+        error = ValueError("Cannot pay an order with total 0.")
+        if timing:
+            METRICS.count_error(error)
+        raise error
+
+    settle_order(order, card, charge_card(card, Money(amount, order.currency), processor))
+
+
+def settle_order(order: Order, card: CreditCard, result: PaymentResult) -> None:
+    """Marks the order as paid if the charge went through and reports the outcome as an event, as pay_order does."""
+    masked = mask_card_number(card.number)
+    status = result.status
+    if status is PaymentStatus.EXPIRED:
+        emit(PaymentEvent(EventKind.EXPIRED, "Card is expired. Please use a different card.", result.amount, masked))
+    elif status is PaymentStatus.INVALID_MONTH:
+        emit(PaymentEvent(EventKind.INVALID_MONTH, "Invalid expiry month. Please enter a valid month between 1 and 12.", result.amount, masked))
+    elif status is PaymentStatus.FAILED:
+        emit(PaymentEvent(EventKind.FAILED, f"Payment failed: {result.message}", result.amount, masked))
+    else:
+        order.pay()
+        emit(PaymentEvent(EventKind.PAID, f"Order paid in full: {format_money(result.amount, order.currency)}", result.amount, masked))
+
+
+class AsyncPaymentProcessor(Protocol):
+    """The asynchronous counterpart of the PaymentProcessor protocol.
+
+    Any class implementing this protocol must provide the following coroutines:
+
+    - validate_card(card: CreditCard, month: int, year: int) -> None
+    - charge(card: CreditCard, amount: Money) -> None
+    """
+    async def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        """Validates the card with the given expiry date"""
+        pass
+
+    async def charge(self, card: CreditCard, amount: Money) -> None:
+        """Charges the card with the amount"""
+        pass
+
+
+class ThreadedPaymentProcessor:
+    """Adapts a synchronous PaymentProcessor to the AsyncPaymentProcessor protocol.
+
+    Every call is run on a thread pool so a blocking gateway call does not stall the
+    event loop. When no executor is given the loop's default executor is used.
+    asyncio is only imported once a coroutine runs, so importing pay.payment stays cheap.
+    """
+    def __init__(self, processor: PaymentProcessor, executor: "Executor | None" = None) -> None:
+        self.processor = processor
+        self.executor = executor
+
+    async def validate_card(self, card: CreditCard, month: int, year: int) -> CardValidation | None:
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.processor.validate_card, card, month, year)
+
+    async def charge(self, card: CreditCard, amount: Money, validation: CardValidation | None = None) -> None:
+        import asyncio
+        loop = asyncio.get_running_loop()
+        args = (card, amount) if validation is None else (card, amount, validation)
+        await loop.run_in_executor(self.executor, self.processor.charge, *args)
+
+
+async def pay_order_async(order: Order, card: CreditCard, processor: AsyncPaymentProcessor) -> None:
+    """Pay for an order using an asynchronous payment processor.
+
+    Behaves exactly like pay_order, but awaits the processor so many payments can be
+    in flight on a single event loop.
+
+    Args:
+        order (Order): The order to be paid for.
+        card (CreditCard): The credit card to be used for payment.
+        processor (AsyncPaymentProcessor): The payment processor to be used for payment.
+
+    Raises:
+        ValueError: If the order total is 0.
+
+    Returns:
+        None
+    """
+    money = order.amount
+    amount = money.amount
     if amount == 0:
         raise ValueError("Cannot pay an order with total 0.")
 
     try:
-        processor.validate_card(card, card.expiry_month, card.expiry_year)
-        processor.charge(card, amount)
-
-    except CardExpiredError:
-        print("Card is expired. Please use a different card.")
-    except InvalidMonthError:
-        print("Invalid expiry month. Please enter a valid month between 1 and 12.")
+        validation = await processor.validate_card(card, card.expiry_month, card.expiry_year)
+        if isinstance(validation, CardValidation):
+            await processor.charge(card, money, validation)
+        else:
+            await processor.charge(card, money)
+    except CardExpiredError as e:
+        result = PaymentResult(PaymentStatus.EXPIRED, amount, str(e))
+    except InvalidMonthError as e:
+        result = PaymentResult(PaymentStatus.INVALID_MONTH, amount, str(e))
     except ValueError as e:
-        print(f"Payment failed: {e}")
+        result = PaymentResult(PaymentStatus.FAILED, amount, str(e))
     else:
-        order.pay()
-        print(f"Order paid in full: ${order.total/100:.2f}")
+        result = PaymentResult(PaymentStatus.PAID, amount)
+    settle_order(order, card, result)
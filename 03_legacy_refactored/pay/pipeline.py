@@ -0,0 +1,250 @@
+"""Streaming settlement of order files.
+
+Orders are read lazily from CSV or JSONL, charged through any PaymentProcessor and
+the results are written out chunk by chunk, so memory use does not grow with the
+size of the input.
+
+JSONL input has one order per line:
+
+    {"order_id": "A1", "card": {"number": "1249190007575069", "expiry_month": 12, "expiry_year": 2030},
+     "line_items": [{"name": "Shoes", "price": 10000, "quantity": 2}]}
+
+CSV input has one line item per row, with the rows of an order next to each other:
+
+    order_id,card_number,expiry_month,expiry_year,name,price,quantity
+
+A record that cannot be parsed (bad JSON, a missing field, a price that is not an
+integer) is not charged: it gets a failed result naming its line, and the run goes on.
+"""
+import argparse
+import csv
+import itertools
+import json
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from pay.bulk import iter_pay_orders
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order
+from pay.payment import PaymentProcessor, PaymentResult, PaymentStatus, attempt_payment
+
+CSV_FIELDS = ["order_id", "card_number", "expiry_month", "expiry_year", "name", "price", "quantity"]
+RESULT_FIELDS = ["order_id", "status", "amount", "message"]
+
+
+@dataclass(slots=True)
+class OrderRecord:
+    order_id: str
+    order: Order
+    card: CreditCard
+
+
+@dataclass(slots=True)
+class InvalidRecord:
+    """A record that could not be parsed; it is reported as failed instead of being charged."""
+    order_id: str
+    message: str
+
+    def result(self) -> PaymentResult:
+        return PaymentResult(PaymentStatus.FAILED, 0, self.message)
+
+
+# The errors a malformed record raises while it is parsed.
+_RECORD_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def _invalid(order_id: object, line: int, error: Exception) -> InvalidRecord:
+    detail = f"missing field {error}" if isinstance(error, KeyError) else str(error)
+    return InvalidRecord("" if order_id is None else str(order_id), f"Invalid record at line {line}: {detail}")
+
+
+@dataclass
+class PipelineReport:
+    records: int = 0
+    elapsed: float = 0.0
+    statuses: Counter = field(default_factory=Counter)
+
+    @property
+    def records_per_second(self) -> float:
+        """ Returns the throughput of the run."""
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        counts = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+        return f"{self.records} orders in {self.elapsed:.2f}s ({self.records_per_second:,.0f} records/s) [{counts}]"
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[OrderRecord | InvalidRecord]:
+    """Parses one order per non-empty JSON line; a malformed line becomes an InvalidRecord."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        data = None
+        try:
+            data = json.loads(line)
+            card = data["card"]
+            yield OrderRecord(
+                str(data["order_id"]),
+                Order([LineItem(item["name"], int(item["price"]), int(item.get("quantity", 1))) for item in data["line_items"]]),
+                CreditCard(card["number"], int(card["expiry_month"]), int(card["expiry_year"])),
+            )
+        except _RECORD_ERRORS as e:
+            yield _invalid(data.get("order_id") if isinstance(data, dict) else None, number, e)
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[OrderRecord | InvalidRecord]:
+    """Parses line item rows into orders, grouping consecutive rows with the same order_id.
+
+    An order with a malformed row becomes an InvalidRecord naming the line of that row.
+    """
+    rows = csv.DictReader(lines)
+    for order_id, group in itertools.groupby(rows, key=lambda row: row.get("order_id")):
+        line = rows.line_num
+        try:
+            first = next(group)
+            card = CreditCard(first["card_number"], int(first["expiry_month"]), int(first["expiry_year"]))
+            order = Order()
+            for row in itertools.chain([first], group):
+                # groupby reads a row only when it is asked for, so line_num is this row's line.
+                line = rows.line_num
+                order.add_item(LineItem(row["name"], int(row["price"]), int(row["quantity"] or 1)))
+        except _RECORD_ERRORS as e:
+            # The rest of the order's rows are skipped along with its group.
+            yield _invalid(order_id, line, e)
+            continue
+        yield OrderRecord(order_id, order, card)
+
+
+def read_orders(file: IO[str], format: str) -> Iterator[OrderRecord | InvalidRecord]:
+    """Parses orders lazily from an open file in "csv" or "jsonl" format."""
+    readers = {"csv": read_csv, "jsonl": read_jsonl}
+    if format not in readers:
+        raise ValueError(f"Unknown format {format!r}, expected 'csv' or 'jsonl'.")
+    return readers[format](file)
+
+
+def chunked(records: Iterable[OrderRecord], chunk_size: int) -> Iterator[list[OrderRecord]]:
+    """Groups records into lists of at most chunk_size."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    iterator = iter(records)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def settle(
+    records: Iterable[OrderRecord | InvalidRecord],
+    processor: PaymentProcessor,
+    chunk_size: int = 1_000,
+    max_workers: int = 1,
+) -> Iterator[tuple[OrderRecord | InvalidRecord, PaymentResult]]:
+    """Charges every record and yields it with its result, in input order.
+
+    Invalid records are not charged and get a failed result. With max_workers above 1
+    the orders are paid on one thread pool for the whole run through pay.bulk, which
+    keeps a bounded number of orders in flight.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    if max_workers == 1:
+        for chunk in chunked(records, chunk_size):
+            for record in chunk:
+                if isinstance(record, InvalidRecord):
+                    yield record, record.result()
+                    continue
+                result = attempt_payment(record.order, record.card, processor)
+                if result.paid:
+                    record.order.pay()
+                yield record, result
+        return
+
+    # Records read ahead by the pool, in input order; the invalid ones among them are
+    # yielded as soon as every order before them has its result.
+    read: deque[OrderRecord | InvalidRecord] = deque()
+
+    def payments() -> Iterator[tuple[Order, CreditCard]]:
+        for record in records:
+            read.append(record)
+            if isinstance(record, OrderRecord):
+                yield record.order, record.card
+
+    for result in iter_pay_orders(payments(), processor, max_workers):
+        record = read.popleft()
+        while isinstance(record, InvalidRecord):
+            yield record, record.result()
+            record = read.popleft()
+        yield record, result
+    for record in read:
+        yield record, record.result()
+
+
+def write_results(results: Iterable[tuple[OrderRecord | InvalidRecord, PaymentResult]], file: IO[str], format: str, chunk_size: int = 1_000) -> PipelineReport:
+    """Writes one result per order and returns a report of the run.
+
+    The output is flushed after every chunk_size results.
+    """
+    report = PipelineReport()
+    start = time.perf_counter()
+    if format == "csv":
+        writer = csv.writer(file)
+        writer.writerow(RESULT_FIELDS)
+        write = lambda row: writer.writerow(row)
+    elif format == "jsonl":
+        write = lambda row: file.write(json.dumps(dict(zip(RESULT_FIELDS, row))) + "\n")
+    else:
+        raise ValueError(f"Unknown format {format!r}, expected 'csv' or 'jsonl'.")
+
+    for record, result in results:
+        write((record.order_id, result.status.value, result.amount, result.message))
+        report.records += 1
+        report.statuses[result.status.value] += 1
+        if report.records % chunk_size == 0:
+            file.flush()
+    file.flush()
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def run_pipeline(
+    source: IO[str],
+    destination: IO[str],
+    processor: PaymentProcessor,
+    input_format: str = "jsonl",
+    output_format: str = "jsonl",
+    chunk_size: int = 1_000,
+    max_workers: int = 1,
+) -> PipelineReport:
+    """Reads orders from source, charges them and writes the results to destination."""
+    records = read_orders(source, input_format)
+    results = settle(records, processor, chunk_size, max_workers)
+    return write_results(results, destination, output_format, chunk_size)
+
+
+def _format_of(path: Path) -> str:
+    return "csv" if path.suffix == ".csv" else "jsonl"
+
+
+def main() -> None:
+    from pay.processor import PaymentProcessor as Processor
+    from pay.settings import get_settings
+
+    parser = argparse.ArgumentParser(description="Charge every order in a CSV or JSONL file.")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with args.input.open(newline="") as source, args.output.open("w", newline="") as destination:
+        report = run_pipeline(
+            source, destination, Processor(get_settings().api_key),
+            _format_of(args.input), _format_of(args.output), args.chunk_size, args.workers,
+        )
+    print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,45 @@
-from datetime import datetime
-from dotenv import load_dotenv
-import os
+from dataclasses import dataclass
+import hashlib
+import hmac
+import secrets
+import time
+from pay.clock import MonthClock, SYSTEM_CLOCK
 from pay.credit_card import CreditCard
+from pay.events import EventKind, PaymentEvent, emit, mask_card_number
+from pay.metrics import timed
+from pay.money import DEFAULT_CURRENCY, Money, format_money
+from pay.settings import Settings, get_settings
 
-load_dotenv()
 
-API_KEY = os.getenv("API_KEY")
+def __getattr__(name: str) -> object:
+    # API_KEY used to be read at import time; it is now looked up when first used.
+    if name == "API_KEY":
+        return get_settings().api_key
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def luhn_checksum(card_number: str) -> bool:
-        def digits_of(card_nr: str):
-            return [int(d) for d in card_nr]
+# Lookup tables indexed by character code: the digit value itself, and the digit
+# sum of the doubled digit. Any other character maps to None.
+_DIGIT = tuple(code - 48 if 48 <= code <= 57 else None for code in range(256))
+_DOUBLED_DIGIT = tuple((2 * digit) % 10 + (2 * digit) // 10 if digit is not None else None for digit in _DIGIT)
 
-        digits = digits_of(card_number)
-        odd_digits = digits[-1::-2]
-        even_digits = digits[-2::-2]
-        checksum =0
-        checksum += sum(odd_digits)
-        for digit in even_digits:
-            checksum += sum(digits_of(str(digit * 2)))
-        return checksum % 10 == 0
+
+def luhn_checksum(card_number: str | bytes | bytearray | memoryview) -> bool:
+    """Returns True if the card number passes the Luhn check.
+
+    Walks the digits once from left to right, alternating between the plain and the
+    doubled lookup table, without building any intermediate lists or strings.
+    """
+    codes = map(ord, card_number) if isinstance(card_number, str) else iter(card_number)
+    table, other = (_DOUBLED_DIGIT, _DIGIT) if len(card_number) % 2 == 0 else (_DIGIT, _DOUBLED_DIGIT)
+    checksum = 0
+    try:
+        for code in codes:
+            checksum += table[code]
+            table, other = other, table
+    except (TypeError, IndexError):
+        raise ValueError(f"Invalid character in card number: {card_number!r}") from None
+    return checksum % 10 == 0
 
 # create a CardExpiredError class
 class CardExpiredError(Exception):
@@ -30,31 +50,80 @@ class InvalidMonthError(Exception):
 
 
 
+@dataclass(frozen=True, slots=True)
+class CardValidation:
+    """Proof that a PaymentProcessor validated a card, returned by validate_card.
+
+    The signature binds the card number, the expiry month and year and the deadline
+    to a key only the issuing processor knows, so a token cannot be reused for a
+    different card, forged, or used after it went stale.
+    """
+    valid_until: float
+    signature: bytes
+
+    def __bool__(self) -> bool:
+        return True
+
+
 class PaymentProcessor:
-    def __init__(self, api_key: str) -> None:
+    def __init__(
+        self,
+        api_key: str | None,
+        validation_ttl: float = 60.0,
+        clock: MonthClock = SYSTEM_CLOCK,
+        settings: Settings | None = None,
+    ) -> None:
         self.api_key = api_key
+        self.validation_ttl = validation_ttl
+        self.clock = clock
+        self.settings = settings
+        self._validation_key = secrets.token_bytes(32)
 
     def _check_api_key(self) -> bool:
-        return self.api_key == API_KEY
+        settings = self.settings or get_settings()
+        return self.api_key == settings.api_key
+
+    def _sign(self, card: CreditCard, month: int, year: int, valid_until: float) -> bytes:
+        message = f"{card.number}|{month}|{year}|{valid_until!r}".encode()
+        return hashlib.blake2b(message, key=self._validation_key, digest_size=16).digest()
 
+    def is_validated(self, card: CreditCard, validation: CardValidation | None) -> bool:
+        """Returns True if validation is a fresh token this processor issued for the card."""
+        if not isinstance(validation, CardValidation) or time.monotonic() >= validation.valid_until:
+            return False
+        expected = self._sign(card, card.expiry_month, card.expiry_year, validation.valid_until)
+        return hmac.compare_digest(expected, validation.signature)
 
-    def validate_card(self, card: CreditCard, month: int, year: int) -> bool:
+    @timed("validate_card")
+    def validate_card(self, card: CreditCard, month: int, year: int) -> CardValidation:
         if not 1 <= month <= 12:
             raise InvalidMonthError("Invalid expiry month. Month must be in the range of 1 to 12.")
-        expiry_date = datetime(year, month, 1)
-        if expiry_date < datetime.now():
+        if self.clock.is_expired(month, year):
             raise CardExpiredError("Card is expired.")
         if not luhn_checksum(card.number):
             raise ValueError("Invalid Card number")
-        return True
+        valid_until = time.monotonic() + self.validation_ttl
+        return CardValidation(valid_until, self._sign(card, month, year, valid_until))
+
+    @timed("charge")
+    def charge(self, card: CreditCard, amount: int | Money, validation: CardValidation | None = None) -> None:
+        """Charges the card with the amount, in minor units of USD or as Money.
 
-    def charge(self, card: CreditCard, amount: int) -> None:
+        The card is validated again unless validation is a fresh token from this
+        processor's validate_card for the same card; stale, foreign or tampered
+        tokens are ignored and the card goes through full validation.
+        """
         try:
-            self.validate_card(card, card.expiry_month, card.expiry_year)
+            if not self.is_validated(card, validation):
+                self.validate_card(card, card.expiry_month, card.expiry_year)
         except CardExpiredError:
             raise CardExpiredError("Card validation failed: Card is expired.")
         except ValueError as e:
             raise ValueError(f"Card validation failed: {e}")
         if not self._check_api_key():
             raise ValueError("Invalid API key")
-        print(f"Charging card number {card} for ${amount/100:.2f}")
\ No newline at end of file
+        currency = DEFAULT_CURRENCY
+        if isinstance(amount, Money):
+            amount, currency = amount.amount, amount.currency
+        masked = mask_card_number(card.number)
+        emit(PaymentEvent(EventKind.CHARGED, f"Charging card number {masked} for {format_money(amount, currency)}", amount, masked))
\ No newline at end of file
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any, Callable, Literal, Sequence
+
+from pay.credit_card import CreditCard
+from pay.gateway import GatewayError
+from pay.money import Money
+from pay.payment import PaymentProcessor
+from pay.processor import CardExpiredError, CardValidation, InvalidMonthError
+
+# Ejections last at most this many times eject_for, however often a backend fails.
+MAX_EJECTION_FACTOR = 32
+
+
+@dataclass(slots=True)
+class BackendStats:
+    latency: float | None = None
+    in_flight: int = 0
+    calls: int = 0
+    errors: int = 0
+    failures: int = 0  # The errors that were the backend's fault, not the card's
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    hedges: int = 0
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Returns True if an error means the backend failed, rather than that it rejected the card."""
+    if isinstance(error, GatewayError):
+        return True
+    return not isinstance(error, (CardExpiredError, InvalidMonthError, ValueError))
+
+
+class _Hedge:
+    """Whether a validation is hedged: only if its first backend has not answered by the deadline."""
+    __slots__ = ("deadline", "answered", "sent", "lock")
+
+    def __init__(self, deadline: float) -> None:
+        self.deadline = deadline
+        self.answered = threading.Event()
+        self.sent = False
+        self.lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Waits for the deadline and returns True if the hedge should be sent."""
+        if self.answered.wait(max(0.0, self.deadline - time.monotonic())):
+            return False
+        with self.lock:
+            self.sent = not self.answered.is_set()
+            return self.sent
+
+    def finish(self) -> bool:
+        """Records that the first backend answered and returns True if the hedge was sent."""
+        with self.lock:
+            self.answered.set()
+            return self.sent
+
+
+class RoutingProcessor:
+    """A PaymentProcessor that spreads calls over several backend processors.
+
+    Every call goes to the backend with the best score: with the "latency" strategy
+    the exponentially weighted moving average (EWMA) of its call latency, scaled by
+    the calls it already has in flight, and with "least_loaded" the number of calls in
+    flight, ties broken by latency. Backends that were never called score best, so
+    each one is probed once.
+
+    A backend that fails (a GatewayError or any error other than a rejected card) is
+    ejected: it gets no calls for eject_for seconds, twice as long for every further
+    failure in a row, unless every backend is ejected. Failed calls do not count
+    towards the latency average, so a backend that fails fast never looks fast.
+
+    With hedge_after set, validate_card also sends the request to the second best
+    backend when the first has not answered within hedge_after seconds. The first
+    backend is called on the caller's thread and its answer is used; if it fails,
+    e.g. by timing out, the hedge's answer is used instead, which by then has
+    usually arrived. A rejected card is raised at once, without waiting for the
+    hedge. Only hedges run on the pool of max_hedge_workers threads, and a hedge
+    still queued when the first backend answers is dropped, so a saturated router
+    adds no load. Charges are never hedged or retried: each charge
+    goes to exactly one backend, preferably the one that validated the card, so a
+    slow or failed charge can not be duplicated on another backend.
+    """
+
+    def __init__(
+        self,
+        processors: Sequence[PaymentProcessor],
+        strategy: Literal["latency", "least_loaded"] = "latency",
+        alpha: float = 0.2,
+        hedge_after: float | None = None,
+        max_hedge_workers: int = 32,
+        eject_for: float = 1.0,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if not processors:
+            raise ValueError("At least one processor is required.")
+        if strategy not in ("latency", "least_loaded"):
+            raise ValueError(f"Unknown strategy {strategy!r}, expected 'latency' or 'least_loaded'.")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in the range (0, 1].")
+        self.processors = list(processors)
+        self.strategy = strategy
+        self.alpha = alpha
+        self.hedge_after = hedge_after
+        self.eject_for = eject_for
+        self.clock = clock
+        self.stats = [BackendStats() for _ in self.processors]
+        self._lock = threading.Lock()
+        # Which backend issued a validation token, so the charge can go to the same one.
+        self._issued_by: OrderedDict[bytes, int] = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_hedge_workers, "hedged-validation") if hedge_after is not None else None
+
+    def _score(self, index: int) -> tuple[float, float]:
+        stats = self.stats[index]
+        latency = stats.latency or 0.0
+        if self.strategy == "least_loaded":
+            return stats.in_flight, latency
+        return latency * (stats.in_flight + 1), stats.in_flight
+
+    def _pick(self, exclude: int | None = None) -> int:
+        now = self.clock()
+        with self._lock:
+            candidates = [i for i in range(len(self.processors)) if i != exclude]
+            available = [i for i in candidates if self.stats[i].ejected_until <= now]
+            index = min(available or candidates, key=self._score)
+            self.stats[index].in_flight += 1
+            self.stats[index].calls += 1
+            return index
+
+    def _call(self, index: int, method: str, *args: Any) -> Any:
+        """Calls a backend picked with _pick and records its latency."""
+        start = self.clock()
+        error: BaseException | None = None
+        try:
+            return getattr(self.processors[index], method)(*args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            end = self.clock()
+            elapsed = end - start
+            with self._lock:
+                stats = self.stats[index]
+                stats.in_flight -= 1
+                stats.errors += error is not None
+                if error is not None and is_backend_failure(error):
+                    stats.failures += 1
+                    stats.consecutive_failures += 1
+                    factor = min(2 ** (stats.consecutive_failures - 1), MAX_EJECTION_FACTOR)
+                    stats.ejected_until = end + self.eject_for * factor
+                else:
+                    stats.consecutive_failures = 0
+                    stats.latency = elapsed if stats.latency is None else stats.latency + self.alpha * (elapsed - stats.latency)
+
+    def _remember(self, index: int, validation: Any) -> None:
+        if isinstance(validation, CardValidation):
+            with self._lock:
+                self._issued_by[validation.signature] = index
+                while len(self._issued_by) > 10_000:
+                    self._issued_by.popitem(last=False)
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> Any:
+        if self._executor is None or len(self.processors) == 1:
+            index = self._pick()
+            validation = self._call(index, "validate_card", card, month, year)
+            self._remember(index, validation)
+            return validation
+
+        # The first backend is called on this thread, so a busy executor can never
+        # delay it past hedge_after; the executor only runs the (possible) hedge.
+        first = self._pick()
+        hedge = _Hedge(time.monotonic() + self.hedge_after)
+        hedged = self._executor.submit(self._hedge, hedge, first, card, month, year)
+        try:
+            validation = self._call(first, "validate_card", card, month, year)
+        except Exception as e:
+            if not hedge.finish() or not is_backend_failure(e):
+                # A rejected card is a definitive answer: the hedge is not waited for.
+                raise
+            index, validation = hedged.result()
+        else:
+            hedge.finish()
+            index = first
+        self._remember(index, validation)
+        return validation
+
+    def _hedge(self, hedge: "_Hedge", first: int, card: CreditCard, month: int, year: int) -> tuple[int, Any] | None:
+        if not hedge.start():
+            return None
+        second = self._pick(exclude=first)
+        with self._lock:
+            self.stats[second].hedges += 1
+        return second, self._call(second, "validate_card", card, month, year)
+
+    def charge(self, card: CreditCard, amount: Money, validation: CardValidation | None = None) -> None:
+        with self._lock:
+            issuer = self._issued_by.pop(validation.signature, None) if validation is not None else None
+        if issuer is None:
+            index = self._pick()
+            return self._call(index, "charge", card, amount)
+        with self._lock:
+            self.stats[issuer].in_flight += 1
+            self.stats[issuer].calls += 1
+        return self._call(issuer, "charge", card, amount, validation)
+
+    def __enter__(self) -> "RoutingProcessor":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stops the hedging threads once their calls have finished."""
+        if self._executor is not None:
+            self._executor.shutdown()
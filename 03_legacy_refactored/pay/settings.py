@@ -0,0 +1,57 @@
+"""Configuration of the payment package, loaded on first use.
+
+Nothing is read at import time. get_settings() reads the environment, and a .env
+file if python-dotenv is installed, the first time it is called and caches the
+result; reset_settings() drops the cache, e.g. after changing the environment in
+tests. Variables already set in the environment win over the .env file.
+"""
+from dataclasses import dataclass
+import os
+import threading
+from typing import Mapping
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    api_key: str | None = None
+
+    @classmethod
+    def from_mapping(cls, values: Mapping[str, str | None]) -> "Settings":
+        return cls(api_key=values.get("API_KEY"))
+
+    @classmethod
+    def from_env(cls, env_file: str | os.PathLike[str] | None = None) -> "Settings":
+        """Reads the settings from the environment, falling back to a .env file."""
+        return cls.from_mapping({**_read_env_file(env_file), **os.environ})
+
+
+def _read_env_file(env_file: str | os.PathLike[str] | None) -> dict[str, str | None]:
+    try:
+        from dotenv import dotenv_values, find_dotenv
+    except ImportError:
+        return {}
+    if env_file is None:
+        env_file = find_dotenv()
+        if not env_file:
+            return {}
+    return dotenv_values(env_file)
+
+
+_settings: Settings | None = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Returns the process-wide settings, loading them on the first call."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings.from_env()
+    return _settings
+
+
+def reset_settings() -> None:
+    """Forgets the cached settings so the next get_settings() reads them again."""
+    global _settings
+    _settings = None
@@ -0,0 +1,232 @@
+"""Settlement of large batches across worker processes, sharded by card.
+
+Luhn checks and order totals are CPU-bound, so a single process paying orders in a
+loop is limited to one core by the GIL. Here every order is assigned to one of N
+shards by a stable hash of its card number, and each shard is paid by its own
+worker process with its own PaymentProcessor. All payments with the same card go
+through the same worker, one after another, so they keep their input order.
+"""
+from collections import defaultdict
+import multiprocessing
+from multiprocessing.context import BaseContext
+import os
+import queue
+from typing import Any, Callable, Iterable, Iterator
+import zlib
+
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order
+from pay.payment import PaymentProcessor, PaymentResult, attempt_payment
+
+ProcessorFactory = Callable[[], PaymentProcessor]
+
+# How often the parent checks that its workers are still alive while it waits for results.
+POLL_INTERVAL = 1.0
+
+
+class ShardWorkerError(Exception):
+    """A shard worker died or a payment raised an unexpected exception.
+
+    unknown lists the input positions of the payments whose outcome is unknown: the
+    ones that raised, or, when a worker died, every payment in flight without a
+    result. results maps the input positions of the payments that did complete, but
+    were not yielded because of the failure, to their results; their orders are
+    marked as paid as usual. In-flight payments in neither were never attempted.
+    """
+
+    def __init__(self, message: str, unknown: Iterable[int] = (), results: dict[int, PaymentResult] | None = None) -> None:
+        super().__init__(message)
+        self.unknown = sorted(unknown)
+        self.results = results or {}
+
+
+def shard_of(card: CreditCard, shards: int) -> int:
+    """Returns the shard of a card; the same card number always maps to the same shard."""
+    return zlib.crc32(str(card.number).encode()) % shards
+
+
+def default_processor() -> PaymentProcessor:
+    """Creates a PaymentProcessor with the API key from the settings."""
+    from pay.processor import PaymentProcessor as Processor
+    from pay.settings import get_settings
+
+    return Processor(get_settings().api_key)
+
+
+def _pack(seq: int, order: Order, card: CreditCard) -> tuple:
+    # Plain tuples pickle and unpickle far faster than Order and LineItem objects.
+    items = tuple((item.name, item.price, item.quantity) for item in order.line_items)
+    return seq, items, (card.number, card.expiry_month, card.expiry_year), order.currency
+
+
+def _unpack(items: tuple, card: tuple, currency: str) -> tuple[Order, CreditCard]:
+    return Order([LineItem(*item) for item in items], currency=currency), CreditCard(*card)
+
+
+def _work(shard: int, processor_factory: ProcessorFactory, tasks: Any, results: Any) -> None:
+    processor = processor_factory()
+    failed = False
+    while (chunk := tasks.get()) is not None:
+        block, payments = chunk
+        paid = []
+        failure = None
+        if failed:
+            # After an unexpected error nothing more is attempted, so every payment
+            # after it is known not to be charged.
+            payments = []
+        for seq, items, card, currency in payments:
+            try:
+                paid.append((seq, attempt_payment(*_unpack(items, card, currency), processor)))
+            except Exception as e:
+                failure = (seq, repr(e))
+                failed = True
+                break
+        results.put((shard, block, paid, failure))
+
+
+def pay_orders_sharded(
+    payments: Iterable[tuple[Order, CreditCard]],
+    shards: int | None = None,
+    processor_factory: ProcessorFactory = default_processor,
+    block_size: int = 1_024,
+    context: BaseContext | None = None,
+) -> list[PaymentResult]:
+    """Pay for many orders on one worker process per shard and return the results in input order.
+
+    Args:
+        payments (Iterable[tuple[Order, CreditCard]]): The orders and the cards to pay them with.
+        shards (int | None): The number of shards and worker processes, by default one per CPU.
+        processor_factory (Callable[[], PaymentProcessor]): Creates the processor of each worker;
+            must be picklable when the processes are spawned.
+        block_size (int): The number of payments split across the shards at a time.
+        context (BaseContext | None): The multiprocessing context, by default the platform's.
+
+    Raises:
+        ValueError: If shards or block_size is not positive.
+        ShardWorkerError: If a worker process dies or a payment raises an unexpected
+            exception; it lists the payments whose outcome is unknown.
+
+    Returns:
+        list[PaymentResult]: The result of every payment, in the order they were given.
+    """
+    return list(iter_pay_orders_sharded(payments, shards, processor_factory, block_size, context))
+
+
+def iter_pay_orders_sharded(
+    payments: Iterable[tuple[Order, CreditCard]],
+    shards: int | None = None,
+    processor_factory: ProcessorFactory = default_processor,
+    block_size: int = 1_024,
+    context: BaseContext | None = None,
+) -> Iterator[PaymentResult]:
+    """Lazy version of pay_orders_sharded, yielding the results of each block as it completes.
+
+    The input is read block_size payments at a time and every block is split into one
+    message per shard. At most two blocks are in flight, so the workers always have
+    the next block queued while the results of the previous one are merged back into
+    input order, and memory use does not grow with the size of the input. Orders that
+    were charged successfully are marked as paid in the calling process.
+
+    When a payment raises an unexpected exception, its worker stops attempting
+    payments, everything already sent to the workers is waited for and settled, and
+    ShardWorkerError reports which payments have an unknown outcome.
+    """
+    if shards is None:
+        shards = os.cpu_count() or 1
+    if shards < 1:
+        raise ValueError("shards must be at least 1.")
+    if block_size < 1:
+        raise ValueError("block_size must be at least 1.")
+    context = context or multiprocessing.get_context()
+
+    tasks = [context.Queue() for _ in range(shards)]
+    results = context.Queue()
+    workers = [
+        context.Process(target=_work, args=(shard, processor_factory, tasks[shard], results), daemon=True)
+        for shard in range(shards)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # block number -> (orders of the block, results by position, shards still working on it)
+    in_flight: dict[int, tuple[list[Order], list[PaymentResult | None], int]] = {}
+    # (block, position in the block, error) of every payment that raised
+    failures: list[tuple[int, int, str]] = []
+
+    def abort(message: str, unknown: Iterable[int]) -> ShardWorkerError:
+        completed = {}
+        for block, (orders, block_results, _) in in_flight.items():
+            for seq, (order, result) in enumerate(zip(orders, block_results)):
+                if result is not None:
+                    if result.paid:
+                        order.pay()
+                    completed[block * block_size + seq] = result
+        in_flight.clear()
+        return ShardWorkerError(message, unknown, completed)
+
+    def receive() -> None:
+        while True:
+            try:
+                shard, block, paid, failure = results.get(timeout=POLL_INTERVAL)
+                break
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in workers):
+                    unknown = [
+                        block * block_size + seq
+                        for block, (_, block_results, _) in in_flight.items()
+                        for seq, result in enumerate(block_results) if result is None
+                    ]
+                    raise abort("A shard worker exited unexpectedly.", unknown) from None
+        orders, block_results, remaining = in_flight[block]
+        for seq, result in paid:
+            block_results[seq] = result
+        in_flight[block] = (orders, block_results, remaining - 1)
+        if failure is not None:
+            failures.append((block, *failure))
+
+    def complete(block: int) -> Iterator[PaymentResult]:
+        while in_flight[block][2]:
+            receive()
+            if failures:
+                # Waits for everything already sent to the workers, so every charge that
+                # went through is settled before the error is raised.
+                while any(remaining for _, _, remaining in in_flight.values()):
+                    receive()
+                first_block, first_seq, error = failures[0]
+                raise abort(
+                    f"Payment {first_block * block_size + first_seq} failed: {error}",
+                    [failed_block * block_size + seq for failed_block, seq, _ in failures],
+                )
+        orders, block_results, _ = in_flight.pop(block)
+        for order, result in zip(orders, block_results):
+            if result.paid:
+                order.pay()
+            yield result
+
+    try:
+        iterator = iter(payments)
+        block = 0
+        while True:
+            orders = []
+            by_shard: dict[int, list[tuple]] = defaultdict(list)
+            for seq, (order, card) in zip(range(block_size), iterator):
+                orders.append(order)
+                by_shard[shard_of(card, shards)].append(_pack(seq, order, card))
+            if not orders:
+                break
+            in_flight[block] = (orders, [None] * len(orders), len(by_shard))
+            for shard, shard_payments in by_shard.items():
+                tasks[shard].put((block, shard_payments))
+            if block - 1 in in_flight:
+                yield from complete(block - 1)
+            block += 1
+        if block - 1 in in_flight:
+            yield from complete(block - 1)
+    finally:
+        for task_queue in tasks:
+            task_queue.put(None)
+        for worker in workers:
+            worker.join(timeout=POLL_INTERVAL)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
@@ -0,0 +1,306 @@
+"""Deterministic synthetic cards and orders for load and capacity tests.
+
+Everything is drawn from seeded NumPy generators in fixed-size chunks, so a
+given seed and configuration always produce the same cards and orders, however
+they are consumed. Card numbers are built and checksummed a whole chunk at a time,
+which is what makes millions of cards per second possible; Python objects are
+only created when they are asked for.
+
+    python -m pay.synth orders.jsonl --orders 100000 --seed 7
+    python -m pay.synth cards.bin --cards 1000000 --invalid-luhn-rate 0.01
+"""
+import argparse
+import csv
+from dataclasses import dataclass
+from datetime import date
+import itertools
+import json
+from pathlib import Path
+from typing import IO, Iterator, Literal, Sequence
+
+import numpy as np
+
+from pay.batch import DOUBLED_DIGIT_SUM
+from pay.card_batch import MAX_DIGITS, RECORD_DTYPE, write_card_records
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order
+from pay.pipeline import CSV_FIELDS, OrderRecord
+
+CHUNK_SIZE = 65_536
+
+# 16 digit Visa, Mastercard and Discover prefixes.
+DEFAULT_PREFIXES = ("4", "51", "52", "53", "54", "55", "2221", "6011", "65")
+
+CATALOG = tuple(
+    f"{color} {thing}"
+    for color, thing in itertools.product(
+        ("Red", "Blue", "Black", "White", "Green", "Grey", "Yellow", "Pink"),
+        ("Shoes", "Hat", "Shirt", "Socks", "Scarf", "Jacket", "Bag", "Belt", "Mug", "Lamp", "Book", "Pen"),
+    )
+)
+
+
+@dataclass(slots=True)
+class CardChunk:
+    """A chunk of generated cards as columns."""
+    numbers: np.ndarray  # fixed-width byte strings, e.g. dtype S16
+    months: np.ndarray
+    years: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def cards(self) -> list[CreditCard]:
+        numbers = self.numbers.astype(f"U{self.numbers.dtype.itemsize}").tolist()
+        return [CreditCard(*card) for card in zip(numbers, self.months.tolist(), self.years.tolist())]
+
+
+@dataclass(slots=True)
+class OrderChunk:
+    """A chunk of generated orders as columns; the items of order i are offsets[i]:offsets[i + 1]."""
+    cards: CardChunk
+    offsets: np.ndarray
+    names: np.ndarray
+    prices: np.ndarray
+    quantities: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+
+class Synthesizer:
+    """Generates cards and orders from a seed.
+
+    Args:
+        seed (int): The seed; the same seed and settings give the same output.
+        length (int): The number of digits of a card number, check digit included.
+        prefixes (Sequence[str]): Issuer prefixes, picked uniformly per card.
+        invalid_luhn_rate (float): Share of cards whose check digit is deliberately wrong.
+        invalid_month_rate (float): Share of cards with expiry month 0 or 13.
+        expired_rate (float): Share of cards that expired before today.
+        items (str): Distribution of the number of line items per order: "fixed",
+            "poisson" or "geometric", all at least 1 and with mean about mean_items.
+        mean_items (float): The mean number of line items per order.
+        max_items (int): The most line items an order can have.
+        median_price (int): The median line item price in cents; prices are log-normal.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        length: int = 16,
+        prefixes: Sequence[str] = DEFAULT_PREFIXES,
+        invalid_luhn_rate: float = 0.0,
+        invalid_month_rate: float = 0.0,
+        expired_rate: float = 0.0,
+        items: Literal["fixed", "poisson", "geometric"] = "geometric",
+        mean_items: float = 3.0,
+        max_items: int = 50,
+        median_price: int = 20_00,
+        today: date | None = None,
+    ) -> None:
+        if not 2 <= length <= MAX_DIGITS:
+            raise ValueError(f"Card numbers must have 2 to {MAX_DIGITS} digits.")
+        if not prefixes or any(not p.isdigit() or len(p) >= length for p in prefixes):
+            raise ValueError("Prefixes must be digits and shorter than the card number.")
+        if items not in ("fixed", "poisson", "geometric"):
+            raise ValueError(f"Unknown items distribution {items!r}, expected 'fixed', 'poisson' or 'geometric'.")
+        if mean_items < 1 or max_items < 1:
+            raise ValueError("Orders must have at least one line item.")
+        seeds = np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(seeds)
+        # Amounts come from their own stream, so card records hold the same cards as card_numbers().
+        self._amount_rng = np.random.default_rng(seeds.spawn(1)[0])
+        self.length = length
+        self.prefixes = [np.frombuffer(p.encode(), np.uint8) - ord("0") for p in prefixes]
+        self.invalid_luhn_rate = invalid_luhn_rate
+        self.invalid_month_rate = invalid_month_rate
+        self.expired_rate = expired_rate
+        self.items = items
+        self.mean_items = mean_items
+        self.max_items = max_items
+        self.median_price = median_price
+        self.today = today or date.today()
+        # Whether each digit of the payload is doubled, counted from the check digit.
+        positions = length - 1 - np.arange(length - 1)
+        self._doubled = positions % 2 == 1
+
+    def card_digits(self, count: int) -> np.ndarray:
+        """Returns a (count, length) matrix of card number digits with valid or broken check digits."""
+        rng = self.rng
+        digits = rng.integers(0, 10, size=(count, self.length), dtype=np.uint8)
+        choice = rng.integers(0, len(self.prefixes), size=count)
+        for i, prefix in enumerate(self.prefixes):
+            digits[choice == i, :len(prefix)] = prefix
+        payload = digits[:, :-1]
+        checksum = np.where(self._doubled, DOUBLED_DIGIT_SUM[payload], payload).sum(axis=1)
+        check = (10 - checksum % 10) % 10
+        if self.invalid_luhn_rate:
+            broken = rng.random(count) < self.invalid_luhn_rate
+            check[broken] = (check[broken] + rng.integers(1, 10, size=int(broken.sum()))) % 10
+        digits[:, -1] = check
+        return digits
+
+    def card_chunk(self, count: int) -> CardChunk:
+        """Generates count cards as columns."""
+        rng = self.rng
+        numbers = (self.card_digits(count) + ord("0")).view(f"S{self.length}").reshape(count)
+        months = rng.integers(1, 13, size=count, dtype=np.uint8)
+        years = (self.today.year + rng.integers(1, 6, size=count)).astype(np.uint16)
+        if self.expired_rate:
+            expired = rng.random(count) < self.expired_rate
+            years[expired] = self.today.year - rng.integers(1, 4, size=int(expired.sum()))
+        if self.invalid_month_rate:
+            invalid = rng.random(count) < self.invalid_month_rate
+            months[invalid] = rng.choice(np.array([0, 13], dtype=np.uint8), size=int(invalid.sum()))
+        return CardChunk(numbers, months, years)
+
+    def order_chunk(self, count: int) -> OrderChunk:
+        """Generates count orders, with their cards, as columns."""
+        rng = self.rng
+        cards = self.card_chunk(count)
+        if self.items == "fixed":
+            sizes = np.full(count, round(self.mean_items))
+        elif self.items == "poisson":
+            sizes = 1 + rng.poisson(self.mean_items - 1, size=count)
+        else:
+            sizes = rng.geometric(1 / self.mean_items, size=count)
+        sizes = np.clip(sizes, 1, self.max_items)
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        total = int(offsets[-1])
+        names = rng.integers(0, len(CATALOG), size=total)
+        prices = np.maximum(1, rng.lognormal(np.log(self.median_price), 1.0, size=total)).astype(np.int64)
+        quantities = np.minimum(rng.geometric(0.7, size=total), 10)
+        return OrderChunk(cards, offsets, names, prices, quantities)
+
+    def _chunks(self, count: int, make) -> Iterator:
+        for start in range(0, count, CHUNK_SIZE):
+            yield make(min(CHUNK_SIZE, count - start))
+
+    def card_chunks(self, count: int) -> Iterator[CardChunk]:
+        """Generates count cards in chunks of up to CHUNK_SIZE."""
+        return self._chunks(count, self.card_chunk)
+
+    def order_chunks(self, count: int) -> Iterator[OrderChunk]:
+        """Generates count orders in chunks of up to CHUNK_SIZE."""
+        return self._chunks(count, self.order_chunk)
+
+    def card_numbers(self, count: int) -> Iterator[str]:
+        """Streams count card numbers as strings."""
+        for chunk in self.card_chunks(count):
+            yield from chunk.numbers.astype(f"U{self.length}").tolist()
+
+    def cards(self, count: int) -> Iterator[CreditCard]:
+        """Streams count CreditCards."""
+        for chunk in self.card_chunks(count):
+            yield from chunk.cards()
+
+    def orders(self, count: int) -> Iterator[OrderRecord]:
+        """Streams count orders with their cards, numbered from 1, as the pipeline reads them."""
+        order_id = itertools.count(1)
+        for chunk in self.order_chunks(count):
+            names = [CATALOG[name] for name in chunk.names.tolist()]
+            prices, quantities = chunk.prices.tolist(), chunk.quantities.tolist()
+            offsets = chunk.offsets.tolist()
+            for i, card in enumerate(chunk.cards.cards()):
+                items = range(offsets[i], offsets[i + 1])
+                order = Order([LineItem(names[j], prices[j], quantities[j]) for j in items])
+                yield OrderRecord(str(next(order_id)), order, card)
+
+    def card_record_chunks(self, count: int, max_amount: int = 500_00) -> Iterator[np.ndarray]:
+        """Generates count cards with amounts as card batch records, in chunks of up to CHUNK_SIZE."""
+        for cards in self.card_chunks(count):
+            records = np.zeros(len(cards), dtype=RECORD_DTYPE)
+            records["length"] = self.length
+            records["number"][:, :self.length] = cards.numbers.view(np.uint8).reshape(len(cards), self.length)
+            records["expiry_month"] = cards.months
+            records["expiry_year"] = cards.years
+            records["amount"] = self._amount_rng.integers(1, max_amount + 1, size=len(cards))
+            yield records
+
+    def card_records(self, count: int, max_amount: int = 500_00) -> np.ndarray:
+        """Generates count cards with amounts as card batch records."""
+        records = np.empty(count, dtype=RECORD_DTYPE)
+        start = 0
+        for chunk in self.card_record_chunks(count, max_amount):
+            records[start:start + len(chunk)] = chunk
+            start += len(chunk)
+        return records
+
+
+def write_jsonl(synthesizer: Synthesizer, count: int, file: IO[str]) -> int:
+    """Writes count orders in the pipeline's JSONL input format, straight from the columns."""
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    names = [encode(name) for name in CATALOG]
+    order_id = 0
+    for chunk in synthesizer.order_chunks(count):
+        numbers = chunk.cards.numbers.astype(f"U{synthesizer.length}").tolist()
+        months, years = chunk.cards.months.tolist(), chunk.cards.years.tolist()
+        items = [
+            f'{{"name":{names[n]},"price":{p},"quantity":{q}}}'
+            for n, p, q in zip(chunk.names.tolist(), chunk.prices.tolist(), chunk.quantities.tolist())
+        ]
+        offsets = chunk.offsets.tolist()
+        lines = []
+        for i in range(len(chunk)):
+            order_id += 1
+            lines.append(
+                f'{{"order_id":"{order_id}","card":{{"number":"{numbers[i]}","expiry_month":{months[i]},'
+                f'"expiry_year":{years[i]}}},"line_items":[{",".join(items[offsets[i]:offsets[i + 1]])}]}}\n'
+            )
+        file.write("".join(lines))
+    return order_id
+
+
+def write_csv(synthesizer: Synthesizer, count: int, file: IO[str]) -> int:
+    """Writes count orders in the pipeline's CSV input format, one row per line item."""
+    writer = csv.writer(file)
+    writer.writerow(CSV_FIELDS)
+    order_id = 0
+    for chunk in synthesizer.order_chunks(count):
+        numbers = chunk.cards.numbers.astype(f"U{synthesizer.length}").tolist()
+        months, years = chunk.cards.months.tolist(), chunk.cards.years.tolist()
+        names, prices, quantities = chunk.names.tolist(), chunk.prices.tolist(), chunk.quantities.tolist()
+        offsets = chunk.offsets.tolist()
+        for i in range(len(chunk)):
+            order_id += 1
+            writer.writerows(
+                (order_id, numbers[i], months[i], years[i], CATALOG[names[j]], prices[j], quantities[j])
+                for j in range(offsets[i], offsets[i + 1])
+            )
+    return order_id
+
+
+def write_card_batch(synthesizer: Synthesizer, count: int, path: str | Path) -> int:
+    """Writes count cards with amounts as a card batch file, a chunk at a time."""
+    return write_card_records(path, synthesizer.card_record_chunks(count))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic orders or cards.")
+    parser.add_argument("output", type=Path, help=".jsonl or .csv for orders, .bin for a card batch")
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--cards", type=int, default=10_000, help="records in a card batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--items", choices=["fixed", "poisson", "geometric"], default="geometric")
+    parser.add_argument("--mean-items", type=float, default=3.0)
+    parser.add_argument("--invalid-luhn-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-month-rate", type=float, default=0.0)
+    parser.add_argument("--expired-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    synthesizer = Synthesizer(
+        args.seed, items=args.items, mean_items=args.mean_items, invalid_luhn_rate=args.invalid_luhn_rate,
+        invalid_month_rate=args.invalid_month_rate, expired_rate=args.expired_rate,
+    )
+    if args.output.suffix == ".bin":
+        print(f"{write_card_batch(synthesizer, args.cards, args.output)} cards written to {args.output}")
+        return
+    write = write_csv if args.output.suffix == ".csv" else write_jsonl
+    with args.output.open("w", newline="") as file:
+        print(f"{write(synthesizer, args.orders, file)} orders written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from typing import Iterator
+import pytest
+from pay.events import MemoryEventSink, set_event_sink
+
+
+@pytest.fixture(autouse=True)
+def event_sink() -> Iterator[MemoryEventSink]:
+    """Collects the events of every test instead of writing them to stdout."""
+    sink = MemoryEventSink()
+    set_event_sink(sink)
+    yield sink
+    set_event_sink(None)
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import time
+import pytest
+from pay.aggregator import ChargeAggregator
+from pay.credit_card import CreditCard
+from pay.events import MemoryEventSink, set_event_sink
+from pay.money import Money
+from pay.order import LineItem, Order, OrderStatus
+from pay.payment import PaymentStatus
+
+YEAR = date.today().year + 2
+
+
+class RecordingProcessor:
+    """Records every charge and declines cards numbered "declined"."""
+
+    def __init__(self) -> None:
+        self.charges: list[tuple[str, int]] = []
+        self.currencies: list[str] = []
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        if card.number == "declined":
+            raise ValueError("Card declined")
+
+    def charge(self, card: CreditCard, amount: Money) -> None:
+        if card.number == "broken":
+            raise RuntimeError("gateway exploded")
+        self.charges.append((card.number, amount.amount))
+        self.currencies.append(amount.currency)
+
+
+@pytest.fixture(autouse=True)
+def sink():
+    sink = MemoryEventSink()
+    set_event_sink(sink)
+    yield sink
+    set_event_sink(None)
+
+
+def order(price: int) -> Order:
+    return Order([LineItem(name="Coke", price=price)])
+
+
+def test_orders_with_the_same_card_share_one_charge() -> None:
+    """Test that a full batch is charged once for the combined total and every order is paid."""
+    processor = RecordingProcessor()
+    card = CreditCard("1249190007575069", 12, YEAR)
+    orders = [order(100), order(200), order(300)]
+    with ChargeAggregator(processor, max_wait=10, max_orders=3) as aggregator:
+        futures = [aggregator.submit(o, card) for o in orders]
+        results = [future.result(timeout=1) for future in futures]
+    assert processor.charges == [("1249190007575069", 600)]
+    assert [result.amount for result in results] == [100, 200, 300]
+    assert all(result.status == PaymentStatus.PAID for result in results)
+    assert all(o.status == OrderStatus.PAID for o in orders)
+    assert aggregator.stats.orders == 3 and aggregator.stats.charges == 1
+
+
+def test_batch_is_charged_after_max_wait() -> None:
+    """Test that an open batch is charged by the background thread once max_wait has passed."""
+    processor = RecordingProcessor()
+    with ChargeAggregator(processor, max_wait=0.02, max_orders=100) as aggregator:
+        start = time.perf_counter()
+        result = aggregator.pay(order(100), CreditCard("1249190007575069", 12, YEAR))
+        assert time.perf_counter() - start < 1
+    assert result.paid
+    assert processor.charges == [("1249190007575069", 100)]
+
+
+def test_batches_are_per_card_and_respect_max_amount() -> None:
+    """Test that cards are batched separately and a batch never goes over max_amount."""
+    processor = RecordingProcessor()
+    card_a, card_b = CreditCard("a", 12, YEAR), CreditCard("b", 12, YEAR)
+    with ChargeAggregator(processor, max_wait=10, max_orders=100, max_amount=500) as aggregator:
+        for price, card in [(200, card_a), (100, card_b), (200, card_a), (200, card_a)]:
+            aggregator.submit(order(price), card)
+    assert sorted(processor.charges) == [("a", 200), ("a", 400), ("b", 100)]
+
+
+def test_batches_are_per_currency() -> None:
+    """Test that orders in different currencies on the same card are never charged together."""
+    processor = RecordingProcessor()
+    card = CreditCard("a", 12, YEAR)
+    with ChargeAggregator(processor, max_wait=10, max_orders=100) as aggregator:
+        for price, currency in [(100, "USD"), (1200, "JPY"), (200, "USD")]:
+            aggregator.submit(Order([LineItem(name="Coke", price=price)], currency=currency), card)
+    assert sorted(zip(processor.charges, processor.currencies)) == [(("a", 300), "USD"), (("a", 1200), "JPY")]
+
+
+def test_batch_fails_together() -> None:
+    """Test that a declined batch fails every order with the same message."""
+    orders = [order(100), order(200)]
+    with ChargeAggregator(RecordingProcessor(), max_wait=10, max_orders=2) as aggregator:
+        futures = [aggregator.submit(o, CreditCard("declined", 12, YEAR)) for o in orders]
+    results = [future.result() for future in futures]
+    assert [result.status for result in results] == [PaymentStatus.FAILED, PaymentStatus.FAILED]
+    assert {result.message for result in results} == {"Card declined"}
+    assert all(o.status == OrderStatus.OPEN for o in orders)
+
+
+def test_unexpected_error_reaches_every_order() -> None:
+    """Test that an unexpected processor error is raised from every future of the batch."""
+    with ChargeAggregator(RecordingProcessor(), max_wait=10, max_orders=2) as aggregator:
+        futures = [aggregator.submit(order(100), CreditCard("broken", 12, YEAR)) for _ in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=1)
+
+
+def test_concurrent_submissions_are_all_settled() -> None:
+    """Test that orders submitted from many threads are all paid exactly once."""
+    processor = RecordingProcessor()
+    cards = [CreditCard(str(i), 12, YEAR) for i in range(5)]
+    with ChargeAggregator(processor, max_wait=0.01, max_orders=7) as aggregator:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda i: aggregator.pay(order(100), cards[i % 5]), range(200)))
+    assert all(result.paid for result in results)
+    assert sum(amount for _, amount in processor.charges) == 200 * 100
+    assert aggregator.stats.charges == len(processor.charges) < 200
+
+
+def test_empty_order_and_closed_aggregator() -> None:
+    """Test that an empty order fails at once and a closed aggregator takes no more orders."""
+    aggregator = ChargeAggregator(RecordingProcessor())
+    assert aggregator.submit(Order(), CreditCard("a", 12, YEAR)).result().status == PaymentStatus.FAILED
+    aggregator.close()
+    with pytest.raises(ValueError):
+        aggregator.submit(order(100), CreditCard("a", 12, YEAR))
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from pay.batch import luhn_checksum_batch
+from pay.processor import luhn_checksum
+
+CARD_NUMBERS = ["1249190007575069", "4111111111111111", "1234", "79927398713", "0", "", "5555555555554444"]
+
+
+def test_luhn_checksum_batch_matches_scalar() -> None:
+    """Test that the batch Luhn check agrees with luhn_checksum for mixed lengths."""
+    expected = [luhn_checksum(number) for number in CARD_NUMBERS]
+    assert luhn_checksum_batch(CARD_NUMBERS).tolist() == expected
+
+
+def test_luhn_checksum_batch_accepts_bytes_array() -> None:
+    """Test that a NumPy array of byte strings is validated like a list of str."""
+    numbers = np.array([number.encode() for number in CARD_NUMBERS])
+    assert luhn_checksum_batch(numbers).tolist() == luhn_checksum_batch(CARD_NUMBERS).tolist()
+
+
+def test_luhn_checksum_batch_empty() -> None:
+    """Test that an empty batch returns an empty mask."""
+    assert luhn_checksum_batch([]).shape == (0,)
+
+
+def test_luhn_checksum_batch_rejects_non_digits() -> None:
+    """Test that a ValueError is raised when a card number contains a non-digit."""
+    with pytest.raises(ValueError):
+        luhn_checksum_batch(["1249190007575069", "1249-1900"])
@@ -0,0 +1,80 @@
+import io
+import random
+import threading
+import pytest
+from pay.bin_index import NETWORK_RANGES, BinIndex, BinInfo, BinRange, detect_network, read_csv, write_csv
+
+
+@pytest.mark.parametrize("number, network", [
+    ("4111111111111111", "visa"),
+    ("5500000000000004", "mastercard"),
+    ("2221000000000009", "mastercard"),
+    ("378282246310005", "amex"),
+    ("6011000990139424", "discover"),
+    ("3530111333300000", "jcb"),
+    ("1249190007575069", None),
+    ("4111", None),
+    ("4111-1111-1111-1111", None),
+])
+def test_detect_network(number: str, network: str | None) -> None:
+    """Test that the major networks are recognised and anything else is not."""
+    assert detect_network(number) == network
+
+
+def test_narrowest_range_wins() -> None:
+    """Test that an issuer range inside a network range takes precedence only within its bounds."""
+    index = BinIndex(NETWORK_RANGES + [BinRange("457173", "457174", "visa", "Bank A"), BinRange("45717360", "45717360", "visa", "Bank B")])
+    assert index.lookup("4571736012345678") == BinInfo("visa", "Bank B")
+    assert index.lookup("4571736112345678") == BinInfo("visa", "Bank A")
+    assert index.lookup("4571749999999999") == BinInfo("visa", "Bank A")
+    assert index.lookup("4571750000000000") == BinInfo("visa")
+
+
+def test_lookup_many_matches_lookup() -> None:
+    """Test that the batch lookup agrees with single lookups on random ranges and numbers."""
+    rng = random.Random(7)
+    ranges = []
+    for i in range(2_000):
+        low = rng.randrange(10 ** 5, 10 ** 6 - 100)
+        ranges.append(BinRange(str(low), str(low + rng.randrange(100)), f"network-{i % 7}", f"issuer-{i}"))
+    index = BinIndex(ranges)
+    numbers = [str(rng.randrange(10 ** 15, 10 ** 16)) for _ in range(5_000)] + ["", "12", "x" * 16]
+    assert index.lookup_many(numbers) == [index.lookup(number) for number in numbers]
+    assert BinIndex([]).lookup_many(numbers[:3]) == [None, None, None]
+
+
+def test_invalid_ranges_are_rejected() -> None:
+    """Test that ranges with non-digits, too many digits or reversed bounds are rejected."""
+    for low, high in [("4a", "4a"), ("123456789", "123456789"), ("55", "51")]:
+        with pytest.raises(ValueError):
+            BinIndex([BinRange(low, high, "x")])
+
+
+def test_csv_round_trip() -> None:
+    """Test that ranges written to CSV are read back unchanged."""
+    file = io.StringIO()
+    write_csv(NETWORK_RANGES, file)
+    file.seek(0)
+    assert read_csv(file) == NETWORK_RANGES
+    file.seek(0)
+    assert BinIndex.from_csv(file).lookup("4111111111111111") == BinInfo("visa")
+
+
+def test_reload_does_not_disturb_readers() -> None:
+    """Test that lookups running during reloads always see either the old or the new table."""
+    index = BinIndex([BinRange("4", "4", "old")])
+    seen = set()
+    stop = threading.Event()
+
+    def read() -> None:
+        while not stop.is_set():
+            seen.add(index.lookup("4111111111111111"))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(50):
+        index.reload([BinRange("4", "4", "new" if i % 2 else "old")])
+    stop.set()
+    reader.join()
+    assert seen <= {BinInfo("old"), BinInfo("new")}
+    assert len(index) == 1
@@ -0,0 +1,73 @@
+from datetime import date
+import pytest
+from pay.bulk import BulkPaymentError, pay_orders
+from pay.credit_card import CreditCard
+from pay.order import Order, LineItem, OrderStatus
+from pay.payment import PaymentStatus, InvalidMonthError, CardExpiredError
+
+
+class PaymentProcessorMock:
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        if card.number == "declined":
+            raise ValueError("Card declined")
+        if card.number == "explodes":
+            raise RuntimeError("gateway timed out after charging")
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        if not 1 <= month <= 12:
+            raise InvalidMonthError("Invalid expiry month. Month must be in the range of 1 to 12.")
+        if date.today() > date(year, month, 1):
+            raise CardExpiredError("Card has expired")
+
+
+def make_payments() -> list[tuple[Order, CreditCard]]:
+    year = date.today().year + 2
+    cards = [
+        CreditCard("1249190007575069", 12, year),
+        CreditCard("1249190007575069", 12, date.today().year - 1),
+        CreditCard("1249190007575069", 15, year),
+        CreditCard("declined", 12, year),
+    ]
+    return [(Order([LineItem(name="Coke", price=300)]), card) for card in cards]
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_pay_orders_results_in_input_order(pool: str) -> None:
+    """Test that every order gets a result, in input order, for both pool kinds."""
+    payments = make_payments()
+    results = pay_orders(payments, PaymentProcessorMock(), max_workers=2, pool=pool)
+    assert [result.status for result in results] == [
+        PaymentStatus.PAID, PaymentStatus.EXPIRED, PaymentStatus.INVALID_MONTH, PaymentStatus.FAILED,
+    ]
+    assert [order.status for order, _ in payments] == [
+        OrderStatus.PAID, OrderStatus.OPEN, OrderStatus.OPEN, OrderStatus.OPEN,
+    ]
+    assert results[3].message == "Card declined"
+
+
+def test_pay_orders_empty_order_fails() -> None:
+    """Test that an order with total 0 is reported as failed instead of raising."""
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    [result] = pay_orders([(Order(), card)], PaymentProcessorMock())
+    assert result.status == PaymentStatus.FAILED
+
+
+def test_pay_orders_invalid_max_workers() -> None:
+    """Test that a ValueError is raised when max_workers is not positive."""
+    with pytest.raises(ValueError):
+        pay_orders(make_payments(), PaymentProcessorMock(), max_workers=0)
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_unexpected_error_settles_the_payments_in_flight(pool: str) -> None:
+    """Test that a payment raising mid-batch reports its position and still settles every completed payment."""
+    year = date.today().year + 2
+    cards = ["1249190007575069", "1249190007575069", "explodes", "1249190007575069", "1249190007575069", "1249190007575069"]
+    payments = [(Order([LineItem(name="Coke", price=300)]), CreditCard(number, 12, year)) for number in cards]
+    with pytest.raises(BulkPaymentError) as error:
+        pay_orders(payments, PaymentProcessorMock(), max_workers=2, pool=pool)
+    assert error.value.unknown == [2]
+    assert sorted(error.value.results) == [3, 4, 5]
+    assert all(result.paid for result in error.value.results.values())
+    assert [order.status for order, _ in payments] == [OrderStatus.PAID] * 2 + [OrderStatus.OPEN] + [OrderStatus.PAID] * 3
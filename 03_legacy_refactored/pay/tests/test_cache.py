@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import time
+import pytest
+from pay.cache import CachingPaymentProcessor
+from pay.credit_card import CreditCard
+from pay.payment import InvalidMonthError
+from pay.processor import CardValidation
+
+
+class CountingProcessor:
+
+    def __init__(self) -> None:
+        self.validations = 0
+        self.charges = 0
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> bool:
+        self.validations += 1
+        if not 1 <= month <= 12:
+            raise InvalidMonthError("Invalid expiry month. Month must be in the range of 1 to 12.")
+        return True
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        self.charges += 1
+
+
+class FakeClock:
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def card() -> CreditCard:
+    return CreditCard("1249190007575069", 12, date.today().year + 2)
+
+
+def test_cache_hit_skips_processor(card: CreditCard) -> None:
+    """Test that validating the same card twice only reaches the processor once."""
+    processor = CountingProcessor()
+    cache = CachingPaymentProcessor(processor)
+    assert cache.validate_card(card, card.expiry_month, card.expiry_year)
+    assert cache.validate_card(card, card.expiry_month, card.expiry_year)
+    assert processor.validations == 1
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_cache_does_not_store_card_number(card: CreditCard) -> None:
+    """Test that the raw card number is not used as a cache key."""
+    cache = CachingPaymentProcessor(CountingProcessor())
+    cache.validate_card(card, card.expiry_month, card.expiry_year)
+    assert all(card.number.encode() not in key for key in cache._entries)
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    """Test that the least recently used entry is evicted when the cache is full."""
+    processor = CountingProcessor()
+    cache = CachingPaymentProcessor(processor, max_size=2)
+    year = date.today().year + 2
+    first, second, third = (CreditCard(number, 12, year) for number in ("1", "2", "3"))
+    cache.validate_card(first, 12, year)
+    cache.validate_card(second, 12, year)
+    cache.validate_card(first, 12, year)
+    cache.validate_card(third, 12, year)
+    assert cache.stats.evictions == 1
+    cache.validate_card(first, 12, year)
+    assert processor.validations == 3
+
+
+def test_cache_entry_expires_with_ttl_and_card_expiry() -> None:
+    """Test that entries expire after the ttl, and never after the card's expiry month starts."""
+    processor = CountingProcessor()
+    expiry = datetime(2030, 5, 1).timestamp()
+    clock = FakeClock(expiry - 100)
+    cache = CachingPaymentProcessor(processor, ttl=1_000, clock=clock)
+    card = CreditCard("1249190007575069", 5, 2030)
+    cache.validate_card(card, 5, 2030)
+    clock.now = expiry
+    cache.validate_card(card, 5, 2030)
+    assert processor.validations == 2
+    assert cache.stats.expirations == 1
+
+
+def test_cache_entry_expires_with_validation_token(card: CreditCard) -> None:
+    """Test that a cached CardValidation is never handed out after its own deadline."""
+    processor = CountingProcessor()
+    processor.validate_card = lambda card, month, year: CardValidation(time.monotonic() + 60, b"")
+    clock = FakeClock(1_000.0)
+    cache = CachingPaymentProcessor(processor, ttl=300, clock=clock)
+    first = cache.validate_card(card, card.expiry_month, card.expiry_year)
+    clock.now += 30
+    assert cache.validate_card(card, card.expiry_month, card.expiry_year) is first
+    clock.now += 31
+    assert cache.validate_card(card, card.expiry_month, card.expiry_year) is not first
+    assert cache.stats.expirations == 1
+
+
+def test_cache_does_not_store_failures(card: CreditCard) -> None:
+    """Test that a failed validation is raised every time."""
+    processor = CountingProcessor()
+    cache = CachingPaymentProcessor(processor)
+    for _ in range(2):
+        with pytest.raises(InvalidMonthError):
+            cache.validate_card(card, 13, card.expiry_year)
+    assert processor.validations == 2
+
+
+def test_cache_shared_between_threads(card: CreditCard) -> None:
+    """Test that the counters stay consistent when the cache is used from many threads."""
+    cache = CachingPaymentProcessor(CountingProcessor())
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: cache.validate_card(card, card.expiry_month, card.expiry_year), range(1_000)))
+    assert cache.stats.hits + cache.stats.misses == 1_000
+    assert len(cache) == 1
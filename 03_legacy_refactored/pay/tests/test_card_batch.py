@@ -0,0 +1,65 @@
+from datetime import datetime
+from pathlib import Path
+import pytest
+from pay import card_batch
+from pay.card_batch import (
+    CardBatch, EXPIRED, INVALID_MONTH, INVALID_NUMBER, VALID, validate_batch, write_card_batch,
+)
+from pay.clock import MonthClock
+from pay.credit_card import CreditCard
+
+CLOCK = MonthClock(lambda: datetime(2025, 6, 15).timestamp())
+
+RECORDS = [
+    (CreditCard("1249190007575069", 12, 2027), 500),
+    (CreditCard("1249190007575069", 13, 2027), 600),
+    (CreditCard("1249190007575069", 5, 2025), 700),
+    (CreditCard("1234", 12, 2027), 800),
+    (CreditCard("4111111111111111111", 1, 2026), 900),
+]
+
+
+@pytest.fixture
+def batch_path(tmp_path: Path) -> Path:
+    path = tmp_path / "cards.bin"
+    assert write_card_batch(path, RECORDS) == len(RECORDS)
+    return path
+
+
+def test_card_batch_round_trip(batch_path: Path) -> None:
+    """Test that cards and amounts read back from the mapped file match what was written."""
+    with CardBatch(batch_path) as batch:
+        assert len(batch) == len(RECORDS)
+        assert [(batch.card(i), batch.amount(i)) for i in range(len(batch))] == RECORDS
+
+
+def test_validate_batch(batch_path: Path) -> None:
+    """Test that every record gets the result validate_card would give it."""
+    with CardBatch(batch_path) as batch:
+        result = validate_batch(batch.records, CLOCK).tolist()
+    assert result == [VALID, INVALID_MONTH, EXPIRED, INVALID_NUMBER, INVALID_NUMBER]
+
+
+def test_validate_batch_in_chunks_with_a_corrupt_number(batch_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that chunked validation gives the same codes and a non-digit byte only fails its own record."""
+    monkeypatch.setattr(card_batch, "VALIDATE_CHUNK", 2)
+    with CardBatch(batch_path) as batch:
+        records = batch.records.copy()
+    records["number"][0, 3] = ord("x")
+    assert validate_batch(records, CLOCK).tolist() == [INVALID_NUMBER, INVALID_MONTH, EXPIRED, INVALID_NUMBER, INVALID_NUMBER]
+
+
+def test_write_card_batch_rejects_bad_numbers(tmp_path: Path) -> None:
+    """Test that card numbers that do not fit the format are rejected."""
+    with pytest.raises(ValueError):
+        write_card_batch(tmp_path / "cards.bin", [(CreditCard("1249-1900", 12, 2027), 500)])
+    with pytest.raises(ValueError):
+        write_card_batch(tmp_path / "cards.bin", [(CreditCard("1" * 20, 12, 2027), 500)])
+
+
+def test_card_batch_rejects_other_files(tmp_path: Path) -> None:
+    """Test that a file without the card batch header is not mapped."""
+    path = tmp_path / "cards.bin"
+    path.write_bytes(b"order_id,card_number\n")
+    with pytest.raises(ValueError):
+        CardBatch(path)
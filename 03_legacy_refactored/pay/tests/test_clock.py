@@ -0,0 +1,37 @@
+from datetime import datetime
+from pay.clock import MonthClock, pack_month
+
+
+class FakeTime:
+
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+        self.calls = 0
+
+    def __call__(self) -> float:
+        self.calls += 1
+        return self.now.timestamp()
+
+
+def test_month_clock_current_month() -> None:
+    """Test that the clock reports the packed year and month of its time source."""
+    clock = MonthClock(FakeTime(datetime(2025, 6, 15, 12, 30)))
+    assert clock.current_month() == pack_month(2025, 6)
+
+
+def test_month_clock_rolls_over() -> None:
+    """Test that the clock picks up a new month, including the turn of the year."""
+    time_source = FakeTime(datetime(2025, 12, 31, 23, 59, 59))
+    clock = MonthClock(time_source)
+    assert clock.current_month() == pack_month(2025, 12)
+    time_source.now = datetime(2026, 1, 1)
+    assert clock.current_month() == pack_month(2026, 1)
+
+
+def test_month_clock_is_expired() -> None:
+    """Test that a card expires once its expiry month has started."""
+    clock = MonthClock(FakeTime(datetime(2025, 6, 15)))
+    assert clock.is_expired(5, 2025)
+    assert clock.is_expired(6, 2025)
+    assert not clock.is_expired(7, 2025)
+    assert not clock.is_expired(1, 2026)
@@ -0,0 +1,107 @@
+import pickle
+import struct
+
+import pytest
+from pay.codec import HEADER, MAGIC, decode_orders, decode_payments, encode_orders, encode_payments
+from pay.credit_card import CreditCard
+from pay.order import LineItem, Order, OrderStatus
+from pay.synth import Synthesizer
+
+
+def make_orders() -> list[Order]:
+    paid = Order([LineItem(name="Coke", price=300, quantity=2)], currency="EUR")
+    paid.pay()
+    return [
+        Order([LineItem(name="Coke", price=300), LineItem(name="Crème brûlée", price=-50, quantity=3)]),
+        Order([]),
+        paid,
+        Order([LineItem(name="Server", price=2 ** 40, quantity=1)], OrderStatus.OPEN, "JPY"),
+    ]
+
+
+def test_round_trip_orders() -> None:
+    """Test that orders, their line items, statuses and currencies survive encoding."""
+    orders = make_orders()
+    assert decode_orders(encode_orders(orders)) == orders
+
+
+def test_round_trip_payments() -> None:
+    """Test that (order, card) pairs survive encoding, from bytes, bytearray and memoryview."""
+    records = list(Synthesizer(seed=3).orders(200))
+    payments = [(record.order, record.card) for record in records]
+    buffer = encode_payments(payments)
+    assert decode_payments(buffer) == payments
+    assert decode_payments(bytearray(buffer)) == payments
+    assert decode_payments(memoryview(buffer)) == payments
+    assert decode_orders(buffer) == [order for order, _ in payments]
+
+
+def test_empty_batch() -> None:
+    """Test that an empty batch encodes to a header and empty columns."""
+    assert decode_orders(encode_orders([])) == []
+    assert decode_payments(encode_payments([])) == []
+
+
+def test_smaller_than_pickle() -> None:
+    """Test that repeated names are stored once and small integers in narrow columns."""
+    orders = [Order([LineItem(name="Coke", price=300, quantity=2)]) for _ in range(1000)]
+    buffer = encode_orders(orders)
+    assert buffer.count(b"Coke") == 1
+    assert len(buffer) < 10 * len(orders)
+    assert len(buffer) < len(pickle.dumps(orders)) / 4
+
+
+def test_rejects_foreign_buffers() -> None:
+    """Test that other data, other versions and short buffers are rejected."""
+    buffer = encode_orders(make_orders())
+    with pytest.raises(ValueError, match="Not an encoded"):
+        decode_orders(b"PAY")
+    with pytest.raises(ValueError, match="Not an encoded"):
+        decode_orders(b"JUNK" + buffer[4:])
+    with pytest.raises(ValueError, match="version 99"):
+        decode_orders(MAGIC + bytes([99]) + buffer[5:])
+
+
+@pytest.mark.parametrize("cut", [HEADER.size, HEADER.size + 3, -1])
+def test_rejects_truncated_buffers(cut: int) -> None:
+    """Test that a buffer cut short anywhere raises ValueError rather than struct.error."""
+    buffer = encode_payments([(order, CreditCard("1249190007575069", 12, 2030)) for order in make_orders()])
+    with pytest.raises(ValueError, match="truncated"):
+        decode_payments(buffer[:cut])
+
+
+def test_rejects_corrupt_counts() -> None:
+    """Test that line item counts that do not add up are detected."""
+    buffer = bytearray(encode_orders(make_orders()))
+    string_count, order_count, item_count = struct.unpack_from("<III", buffer, 8)
+    struct.pack_into("<III", buffer, 8, string_count, order_count, item_count - 1)
+    with pytest.raises(ValueError):
+        decode_orders(buffer)
+
+
+@pytest.mark.parametrize("column", [0, 2])
+def test_rejects_signed_and_out_of_range_codes(column: int) -> None:
+    """Test that a negative or too large status or name index is corrupt instead of indexing from the end."""
+    original = encode_orders([Order([LineItem(name="Coke", price=300)])])
+    # The status column follows the strings and the one-byte count column; the name column follows the currencies.
+    offset = original.index(b"Coke") + 4 + 2 + 2 * column
+    assert original[offset:offset + 1] == b"B"
+    for code, value in [(b"b", 0xFF), (b"B", 0x7F)]:
+        buffer = bytearray(original)
+        buffer[offset:offset + 2] = code + bytes([value])
+        with pytest.raises(ValueError, match="corrupt"):
+            decode_orders(buffer)
+
+
+def test_rejects_values_that_do_not_fit() -> None:
+    """Test that values outside the widest column type and non-ASCII card numbers are rejected."""
+    with pytest.raises(ValueError, match="does not fit"):
+        encode_orders([Order([LineItem(name="Too much", price=2 ** 63)])])
+    with pytest.raises(ValueError, match="ASCII"):
+        encode_payments([(Order([]), CreditCard("１２３４", 12, 2030))])
+
+
+def test_decode_payments_needs_cards() -> None:
+    """Test that a batch of orders without cards cannot be decoded as payments."""
+    with pytest.raises(ValueError, match="no cards"):
+        decode_payments(encode_orders(make_orders()))
@@ -0,0 +1,147 @@
+import contextlib
+import io
+from pathlib import Path
+import subprocess
+import sys
+import threading
+from datetime import date
+import pytest
+from pay.credit_card import CreditCard
+from pay.events import BufferedEventSink, EventKind, MemoryEventSink, PaymentEvent, mask_card_number, set_event_sink
+from pay.order import LineItem, Order
+from pay.payment import pay_order
+from pay.processor import API_KEY, PaymentProcessor
+
+
+class BlockingStream(io.StringIO):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text: str) -> int:
+        self.release.wait()
+        return super().write(text)
+
+
+@pytest.fixture
+def sink():
+    sink = MemoryEventSink()
+    set_event_sink(sink)
+    yield sink
+    set_event_sink(None)
+
+
+def test_mask_card_number() -> None:
+    """Test that only the last four digits of a card number are shown."""
+    assert mask_card_number("1249190007575069") == "************5069"
+    assert mask_card_number("123") == "123"
+
+
+def test_pay_order_emits_masked_events(sink: MemoryEventSink) -> None:
+    """Test that a payment reports a charged and a paid event without the full card number."""
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    pay_order(Order([LineItem(name="Coke", price=300)]), card, PaymentProcessor(API_KEY))
+    assert [event.kind for event in sink.events] == [EventKind.CHARGED, EventKind.PAID]
+    assert all(card.number not in event.message and event.card == "************5069" for event in sink.events)
+    assert sink.events[1].message == "Order paid in full: $3.00"
+
+
+def test_pay_order_charges_in_the_order_currency(sink: MemoryEventSink) -> None:
+    """Test that a non-USD order is charged and reported in its own currency."""
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    pay_order(Order([LineItem(name="Ramen", price=1200)], currency="JPY"), card, PaymentProcessor(API_KEY))
+    assert [event.message for event in sink.events] == [
+        "Charging card number ************5069 for ¥1200", "Order paid in full: ¥1200",
+    ]
+
+
+def test_pay_order_emits_failure_event(sink: MemoryEventSink) -> None:
+    """Test that an expired card is reported as an expired event."""
+    card = CreditCard("1249190007575069", 12, 2000)
+    pay_order(Order([LineItem(name="Coke", price=300)]), card, PaymentProcessor(API_KEY))
+    assert [event.kind for event in sink.events] == [EventKind.EXPIRED]
+
+
+def test_buffered_sink_writes_events() -> None:
+    """Test that queued events are written to the stream in order."""
+    stream = io.StringIO()
+    sink = BufferedEventSink(stream)
+    for i in range(100):
+        sink.emit(PaymentEvent(EventKind.PAID, f"event {i}"))
+    sink.close()
+    assert stream.getvalue().splitlines() == [f"event {i}" for i in range(100)]
+
+
+def test_buffered_sink_drops_when_full() -> None:
+    """Test that the drop policy discards events instead of blocking when the queue is full."""
+    stream = BlockingStream()
+    sink = BufferedEventSink(stream, max_queue=2, max_batch=1, policy="drop")
+    for i in range(10):
+        sink.emit(PaymentEvent(EventKind.PAID, f"event {i}"))
+    assert sink.dropped >= 7
+    stream.release.set()
+    with pytest.warns(RuntimeWarning, match="dropped"):
+        sink.close()
+    assert len(stream.getvalue().splitlines()) == 10 - sink.dropped
+
+
+def test_buffered_sink_binds_stdout_when_created() -> None:
+    """Test that a sink created under redirect_stdout keeps writing to the redirected stream."""
+    stream = io.StringIO()
+    with contextlib.redirect_stdout(stream):
+        sink = BufferedEventSink()
+    sink.emit(PaymentEvent(EventKind.PAID, "paid"))
+    sink.close()
+    assert stream.getvalue() == "paid\n"
+
+
+def test_buffered_sink_unknown_policy() -> None:
+    """Test that an unknown overflow policy is rejected."""
+    with pytest.raises(ValueError):
+        BufferedEventSink(policy="spill")
+
+
+def test_default_sink_works_in_forked_workers() -> None:
+    """Test that events emitted in forked worker processes are written, up to the last one."""
+    code = """
+import multiprocessing
+from pay.events import EventKind, PaymentEvent, emit
+
+def work(worker):
+    for i in range(1000):
+        emit(PaymentEvent(EventKind.CHARGED, f"worker {worker} event {i}"))
+
+emit(PaymentEvent(EventKind.PAID, "parent"))  # starts the default sink before forking
+context = multiprocessing.get_context("fork")
+workers = [context.Process(target=work, args=(worker,)) for worker in range(2)]
+for process in workers:
+    process.start()
+for process in workers:
+    process.join()
+"""
+    root = Path(__file__).resolve().parents[2]
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True, text=True, timeout=60).stdout
+    lines = output.splitlines()
+    assert lines.count("parent") == 1
+    assert sorted(line for line in lines if line != "parent") == sorted(f"worker {w} event {i}" for w in range(2) for i in range(1000))
+
+
+def test_blocking_sink_does_not_hang_in_forked_worker() -> None:
+    """Test that a full queue inherited by a child does not block it forever."""
+    code = """
+import multiprocessing
+from pay.events import BufferedEventSink, EventKind, PaymentEvent, emit, set_event_sink
+
+def work():
+    for i in range(100):
+        emit(PaymentEvent(EventKind.CHARGED, "child"))
+
+set_event_sink(BufferedEventSink(max_queue=1, policy="block"))
+process = multiprocessing.get_context("fork").Process(target=work)
+process.start()
+process.join()
+"""
+    root = Path(__file__).resolve().parents[2]
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True, text=True, timeout=60).stdout
+    assert output.splitlines() == ["child"] * 100
@@ -0,0 +1,97 @@
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import pytest
+from pay.credit_card import CreditCard
+from pay.gateway import GatewayError, HttpPaymentProcessor, StandInGateway, parse_latency
+from pay.loadgen import run_load
+from pay.order import LineItem, Order, OrderStatus
+from pay.payment import CardExpiredError, InvalidMonthError, pay_order
+
+
+@pytest.fixture
+def card() -> CreditCard:
+    return CreditCard("1249190007575069", 12, date.today().year + 2)
+
+
+@pytest.fixture
+def gateway():
+    with StandInGateway(api_key="secret") as gateway:
+        yield gateway
+
+
+def test_http_processor_pays_order(gateway: StandInGateway, card: CreditCard) -> None:
+    """Test that pay_order works end to end through the stand-in gateway."""
+    order = Order([LineItem(name="Coke", price=300)])
+    with HttpPaymentProcessor(gateway.url, "secret") as processor:
+        pay_order(order, card, processor)
+    assert order.status == OrderStatus.PAID
+    assert gateway.requests == 2
+
+
+def test_http_processor_maps_errors(gateway: StandInGateway, card: CreditCard) -> None:
+    """Test that gateway rejections are raised as the processor's exceptions."""
+    with HttpPaymentProcessor(gateway.url, "secret") as processor:
+        with pytest.raises(InvalidMonthError):
+            processor.validate_card(card, 13, card.expiry_year)
+        with pytest.raises(CardExpiredError):
+            processor.validate_card(card, 1, 2000)
+        with pytest.raises(ValueError):
+            processor.validate_card(CreditCard("1234", 12, card.expiry_year), 12, card.expiry_year)
+    with HttpPaymentProcessor(gateway.url, "wrong") as processor, pytest.raises(GatewayError):
+        processor.charge(card, 500)
+
+
+def test_http_processor_survives_non_json_responses(card: CreditCard) -> None:
+    """Test that an HTML error page raises GatewayError and returns the connection to the pool."""
+    class ProxyErrorHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = b"<html><body>502 Bad Gateway</body></html>"
+            self.send_response(502)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProxyErrorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with HttpPaymentProcessor(f"http://127.0.0.1:{server.server_address[1]}", pool_size=1, timeout=5) as processor:
+            for _ in range(2):
+                with pytest.raises(GatewayError, match="502"):
+                    processor.charge(card, 500)
+            assert processor._pool.qsize() == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_gateway_error_rate_and_rate_limit(card: CreditCard) -> None:
+    """Test that injected errors and rate limiting are reported as gateway errors."""
+    with StandInGateway(error_rate=1.0) as gateway, HttpPaymentProcessor(gateway.url) as processor:
+        with pytest.raises(GatewayError):
+            processor.charge(card, 500)
+    with StandInGateway(rate_limit=1) as gateway, HttpPaymentProcessor(gateway.url) as processor:
+        processor.charge(card, 500)
+        with pytest.raises(GatewayError):
+            processor.charge(card, 500)
+
+
+def test_run_load_reports_percentiles() -> None:
+    """Test that the load generator times every payment."""
+    with StandInGateway(latency=parse_latency("uniform:0.001:0.002")) as gateway:
+        with HttpPaymentProcessor(gateway.url, pool_size=4) as processor:
+            report = run_load(processor, payments=40, concurrency=4)
+    assert len(report.latencies) == 40
+    assert report.statuses == {"paid": 40}
+    assert 0 < report.percentile(50) <= report.percentile(99)
+
+
+def test_parse_latency_unknown_model() -> None:
+    """Test that an unknown latency model is rejected."""
+    with pytest.raises(ValueError):
+        parse_latency("gaussian:1")
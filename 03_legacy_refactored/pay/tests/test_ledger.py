@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+import sqlite3
+import pytest
+from pay.credit_card import CreditCard
+from pay.ledger import ChargeLedger, LedgerClosedError
+from pay.order import Order, LineItem, OrderStatus
+from pay.payment import PaymentResult, PaymentStatus
+
+
+class CountingProcessor:
+
+    def __init__(self) -> None:
+        self.charges = 0
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        pass
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        self.charges += 1
+
+
+@pytest.fixture
+def card() -> CreditCard:
+    return CreditCard("1249190007575069", 12, date.today().year + 2)
+
+
+def make_order() -> Order:
+    return Order([LineItem(name="Coke", price=300)])
+
+
+def test_ledger_records_attempts(tmp_path: Path, card: CreditCard) -> None:
+    """Test that every attempt is written to the database, with only the last 4 digits of the card."""
+    path = tmp_path / "ledger.db"
+    with ChargeLedger(path) as ledger:
+        ledger.record("order-1", card, PaymentResult(PaymentStatus.FAILED, 300, "Card declined"))
+        ledger.record("order-1", card, PaymentResult(PaymentStatus.PAID, 300))
+    rows = sqlite3.connect(path).execute("SELECT idempotency_key, card_last4, amount, status FROM charges ORDER BY id").fetchall()
+    assert rows == [("order-1", "5069", 300, "failed"), ("order-1", "5069", 300, "paid")]
+
+
+def test_ledger_pay_charges_once(tmp_path: Path, card: CreditCard) -> None:
+    """Test that a re-submitted order is not charged again, also after reopening the ledger."""
+    processor = CountingProcessor()
+    order = make_order()
+    with ChargeLedger(tmp_path / "ledger.db") as ledger:
+        assert ledger.pay("order-1", order, card, processor).status == PaymentStatus.PAID
+        assert ledger.pay("order-1", make_order(), card, processor).status == PaymentStatus.DUPLICATE
+    assert order.status == OrderStatus.PAID
+    with ChargeLedger(tmp_path / "ledger.db") as ledger:
+        assert ledger.is_paid("order-1")
+        assert ledger.pay("order-1", make_order(), card, processor).status == PaymentStatus.DUPLICATE
+    assert processor.charges == 1
+
+
+def test_ledger_group_commits_concurrent_charges(tmp_path: Path, card: CreditCard) -> None:
+    """Test that concurrent charges are committed together in fewer transactions."""
+    processor = CountingProcessor()
+    with ChargeLedger(tmp_path / "ledger.db", max_delay=0.05) as ledger:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda i: ledger.pay(f"order-{i}", make_order(), card, processor), range(200)))
+        assert all(result.paid for result in results)
+        assert ledger.commits < 200
+
+
+def test_ledger_rejects_records_after_close(tmp_path: Path, card: CreditCard) -> None:
+    """Test that the ledger refuses new records once closed."""
+    ledger = ChargeLedger(tmp_path / "ledger.db")
+    ledger.close()
+    with pytest.raises(LedgerClosedError):
+        ledger.record("order-1", card, PaymentResult(PaymentStatus.PAID, 300))
+
+
+def test_ledger_blocks_key_with_unknown_outcome(tmp_path: Path, card: CreditCard) -> None:
+    """Test that a charge that raised leaves its key blocked, also after reopening, until its outcome is recorded."""
+    class BrokenProcessor(CountingProcessor):
+        def charge(self, card: CreditCard, amount: int) -> None:
+            self.charges += 1
+            raise RuntimeError("connection reset")
+
+    processor = BrokenProcessor()
+    with ChargeLedger(tmp_path / "ledger.db") as ledger:
+        with pytest.raises(RuntimeError):
+            ledger.pay("order-1", make_order(), card, processor)
+        assert ledger.has_unknown_outcome("order-1")
+        assert ledger.pay("order-1", make_order(), card, processor).status == PaymentStatus.DUPLICATE
+    with ChargeLedger(tmp_path / "ledger.db") as ledger:
+        assert ledger.has_unknown_outcome("order-1")
+        assert ledger.pay("order-1", make_order(), card, CountingProcessor()).status == PaymentStatus.DUPLICATE
+        ledger.record("order-1", card, PaymentResult(PaymentStatus.FAILED, 300, "Reconciled: not charged"))
+        assert not ledger.has_unknown_outcome("order-1")
+        assert ledger.pay("order-1", make_order(), card, CountingProcessor()).paid
+    assert processor.charges == 1
+
+
+def test_ledger_writes_pending_row_before_charging(tmp_path: Path, card: CreditCard) -> None:
+    """Test that the key is durable in the ledger before the processor is called."""
+    path = tmp_path / "ledger.db"
+
+    class InspectingProcessor(CountingProcessor):
+        def charge(self, card: CreditCard, amount: int) -> None:
+            self.rows = sqlite3.connect(path).execute("SELECT idempotency_key, status FROM charges").fetchall()
+
+    processor = InspectingProcessor()
+    with ChargeLedger(path) as ledger:
+        ledger.pay("order-1", make_order(), card, processor)
+    assert processor.rows == [("order-1", "pending")]
+
+
+def test_ledger_close_races_with_submit(tmp_path: Path, card: CreditCard) -> None:
+    """Test that every record submitted concurrently with close is either rejected or committed."""
+    ledger = ChargeLedger(tmp_path / "ledger.db")
+    result = PaymentResult(PaymentStatus.PAID, 300)
+
+    def submit(i: int) -> object:
+        try:
+            return ledger.submit(f"order-{i}", card, result)
+        except LedgerClosedError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(submit, i) for i in range(500)]
+        ledger.close()
+        for future in futures:
+            if future.result() is not None:
+                future.result().result(timeout=5)
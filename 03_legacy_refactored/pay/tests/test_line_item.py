@@ -1,4 +1,6 @@
-from pay.order import LineItem
+from dataclasses import FrozenInstanceError
+import pytest
+from pay.order import LineItem, FrozenLineItem, Order
 
 def test_line_item_total() -> None:
     """Test that the total price of a LineItem is calculated correctly."""
@@ -30,4 +32,18 @@ def test_line_item_price() -> None:
     """Test that the price property of a LineItem can be set and retrieved."""
     line_item = LineItem(name='Test', price=1000)
     line_item.price = 2000
-    assert line_item.price == 2000
\ No newline at end of file
+    assert line_item.price == 2000
+def test_line_item_has_no_instance_dict() -> None:
+    """Test that LineItem is slotted and does not carry a per-instance __dict__."""
+    line_item = LineItem(name='Test', price=1000)
+    assert not hasattr(line_item, '__dict__')
+
+def test_frozen_line_item_in_order() -> None:
+    """Test that a FrozenLineItem cannot be changed and still counts towards an order total."""
+    line_item = FrozenLineItem(name='Test', price=1000, quantity=2)
+    with pytest.raises(FrozenInstanceError):
+        line_item.price = 2000
+    order = Order([line_item, LineItem(name='Other', price=500)])
+    assert order.total == 2500
+    order.remove_item(line_item)
+    assert order.total == 500
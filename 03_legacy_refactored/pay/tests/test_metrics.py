@@ -0,0 +1,61 @@
+import json
+from datetime import date
+import pytest
+from pay.credit_card import CreditCard
+from pay.metrics import LatencyHistogram, Metrics, METRICS, bucket_of, bucket_upper_bound
+from pay.order import LineItem, Order
+from pay.payment import pay_order
+from pay.processor import API_KEY, PaymentProcessor
+
+
+@pytest.fixture
+def metrics():
+    METRICS.reset()
+    METRICS.enable()
+    yield METRICS
+    METRICS.disable()
+    METRICS.reset()
+
+
+def test_bucket_bounds_contain_values() -> None:
+    """Test that every value falls in a bucket whose upper bound is within 25% of it."""
+    for value in list(range(200)) + [10**6, 123_456_789]:
+        bound = bucket_upper_bound(bucket_of(value))
+        assert value <= bound <= max(value * 1.25, value + 1)
+
+
+def test_histogram_percentiles() -> None:
+    """Test that percentiles are upper bounds close to the recorded values."""
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.record(value)
+    assert histogram.count == 1000
+    assert 500 <= histogram.percentile(50) <= 625
+    assert histogram.percentile(100) == 1000
+
+
+def test_disabled_metrics_record_nothing() -> None:
+    """Test that nothing is recorded while metrics are disabled."""
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    PaymentProcessor(API_KEY).validate_card(card, card.expiry_month, card.expiry_year)
+    assert Metrics().snapshot() == {"stages": {}, "errors": {}}
+    assert METRICS.snapshot() == {"stages": {}, "errors": {}}
+
+
+def test_pay_order_stages_and_errors(metrics: Metrics) -> None:
+    """Test that pay_order records its stages and counts the errors it handles."""
+    processor = PaymentProcessor(API_KEY)
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    pay_order(Order([LineItem(name="Coke", price=300)]), card, processor)
+    pay_order(Order([LineItem(name="Coke", price=300)]), CreditCard(card.number, 13, card.expiry_year), processor)
+    pay_order(Order([LineItem(name="Coke", price=300)]), CreditCard(card.number, 12, 2000), processor)
+    pay_order(Order([LineItem(name="Coke", price=300)]), CreditCard("1234", 12, card.expiry_year), processor)
+    with pytest.raises(ValueError):
+        pay_order(Order(), card, processor)
+
+    snapshot = json.loads(metrics.to_json())
+    assert snapshot["stages"]["pay_order"]["count"] == 5
+    assert snapshot["stages"]["order_total"]["count"] == 5
+    assert snapshot["stages"]["validate_card"]["count"] == 4
+    assert snapshot["stages"]["charge"]["count"] == 1
+    assert snapshot["errors"] == {"InvalidMonthError": 1, "CardExpiredError": 1, "ValueError": 2}
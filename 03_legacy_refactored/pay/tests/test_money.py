@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from pay.money import CurrencyMismatchError, Money, format_money, formatter, sum_minor_units
+from pay.order import LineItem, Order
+
+
+@pytest.mark.parametrize("amount, currency, text", [
+    (300, "USD", "$3.00"),
+    (5, "USD", "$0.05"),
+    (-123456, "EUR", "-€1234.56"),
+    (123456, "JPY", "¥123456"),
+    (1234, "KWD", "KWD 1.234"),
+    (10 ** 30 + 1, "USD", "$10000000000000000000000000000.01"),
+])
+def test_format_money(amount: int, currency: str, text: str) -> None:
+    """Test that amounts are formatted exactly in the currency's minor units."""
+    assert format_money(amount, currency) == text
+    assert str(Money(amount, currency)) == text
+
+
+def test_formatter_is_cached_per_currency() -> None:
+    """Test that every currency gets one formatter."""
+    assert formatter("USD") is formatter("USD")
+    assert formatter("USD") is not formatter("EUR")
+
+
+@pytest.mark.parametrize("text, amount", [("12.34", 1234), ("7", 700), (".5", 50), ("-0.05", -5)])
+def test_parse(text: str, amount: int) -> None:
+    """Test that decimal strings are parsed into minor units."""
+    assert Money.parse(text) == Money(amount)
+
+
+@pytest.mark.parametrize("text", ["", ".", "1.234", "1,00", "abc", "1e3"])
+def test_parse_invalid(text: str) -> None:
+    """Test that malformed amounts and too many decimals are rejected."""
+    with pytest.raises(ValueError):
+        Money.parse(text)
+
+
+def test_arithmetic_and_currency_checks() -> None:
+    """Test that Money adds, compares and multiplies within one currency only."""
+    assert Money(100) + Money(250) == Money(350)
+    assert Money(100) - Money(250) == Money(-150)
+    assert 3 * Money(100) == Money(100) * 3 == Money(300)
+    assert sum([Money(1), Money(2)]) == Money(3)
+    assert Money(1) < Money(2) <= Money(2)
+    assert Money.total([Money(1, "EUR"), Money(2, "EUR")], "EUR") == Money(3, "EUR")
+    with pytest.raises(CurrencyMismatchError):
+        Money(1) + Money(1, "EUR")
+    with pytest.raises(CurrencyMismatchError):
+        Money(1) < Money(1, "EUR")
+    with pytest.raises(TypeError):
+        Money(1.5)
+
+
+def test_sum_minor_units_does_not_overflow() -> None:
+    """Test that NumPy sums past the int64 range are still exact."""
+    amounts = np.full(1_000, 2 ** 62, dtype=np.int64)
+    assert sum_minor_units(amounts) == 1_000 * 2 ** 62
+    assert sum_minor_units(np.array([2 ** 64 - 1, 1], dtype=np.uint64)) == 2 ** 64
+    assert sum_minor_units(np.arange(1_000)) == sum(range(1_000))
+    assert sum_minor_units(np.array([], dtype=np.int64)) == 0
+    assert sum_minor_units(np.array([-2 ** 63, -2 ** 63, 5], dtype=np.int64)) == -2 ** 64 + 5
+    assert sum_minor_units(np.array([2 ** 70, 1], dtype=object)) == 2 ** 70 + 1
+    assert sum_minor_units([1, 2, 3]) == 6
+    with pytest.raises(TypeError):
+        sum_minor_units(np.array([1.5]))
+
+
+def test_order_amount() -> None:
+    """Test that an order reports its total as Money in its currency."""
+    order = Order([LineItem(name="Shoes", price=100_00, quantity=2)], currency="EUR")
+    assert order.amount == Money(200_00, "EUR")
+    assert Order().amount == Money(0)
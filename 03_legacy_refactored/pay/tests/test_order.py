@@ -23,3 +23,74 @@ def test_order_pay() -> None:
     order = Order()
     order.pay()
     assert order.status == OrderStatus.PAID
+
+def test_order_add_and_remove_item() -> None:
+    """Test that add_item and remove_item keep the order total up to date."""
+    order = Order()
+    coke = LineItem(name="Coke", price=100, quantity=2)
+    order.add_item(coke)
+    order.add_item(LineItem(name="Pepsi", price=150))
+    assert order.total == 350
+    order.remove_item(coke)
+    assert order.total == 150
+
+def test_order_total_follows_line_item_changes() -> None:
+    """Test that changing the price or quantity of a line item updates the order total."""
+    item = LineItem(name="Coke", price=100)
+    order = Order([item])
+    item.quantity = 3
+    assert order.total == 300
+    item.price = 200
+    assert order.total == 600
+
+def test_order_total_with_list_operations() -> None:
+    """Test that the total stays correct through the usual list operations on line_items."""
+    order = Order()
+    order.line_items.extend([LineItem(name="A", price=100), LineItem(name="B", price=200)])
+    order.line_items[0] = LineItem(name="C", price=50)
+    order.line_items.insert(0, LineItem(name="D", price=10))
+    order.line_items.pop()
+    del order.line_items[0]
+    assert order.total == sum(item.total for item in order.line_items) == 50
+    order.line_items = [LineItem(name="E", price=5, quantity=4)]
+    assert order.total == 20
+    order.line_items.clear()
+    assert order.total == 0
+
+def test_removed_line_item_no_longer_affects_total() -> None:
+    """Test that a removed line item does not change the order total anymore."""
+    item = LineItem(name="Coke", price=100)
+    order = Order([item])
+    order.remove_item(item)
+    item.quantity = 10
+    assert order.total == 0
+
+def test_shared_line_item_does_not_keep_orders_alive() -> None:
+    """Test that an item shared by many orders updates all of them and keeps none of them alive."""
+    import gc
+    import weakref
+    shared = LineItem(name="Gift wrap", price=100)
+    orders = [Order([shared, LineItem(name="Coke", price=i)]) for i in range(3)]
+    shared.price = 200
+    assert [order.total for order in orders] == [200, 201, 202]
+    discarded = weakref.ref(Order([shared]).line_items)
+    gc.collect()
+    assert discarded() is None
+    shared.quantity = 2
+    assert [order.total for order in orders] == [400, 401, 402]
+    assert len(shared._containers) == 3
+
+def test_repricing_does_not_resum_other_orders() -> None:
+    """Test that a price change is applied to the totals of the lists holding the item, without re-summing them."""
+    item, other = LineItem(name="Coke", price=100), LineItem(name="Pepsi", price=150)
+    order, unrelated = Order([item, other]), Order([other])
+    for line_items in (order.line_items, unrelated.line_items):
+        list.append(line_items, LineItem(name="Untracked", price=1))  # Bypasses the running total.
+    item.price = 300
+    assert order.total == 450 and unrelated.total == 150
+
+def test_line_items_can_be_passed_as_any_iterable() -> None:
+    """Test that Order wraps lists, tuples and generators of line items."""
+    items = [LineItem(name="Coke", price=100), LineItem(name="Pepsi", price=150, quantity=2)]
+    assert Order(items).total == Order(tuple(items)).total == Order(item for item in items).total == 400
+    assert Order(line_items=items, status=OrderStatus.PAID, currency="EUR") == Order(list(items), OrderStatus.PAID, "EUR")
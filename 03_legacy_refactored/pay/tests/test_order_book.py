@@ -0,0 +1,79 @@
+import pickle
+from datetime import date
+from pay.order import LineItem, Order, OrderStatus
+from pay.order_book import LineItemTable, OrderBook
+from pay.payment import pay_order
+from pay.credit_card import CreditCard
+
+
+def test_line_item_table_totals() -> None:
+    """Test that the vectorized line totals match LineItem.total."""
+    items = [LineItem(name="Coke", price=100, quantity=3), LineItem(name="Pepsi", price=150)]
+    table = LineItemTable(items)
+    assert table.line_totals().tolist() == [item.total for item in items]
+    assert table.total() == 450
+
+
+def test_line_item_table_dictionary_encodes_names() -> None:
+    """Test that every distinct name is stored only once."""
+    table = LineItemTable(LineItem(name="Coke", price=100) for _ in range(5))
+    assert table.names == ["Coke"]
+    assert [row.name for row in table] == ["Coke"] * 5
+
+
+def test_totals_do_not_overflow() -> None:
+    """Test that line totals and order totals beyond the int64 range are exact."""
+    table = LineItemTable([LineItem(name="Server", price=2 ** 62, quantity=4), LineItem(name="Coke", price=-300)])
+    assert table.line_totals().tolist() == [2 ** 64, -300]
+    assert table.total() == 2 ** 64 - 300
+    book = OrderBook()
+    book.add_order([LineItem(name="Server", price=2 ** 62, quantity=1)] * 3)
+    book.add_order([LineItem(name="Coke", price=300)])
+    assert book.order_totals().tolist() == [3 * 2 ** 62, 300]
+    assert book.total() == 3 * 2 ** 62 + 300
+    assert OrderBook().order_totals().tolist() == []
+
+
+def test_order_book_order_totals() -> None:
+    """Test that per-order totals are grouped correctly, including an empty order."""
+    book = OrderBook()
+    book.add_order([LineItem(name="Coke", price=100, quantity=2)])
+    book.add_order([])
+    book.add_order([LineItem(name="Hat", price=50_00), LineItem(name="Coke", price=100)])
+    assert book.order_totals().tolist() == [200, 0, 5100]
+    assert [order.total for order in book] == [200, 0, 5100]
+    assert book.total() == 5300
+
+
+def test_order_book_row_views_write_through() -> None:
+    """Test that changing a row view updates the table and the order total."""
+    book = OrderBook()
+    book.add_order([LineItem(name="Coke", price=100)])
+    order = book.order(0)
+    order.line_items[0].quantity = 4
+    assert order.total == 400
+    assert book.order_totals().tolist() == [400]
+
+
+def test_order_book_pay_order() -> None:
+    """Test that pay_order works on an order book view and the paid status is kept."""
+
+    class AcceptingProcessor:
+        def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+            pass
+
+        def charge(self, card: CreditCard, amount: int) -> None:
+            pass
+
+    book = OrderBook()
+    book.add_order([LineItem(name="Coke", price=300)])
+    pay_order(book.order(0), CreditCard("1249190007575069", 12, date.today().year + 2), AcceptingProcessor())
+    assert book.order(0).status == OrderStatus.PAID
+
+
+def test_order_book_order_pickles_as_plain_order() -> None:
+    """Test that an order book view can be sent to another process as a plain Order."""
+    book = OrderBook()
+    book.add_order([LineItem(name="Coke", price=300, quantity=2)])
+    order = pickle.loads(pickle.dumps(book.order(0)))
+    assert order == Order([LineItem(name="Coke", price=300, quantity=2)])
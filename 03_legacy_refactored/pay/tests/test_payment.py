@@ -1,5 +1,6 @@
+import asyncio
 from pay.order import Order, LineItem, OrderStatus
-from pay.payment import pay_order
+from pay.payment import pay_order, pay_order_async, ThreadedPaymentProcessor
 import pytest
 from pay.credit_card import CreditCard
 from datetime import date
@@ -65,3 +66,38 @@ def test_pay_order_card_expired(card: CreditCard) -> None:
         pay_order(order, card, PaymentProcessorMock())
         PaymentProcessorMock().validate_card(card, card.expiry_month, card.expiry_year)
         assert order.status == OrderStatus.OPEN
+
+
+def test_pay_order_async_valid(card: CreditCard) -> None:
+    """Test that pay_order_async marks the order as paid through the thread pool adapter."""
+    order = Order()
+    order.line_items.append(LineItem(name="Coke", price=300))
+    asyncio.run(pay_order_async(order, card, ThreadedPaymentProcessor(PaymentProcessorMock())))
+    assert order.status == OrderStatus.PAID
+
+
+def test_pay_order_async_card_expired(card: CreditCard) -> None:
+    """Test that an expired card leaves the order open, as with pay_order."""
+    card.expiry_year = date.today().year - 1
+    order = Order()
+    order.line_items.append(LineItem(name="Coke", price=300))
+    asyncio.run(pay_order_async(order, card, ThreadedPaymentProcessor(PaymentProcessorMock())))
+    assert order.status == OrderStatus.OPEN
+
+
+def test_pay_order_async_invalid(card: CreditCard) -> None:
+    """Test that a ValueError is raised for an order with total 0."""
+    with pytest.raises(ValueError):
+        asyncio.run(pay_order_async(Order(), card, ThreadedPaymentProcessor(PaymentProcessorMock())))
+
+
+def test_pay_order_async_many_in_flight(card: CreditCard) -> None:
+    """Test that many payments can run concurrently on one event loop."""
+    orders = [Order([LineItem(name="Coke", price=300)]) for _ in range(1000)]
+    processor = ThreadedPaymentProcessor(PaymentProcessorMock())
+
+    async def pay_all() -> None:
+        await asyncio.gather(*(pay_order_async(order, card, processor) for order in orders))
+
+    asyncio.run(pay_all())
+    assert all(order.status == OrderStatus.PAID for order in orders)
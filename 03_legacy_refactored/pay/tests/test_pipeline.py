@@ -0,0 +1,132 @@
+import io
+import json
+from datetime import date
+import pytest
+from pay import bulk
+from pay.credit_card import CreditCard
+from pay.payment import CardExpiredError
+from pay.pipeline import InvalidRecord, chunked, read_csv, read_jsonl, run_pipeline
+
+YEAR = date.today().year + 2
+
+
+class PaymentProcessorMock:
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        if date.today() > date(year, month, 1):
+            raise CardExpiredError("Card has expired")
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        pass
+
+
+def jsonl_orders() -> str:
+    orders = [
+        {"order_id": "A", "card": {"number": "1249190007575069", "expiry_month": 12, "expiry_year": YEAR},
+         "line_items": [{"name": "Shoes", "price": 10000, "quantity": 2}, {"name": "Hat", "price": 5000}]},
+        {"order_id": "B", "card": {"number": "1249190007575069", "expiry_month": 1, "expiry_year": 2000},
+         "line_items": [{"name": "Hat", "price": 5000}]},
+    ]
+    return "\n".join(json.dumps(order) for order in orders) + "\n"
+
+
+def test_read_jsonl() -> None:
+    """Test that JSONL lines are parsed into orders and cards."""
+    records = list(read_jsonl(io.StringIO(jsonl_orders())))
+    assert [record.order_id for record in records] == ["A", "B"]
+    assert records[0].order.total == 25000
+    assert records[0].card == CreditCard("1249190007575069", 12, YEAR)
+
+
+def test_read_csv_groups_rows_by_order() -> None:
+    """Test that consecutive CSV rows of the same order become one order."""
+    rows = io.StringIO(
+        "order_id,card_number,expiry_month,expiry_year,name,price,quantity\n"
+        f"A,1249190007575069,12,{YEAR},Shoes,10000,2\n"
+        f"A,1249190007575069,12,{YEAR},Hat,5000,\n"
+        f"B,1249190007575069,1,2000,Hat,5000,1\n"
+    )
+    records = list(read_csv(rows))
+    assert [(record.order_id, record.order.total) for record in records] == [("A", 25000), ("B", 5000)]
+
+
+def test_read_jsonl_is_lazy() -> None:
+    """Test that records are parsed only as they are consumed."""
+    lines = iter(jsonl_orders().splitlines() + ["not json"])
+    records = read_jsonl(lines)
+    assert next(records).order_id == "A"
+    assert next(records).order_id == "B"
+    assert isinstance(next(records), InvalidRecord)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_run_pipeline(max_workers: int) -> None:
+    """Test that every order gets a result line and the report counts them."""
+    output = io.StringIO()
+    report = run_pipeline(io.StringIO(jsonl_orders()), output, PaymentProcessorMock(), chunk_size=1, max_workers=max_workers)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(result["order_id"], result["status"], result["amount"]) for result in results] == [
+        ("A", "paid", 25000), ("B", "expired", 5000),
+    ]
+    assert report.records == 2
+    assert report.statuses == {"paid": 1, "expired": 1}
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_malformed_jsonl_records_fail_without_stopping_the_run(max_workers: int) -> None:
+    """Test that bad JSON, a missing field and a non-integer price each fail only their own record."""
+    good = jsonl_orders().splitlines()[0]
+    lines = [
+        "{not json",
+        good,
+        json.dumps({"order_id": "C", "card": {"number": "1249190007575069", "expiry_month": 12, "expiry_year": YEAR}}),
+        good.replace('"price": 5000', '"price": "lots"'),
+        good.replace('"order_id": "A"', '"order_id": "D"'),
+        "[1, 2]",
+    ]
+    output = io.StringIO()
+    report = run_pipeline(io.StringIO("\n".join(lines) + "\n"), output, PaymentProcessorMock(), chunk_size=2, max_workers=max_workers)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(result["order_id"], result["status"]) for result in results] == [
+        ("", "failed"), ("A", "paid"), ("C", "failed"), ("A", "failed"), ("D", "paid"), ("", "failed"),
+    ]
+    assert results[0]["message"].startswith("Invalid record at line 1: ")
+    assert results[2]["message"] == "Invalid record at line 3: missing field 'line_items'"
+    assert results[3]["message"].startswith("Invalid record at line 4: ")
+    assert report.statuses == {"paid": 2, "failed": 4}
+
+
+def test_malformed_csv_row_fails_its_order() -> None:
+    """Test that an order with a malformed row is reported with the row's line and the next order is read."""
+    rows = io.StringIO(
+        "order_id,card_number,expiry_month,expiry_year,name,price,quantity\n"
+        f"A,1249190007575069,12,{YEAR},Shoes,10000,2\n"
+        f"A,1249190007575069,12,{YEAR},Hat,five,\n"
+        f"A,1249190007575069,12,{YEAR},Scarf,300,\n"
+        f"B,1249190007575069,1,2000,Hat,5000,1\n"
+    )
+    records = list(read_csv(rows))
+    assert isinstance(records[0], InvalidRecord) and records[0].order_id == "A"
+    assert records[0].message.startswith("Invalid record at line 3: ")
+    assert [(record.order_id, record.order.total) for record in records[1:]] == [("B", 5000)]
+
+
+def test_one_thread_pool_for_the_whole_run(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a parallel run creates one thread pool, however many chunks it has."""
+    pools = []
+
+    class CountingPool(bulk.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs) -> None:
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(bulk, "ThreadPoolExecutor", CountingPool)
+    report = run_pipeline(io.StringIO(jsonl_orders() * 5), io.StringIO(), PaymentProcessorMock(), chunk_size=1, max_workers=2)
+    assert report.records == 10
+    assert len(pools) == 1
+
+
+def test_chunked_invalid_chunk_size() -> None:
+    """Test that a ValueError is raised for a chunk size below 1."""
+    with pytest.raises(ValueError):
+        list(chunked([], 0))
@@ -1,16 +1,14 @@
-from pay.processor import PaymentProcessor, luhn_checksum, CardExpiredError
-from dotenv import load_dotenv
+from pay.processor import PaymentProcessor, luhn_checksum, CardExpiredError, CardValidation
 import os
 import pytest
-from datetime import date
+from datetime import date, datetime
+from pay.clock import MonthClock
 from pay.credit_card import CreditCard
+from pay.settings import get_settings
 
-# Load environment variables
-load_dotenv()
-
-# Set environment variables
-CARD_NUMBER = os.getenv("CARD_NUMBER")
-API_KEY = os.getenv("API_KEY")
+# The test card from main.py unless another one is set in the environment
+CARD_NUMBER = os.getenv("CARD_NUMBER") or "1249190007575069"
+API_KEY = get_settings().api_key
 
 
 @pytest.fixture
@@ -97,3 +95,69 @@ def test_charge_card_invalid(card: CreditCard, payment_processor: PaymentProcess
         card.number = "1234"
         payment_processor.charge(card, 500)
 
+
+
+def test_luhn_checksum_accepts_bytes_like() -> None:
+    """
+    Test that bytes, bytearray and memoryview card numbers are checked like str.
+    """
+    number = "1249190007575069"
+    for value in (number.encode(), bytearray(number.encode()), memoryview(number.encode())):
+        assert luhn_checksum(value)
+    assert not luhn_checksum(b"1234")
+
+
+def test_luhn_checksum_invalid_character() -> None:
+    """
+    Test that a ValueError is raised when the card number contains a non-digit.
+    """
+    with pytest.raises(ValueError):
+        luhn_checksum("1249-1900-0757-5069")
+
+
+def test_charge_with_validation_skips_second_validation(card: CreditCard, payment_processor: PaymentProcessor, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test that charge does not validate the card again when given a fresh validation token.
+    """
+    validation = payment_processor.validate_card(card, card.expiry_month, card.expiry_year)
+
+    def fail_validation(*args: object) -> None:
+        raise AssertionError("card validated twice")
+
+    monkeypatch.setattr(payment_processor, "validate_card", fail_validation)
+    payment_processor.charge(card, 500, validation)
+
+
+def test_charge_with_validation_for_other_card(card: CreditCard, payment_processor: PaymentProcessor) -> None:
+    """
+    Test that a validation token is not accepted for a card it was not issued for.
+    """
+    validation = payment_processor.validate_card(card, card.expiry_month, card.expiry_year)
+    card.number = "1234"
+    assert not payment_processor.is_validated(card, validation)
+    with pytest.raises(ValueError):
+        payment_processor.charge(card, 500, validation)
+
+
+def test_validation_is_rejected_when_stale_or_tampered(card: CreditCard) -> None:
+    """
+    Test that stale, tampered and foreign validation tokens are not accepted.
+    """
+    payment_processor = PaymentProcessor(API_KEY, validation_ttl=0)
+    assert not payment_processor.is_validated(card, payment_processor.validate_card(card, card.expiry_month, card.expiry_year))
+
+    payment_processor = PaymentProcessor(API_KEY)
+    validation = payment_processor.validate_card(card, card.expiry_month, card.expiry_year)
+    assert payment_processor.is_validated(card, validation)
+    assert not payment_processor.is_validated(card, CardValidation(validation.valid_until + 3600, validation.signature))
+    assert not PaymentProcessor(API_KEY).is_validated(card, validation)
+
+
+def test_validate_card_uses_injected_clock(card: CreditCard) -> None:
+    """
+    Test that expiry is checked against the processor's clock.
+    """
+    clock = MonthClock(lambda: datetime(card.expiry_year, card.expiry_month, 2).timestamp())
+    payment_processor = PaymentProcessor(API_KEY, clock=clock)
+    with pytest.raises(CardExpiredError):
+        payment_processor.validate_card(card, card.expiry_month, card.expiry_year)
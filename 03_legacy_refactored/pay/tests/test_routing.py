@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import time
+import pytest
+from pay.credit_card import CreditCard
+from pay.gateway import GatewayError
+from pay.order import LineItem, Order
+from pay.payment import PaymentStatus, attempt_payment
+from pay.processor import CardExpiredError, PaymentProcessor
+from pay.routing import RoutingProcessor
+
+CARD = CreditCard("1249190007575069", 12, date.today().year + 2)
+
+
+class FakeProcessor:
+    """Answers after a fixed latency and counts its calls."""
+
+    def __init__(self, latency: float = 0.0, error: Exception | None = None) -> None:
+        self.latency = latency
+        self.error = error
+        self.validations = 0
+        self.charges = 0
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        self.validations += 1
+        time.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        self.charges += 1
+        time.sleep(self.latency)
+
+
+def test_routing_prefers_the_fastest_backend() -> None:
+    """Test that after probing every backend most calls go to the one with the lowest latency."""
+    slow, fast = FakeProcessor(0.01), FakeProcessor(0.0)
+    router = RoutingProcessor([slow, fast])
+    for _ in range(20):
+        router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+    assert slow.validations == 1
+    assert fast.validations == 19
+    assert router.stats[0].latency > router.stats[1].latency
+
+
+def test_routing_least_loaded_spreads_calls() -> None:
+    """Test that the least_loaded strategy picks the backend with the fewest calls in flight."""
+    router = RoutingProcessor([FakeProcessor(), FakeProcessor()], strategy="least_loaded")
+    router.stats[0].in_flight = 3
+    assert router._pick() == 1
+
+
+def test_hedge_answers_when_the_first_backend_fails() -> None:
+    """Test that a slow validation is hedged to a second backend, whose answer is used when the first fails."""
+    hung, fast = FakeProcessor(0.3, error=GatewayError("504 Gateway Timeout")), FakeProcessor(0.0)
+    with RoutingProcessor([hung, fast], hedge_after=0.01) as router:
+        start = time.perf_counter()
+        router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+        assert time.perf_counter() - start < 0.6
+        assert router.stats[1].hedges == 1
+        assert hung.validations == fast.validations == 1
+
+
+def test_busy_router_does_not_hedge_answered_validations() -> None:
+    """Test that validations answered in time are not hedged, however many callers share the hedge threads."""
+    backends = [FakeProcessor(0.02), FakeProcessor(0.02)]
+    with RoutingProcessor(backends, hedge_after=0.1, max_hedge_workers=1) as router:
+        with ThreadPoolExecutor(8) as callers:
+            list(callers.map(lambda _: router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year), range(16)))
+    assert sum(stats.hedges for stats in router.stats) == 0
+    assert sum(backend.validations for backend in backends) == 16
+
+
+def test_rejected_card_does_not_wait_for_the_hedge() -> None:
+    """Test that a card rejected by the first backend is raised without waiting for the hedge."""
+    rejecting, slow = FakeProcessor(0.05, error=CardExpiredError("Card is expired.")), FakeProcessor(1.0)
+    with RoutingProcessor([rejecting, slow], hedge_after=0.01) as router:
+        start = time.perf_counter()
+        with pytest.raises(CardExpiredError):
+            router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+        assert time.perf_counter() - start < 0.5
+
+
+def test_charge_is_never_hedged() -> None:
+    """Test that a charge goes to exactly one backend, however slow it is."""
+    backends = [FakeProcessor(0.05), FakeProcessor(0.05)]
+    with RoutingProcessor(backends, hedge_after=0.001) as router:
+        result = attempt_payment(Order([LineItem(name="Coke", price=300)]), CARD, router)
+    assert result.status == PaymentStatus.PAID
+    assert sum(backend.charges for backend in backends) == 1
+
+
+def test_charge_goes_to_the_validating_backend() -> None:
+    """Test that a CardValidation is charged on the processor that issued it."""
+    backends = [PaymentProcessor(None), PaymentProcessor(None)]
+    router = RoutingProcessor(backends)
+    router.stats[1].latency = 1.0
+    validation = router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+    router.stats[0].latency, router.stats[1].latency = 1.0, 0.0
+    router.charge(CARD, 300, validation)
+    assert router.stats[0].calls == 2
+    assert router.stats[1].calls == 0
+
+
+def test_routing_reraises_card_errors() -> None:
+    """Test that a card error from the backend reaches the caller and is counted."""
+    router = RoutingProcessor([FakeProcessor(error=CardExpiredError("Card is expired."))], hedge_after=0.01)
+    with pytest.raises(CardExpiredError):
+        router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+    assert router.stats[0].errors == 1
+    router.close()
+
+
+def test_routing_ejects_failing_backend() -> None:
+    """Test that a backend that fails fast is avoided for a while instead of taking all traffic."""
+    healthy, failing = FakeProcessor(0.002), FakeProcessor(0.0, error=GatewayError("503 Service Unavailable"))
+    router = RoutingProcessor([healthy, failing], eject_for=60)
+    failed = 0
+    for _ in range(50):
+        try:
+            router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+        except GatewayError:
+            failed += 1
+    assert failed == failing.validations == 1
+    assert healthy.validations == 49
+    assert router.stats[1].failures == 1
+    assert router.stats[1].latency is None
+
+
+def test_routing_retries_ejected_backend_later() -> None:
+    """Test that an ejected backend is tried again once its ejection is over, for twice as long if it fails again."""
+    now = [0.0]
+    backend = FakeProcessor(error=GatewayError("503 Service Unavailable"))
+    router = RoutingProcessor([FakeProcessor(), backend], eject_for=1.0, clock=lambda: now[0])
+    router.stats[0].latency = 1.0
+    for expected_until in (1.0, 3.0):
+        assert router._pick() == 1
+        with pytest.raises(GatewayError):
+            router._call(1, "validate_card", CARD, CARD.expiry_month, CARD.expiry_year)
+        assert router.stats[1].ejected_until == expected_until
+        assert router._pick() == 0
+        router.stats[0].in_flight = 0
+        now[0] = expected_until
+    backend.error = None
+    router._call(router._pick(), "validate_card", CARD, CARD.expiry_month, CARD.expiry_year)
+    assert router.stats[1].consecutive_failures == 0
+
+
+def test_routing_does_not_eject_for_card_errors() -> None:
+    """Test that a rejected card counts as an answer, not as a failure of the backend."""
+    router = RoutingProcessor([FakeProcessor(error=ValueError("Invalid Card number"))])
+    with pytest.raises(ValueError):
+        router.validate_card(CARD, CARD.expiry_month, CARD.expiry_year)
+    assert (router.stats[0].errors, router.stats[0].failures, router.stats[0].ejected_until) == (1, 0, 0.0)
+
+
+def test_routing_rejects_bad_arguments() -> None:
+    """Test that the backends, strategy and alpha are checked."""
+    with pytest.raises(ValueError):
+        RoutingProcessor([])
+    with pytest.raises(ValueError):
+        RoutingProcessor([FakeProcessor()], strategy="random")
+    with pytest.raises(ValueError):
+        RoutingProcessor([FakeProcessor()], alpha=0)
@@ -0,0 +1,54 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from pay.processor import PaymentProcessor
+from pay.settings import Settings, get_settings, reset_settings
+from pay.credit_card import CreditCard
+from datetime import date
+
+
+@pytest.fixture(autouse=True)
+def fresh_settings():
+    reset_settings()
+    yield
+    reset_settings()
+
+
+def test_settings_from_env_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a .env file is read, and that the environment wins over it."""
+    env_file = tmp_path / ".env"
+    env_file.write_text("API_KEY=from-file\n")
+    monkeypatch.delenv("API_KEY", raising=False)
+    assert Settings.from_env(env_file).api_key == "from-file"
+    monkeypatch.setenv("API_KEY", "from-env")
+    assert Settings.from_env(env_file).api_key == "from-env"
+
+
+def test_get_settings_is_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the settings are loaded once until they are reset."""
+    monkeypatch.setenv("API_KEY", "first")
+    assert get_settings() is get_settings()
+    assert get_settings().api_key == "first"
+    monkeypatch.setenv("API_KEY", "second")
+    assert get_settings().api_key == "first"
+    reset_settings()
+    assert get_settings().api_key == "second"
+
+
+def test_processor_settings_override(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a processor checks its API key against its own settings when given some."""
+    monkeypatch.setenv("API_KEY", "global")
+    card = CreditCard("1249190007575069", 12, date.today().year + 2)
+    PaymentProcessor("local", settings=Settings(api_key="local")).charge(card, 100)
+    with pytest.raises(ValueError):
+        PaymentProcessor("global", settings=Settings(api_key="local")).charge(card, 100)
+    PaymentProcessor("global").charge(card, 100)
+
+
+def test_import_does_no_configuration_or_async_work() -> None:
+    """Test that importing the payment path neither loads dotenv nor asyncio."""
+    code = "import sys, pay.payment, pay.processor; print(' '.join(m for m in ('dotenv', 'asyncio') if m in sys.modules))"
+    root = Path(__file__).resolve().parents[2]
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True, capture_output=True, text=True).stdout
+    assert output.strip() == ""
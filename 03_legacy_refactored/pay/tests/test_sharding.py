@@ -0,0 +1,96 @@
+from datetime import date
+import pytest
+from pay.credit_card import CreditCard
+from pay.money import Money
+from pay.order import LineItem, Order, OrderStatus
+from pay.payment import PaymentStatus
+from pay.sharding import ShardWorkerError, iter_pay_orders_sharded, pay_orders_sharded, shard_of
+
+YEAR = date.today().year + 2
+
+
+class InOrderProcessor:
+    """Declines a charge when a card is charged less than the last time, i.e. out of input order."""
+
+    def __init__(self) -> None:
+        self.last_amount: dict[str, int] = {}
+
+    def validate_card(self, card: CreditCard, month: int, year: int) -> None:
+        if card.number == "declined":
+            raise ValueError("Card declined")
+
+    def charge(self, card: CreditCard, amount: Money) -> None:
+        if amount.amount < self.last_amount.get(card.number, 0):
+            raise ValueError("Charged out of order")
+        self.last_amount[card.number] = amount.amount
+
+
+class BrokenProcessor(InOrderProcessor):
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        raise RuntimeError("gateway exploded")
+
+
+class ExplodingProcessor(InOrderProcessor):
+
+    def charge(self, card: CreditCard, amount: int) -> None:
+        if card.number == "explodes":
+            raise RuntimeError("gateway timed out after charging")
+
+
+def test_shard_of_is_stable() -> None:
+    """Test that a card always lands in the same shard, whatever its expiry."""
+    assert shard_of(CreditCard("1249190007575069", 12, YEAR), 8) == shard_of(CreditCard("1249190007575069", 1, YEAR + 1), 8)
+    assert {shard_of(CreditCard(str(number), 12, YEAR), 4) for number in range(100)} == {0, 1, 2, 3}
+
+
+def test_pay_orders_sharded_keeps_input_and_card_order() -> None:
+    """Test that results come back in input order and every card is charged in input order."""
+    cards = [CreditCard(f"card-{i}", 12, YEAR) for i in range(10)] + [CreditCard("declined", 12, YEAR)]
+    payments = [(Order([LineItem(name="Coke", price=100 + i)]), cards[i % len(cards)]) for i in range(200)]
+    results = pay_orders_sharded(payments, shards=3, processor_factory=InOrderProcessor, block_size=16)
+    assert [result.amount for result in results] == [100 + i for i in range(200)]
+    for (order, card), result in zip(payments, results):
+        expected = PaymentStatus.FAILED if card.number == "declined" else PaymentStatus.PAID
+        assert result.status == expected
+        assert (order.status == OrderStatus.PAID) == result.paid
+
+
+def test_pay_orders_sharded_empty() -> None:
+    """Test that an empty batch returns no results."""
+    assert pay_orders_sharded([], shards=2, processor_factory=InOrderProcessor) == []
+
+
+def test_pay_orders_sharded_worker_failure() -> None:
+    """Test that an unexpected error in a worker is raised in the caller."""
+    payments = [(Order([LineItem(name="Coke", price=300)]), CreditCard("card", 12, YEAR))]
+    with pytest.raises(ShardWorkerError):
+        pay_orders_sharded(payments, shards=2, processor_factory=BrokenProcessor)
+
+
+def test_pay_orders_sharded_settles_completed_payments_on_failure() -> None:
+    """Test that a payment that raises is reported as unknown and every completed charge is still settled."""
+    cards = [CreditCard(f"card-{i}", 12, YEAR) for i in range(5)]
+    payments = [(Order([LineItem(name="Coke", price=100 + i)]), cards[i % len(cards)]) for i in range(40)]
+    payments[9] = (payments[9][0], CreditCard("explodes", 12, YEAR))
+    yielded = []
+    with pytest.raises(ShardWorkerError, match="Payment 9 failed") as error:
+        for result in iter_pay_orders_sharded(payments, shards=3, processor_factory=ExplodingProcessor, block_size=4):
+            yielded.append(result)
+    assert error.value.unknown == [9]
+    assert len(yielded) <= 8 and all(result.paid for result in yielded)
+    assert set(error.value.results).isdisjoint(range(len(yielded)))
+    for position, (order, _) in enumerate(payments):
+        completed = position < len(yielded) or position in error.value.results
+        assert (order.status == OrderStatus.PAID) == completed
+    assert max(error.value.results) < 16
+
+
+def test_pay_orders_sharded_rejects_bad_arguments() -> None:
+    """Test that the number of shards and the block size must be positive."""
+    with pytest.raises(ValueError):
+        pay_orders_sharded([], shards=-1, processor_factory=InOrderProcessor)
+    with pytest.raises(ValueError):
+        pay_orders_sharded([], shards=0, processor_factory=InOrderProcessor)
+    with pytest.raises(ValueError):
+        pay_orders_sharded([], shards=2, block_size=0, processor_factory=InOrderProcessor)
@@ -0,0 +1,89 @@
+from datetime import date
+import io
+from pathlib import Path
+import numpy as np
+import pytest
+from pay.batch import luhn_checksum_batch
+from pay.card_batch import INVALID_NUMBER, VALID, CardBatch, validate_batch
+from pay.pipeline import read_csv, read_jsonl
+from pay.processor import luhn_checksum
+from pay.synth import Synthesizer, write_card_batch, write_csv, write_jsonl
+
+TODAY = date(2025, 6, 15)
+
+
+def test_same_seed_same_output() -> None:
+    """Test that a seed always produces the same cards and orders, and another seed does not."""
+    assert list(Synthesizer(7).card_numbers(100)) == list(Synthesizer(7).card_numbers(100))
+    assert list(Synthesizer(7).card_numbers(100)) != list(Synthesizer(8).card_numbers(100))
+    first, second = Synthesizer(7).orders(20), Synthesizer(7).orders(20)
+    assert [(r.order, r.card) for r in first] == [(r.order, r.card) for r in second]
+
+
+def test_card_numbers_pass_luhn_with_prefix_and_length() -> None:
+    """Test that valid cards pass the Luhn check and use the configured prefixes and length."""
+    numbers = list(Synthesizer(1, length=19, prefixes=("4", "6011")).card_numbers(1_000))
+    assert all(len(number) == 19 and number.startswith(("4", "6011")) for number in numbers)
+    assert all(luhn_checksum(number) for number in numbers)
+
+
+def test_invalid_rates() -> None:
+    """Test that broken check digits, invalid months and expired cards appear at about their rates."""
+    chunk = Synthesizer(2, invalid_luhn_rate=0.2, invalid_month_rate=0.1, expired_rate=0.3, today=TODAY).card_chunk(50_000)
+    assert np.mean(~luhn_checksum_batch(chunk.numbers)) == pytest.approx(0.2, abs=0.01)
+    assert np.mean((chunk.months == 0) | (chunk.months == 13)) == pytest.approx(0.1, abs=0.01)
+    assert np.mean(chunk.years < TODAY.year) == pytest.approx(0.3, abs=0.01)
+    assert all(not luhn_checksum(number) for number in list(Synthesizer(3, invalid_luhn_rate=1.0).card_numbers(100)))
+
+
+@pytest.mark.parametrize("items", ["fixed", "poisson", "geometric"])
+def test_order_sizes(items: str) -> None:
+    """Test that every order has between 1 and max_items line items, around mean_items on average."""
+    records = list(Synthesizer(4, items=items, mean_items=4, max_items=12).orders(2_000))
+    sizes = [len(record.order.line_items) for record in records]
+    assert 1 <= min(sizes) and max(sizes) <= 12
+    assert np.mean(sizes) == pytest.approx(4, rel=0.1)
+    assert all(record.order.total > 0 for record in records)
+    assert [record.order_id for record in records[:3]] == ["1", "2", "3"]
+
+
+@pytest.mark.parametrize("write, read", [(write_jsonl, read_jsonl), (write_csv, read_csv)])
+def test_written_orders_are_read_back_by_the_pipeline(write, read) -> None:
+    """Test that the JSONL and CSV writers produce the same orders as orders() in the pipeline formats."""
+    file = io.StringIO()
+    assert write(Synthesizer(5), 300, file) == 300
+    file.seek(0)
+    read_back = [(record.order_id, record.order, record.card) for record in read(file)]
+    assert read_back == [(record.order_id, record.order, record.card) for record in Synthesizer(5).orders(300)]
+
+
+def test_card_batch_output(tmp_path: Path) -> None:
+    """Test that a generated card batch maps back with valid and broken numbers where expected."""
+    path = tmp_path / "cards.bin"
+    synthesizer = Synthesizer(6, invalid_luhn_rate=0.5)
+    assert write_card_batch(synthesizer, 1_000, path) == 1_000
+    with CardBatch(path) as batch:
+        codes = validate_batch(batch.records)
+        assert set(np.unique(codes).tolist()) == {VALID, INVALID_NUMBER}
+        assert luhn_checksum(batch.card(0).number) == (codes[0] == VALID)
+        del codes
+
+
+def test_card_records_match_card_numbers(tmp_path: Path) -> None:
+    """Test that card records and card batch files span several chunks and hold the cards of card_numbers()."""
+    count = 70_000
+    expected = list(Synthesizer(7).card_numbers(count))
+    records = Synthesizer(7).card_records(count)
+    assert records["number"].view(np.uint8).reshape(count, -1)[:, :16].view("S16").ravel().astype("U16").tolist() == expected
+    path = tmp_path / "cards.bin"
+    assert write_card_batch(Synthesizer(7), count, path) == count
+    with CardBatch(path) as batch:
+        assert batch.card(0).number == expected[0] and batch.card(count - 1).number == expected[-1]
+        assert batch.records.tobytes() == records.tobytes()
+
+
+def test_bad_settings_are_rejected() -> None:
+    """Test that impossible card lengths, prefixes and item distributions are rejected."""
+    for settings in [{"length": 1}, {"prefixes": ("4x",)}, {"items": "uniform"}, {"mean_items": 0}]:
+        with pytest.raises(ValueError):
+            Synthesizer(**settings)
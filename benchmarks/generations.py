@@ -0,0 +1,173 @@
+"""Microbenchmarks of the hot paths of every code generation in this repository.
+
+Every generation ships its own `pay` package, so each one is measured in a separate
+interpreter with only its own directory on sys.path. The results are written as
+JSON and compared against a stored baseline:
+
+    python benchmarks/generations.py                      # run, compare with baseline.json
+    python benchmarks/generations.py --output results.json
+    python benchmarks/generations.py --update-baseline    # accept the current numbers
+
+The exit status is 1 when any benchmark is slower than its baseline by more than
+the tolerance.
+"""
+import argparse
+import builtins
+import contextlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+GENERATIONS = ["00_legacy", "01_legacy_with_test_added_v1", "02_legacy_with_test_added_v2", "03_legacy_refactored"]
+CARD_NUMBER = "1249190007575069"
+CART_SIZES = [1, 10, 100, 1_000]
+
+
+def time_per_call(function, repeat: int = 5) -> float:
+    """Returns the best time of one call in nanoseconds."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e9
+
+
+def measure_generation() -> dict[str, float]:
+    """Runs every benchmark against the `pay` package on sys.path."""
+    from pay.order import LineItem, Order
+    import pay.payment as payment
+    import pay.processor as processor
+
+    results = {}
+    refactored = hasattr(processor, "luhn_checksum")
+    if refactored:
+        luhn = processor.luhn_checksum
+    else:
+        luhn = processor.PaymentProcessor("").luhn_checksum
+    results["luhn_checksum"] = time_per_call(lambda: luhn(CARD_NUMBER))
+
+    item = LineItem(name="Shoes", price=100_00, quantity=2)
+    results["line_item_total"] = time_per_call(lambda: item.total)
+    for size in CART_SIZES:
+        order = Order()
+        for i in range(size):
+            order.line_items.append(LineItem(name=f"item-{i}", price=100 + i, quantity=1 + i % 3))
+        results[f"order_total[{size}]"] = time_per_call(lambda: order.total)
+
+    def make_order():
+        order = Order()
+        order.line_items.append(LineItem(name="Shoes", price=100_00, quantity=2))
+        order.line_items.append(LineItem(name="Hat", price=50_00))
+        return order
+
+    year = date.today().year + 2
+    if refactored:
+        from pay.credit_card import CreditCard
+
+        class NoOpProcessor:
+            def validate_card(self, card, month, year):
+                pass
+
+            def charge(self, card, amount):
+                pass
+
+        card = CreditCard(CARD_NUMBER, 12, year)
+        noop = NoOpProcessor()
+        pay = lambda: payment.pay_order(make_order(), card, noop)
+    else:
+        # The legacy pay_order prompts for the card and builds its own processor.
+        class NoOpProcessor:
+            def __init__(self, api_key):
+                pass
+
+            def charge(self, card, month, year, amount):
+                pass
+
+        answers = itertools.cycle([CARD_NUMBER, "12", str(year)])
+        builtins.input = lambda prompt="": next(answers)
+        payment.PaymentProcessor = NoOpProcessor
+        pay = lambda: payment.pay_order(make_order())
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if refactored:
+            # Events are written by a background thread, which could otherwise still be
+            # printing after the results: write them to devnull and wait for the last one.
+            from pay.events import BufferedEventSink, set_event_sink
+
+            sink = BufferedEventSink(devnull)
+            set_event_sink(sink)
+            results["pay_order"] = time_per_call(pay)
+            sink.close()
+        else:
+            results["pay_order"] = time_per_call(pay)
+    return results
+
+
+def run_generation(generation: str) -> dict[str, float]:
+    """Measures one generation in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker"],
+        cwd=ROOT / generation, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list[str]:
+    """Returns a line for every benchmark slower than its baseline by more than tolerance.
+
+    Slowdowns smaller than min_delta nanoseconds are ignored as timer noise.
+    """
+    regressions = []
+    for generation, benchmarks in results.items():
+        for name, value in benchmarks.items():
+            reference = baseline.get(generation, {}).get(name)
+            if reference and value > reference * (1 + tolerance) and value - reference > min_delta:
+                regressions.append(f"{generation} {name}: {value:,.0f} ns vs {reference:,.0f} ns baseline (+{value / reference - 1:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--generation", action="append", choices=GENERATIONS, help="only run these generations")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-delta", type=float, default=100.0, help="ignore slowdowns below this many ns")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, str(Path.cwd()))
+        json.dump(measure_generation(), sys.stdout)
+        return 0
+
+    results = {generation: run_generation(generation) for generation in args.generation or GENERATIONS}
+    names = sorted({name for benchmarks in results.values() for name in benchmarks}, key=lambda n: (len(n), n))
+    print(f"{'ns/op':<28}" + "".join(f"{generation[:2]:>12}" for generation in results))
+    for name in names:
+        print(f"{name:<28}" + "".join(f"{results[g].get(name, float('nan')):>12,.0f}" for g in results))
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.tolerance, args.min_delta)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())